@@ -0,0 +1,284 @@
+import logging
+import numpy as np
+import pandas as pd
+from config.constants import (
+    FORECAST_HORIZON, BASELINE_FREQ, BASELINE_ALPHAS, BASELINE_BETAS,
+    CROSTON_ADI_THRESHOLD, BASELINE_TRIAGE_ERROR
+)
+
+METHODS = ('ses', 'holt', 'croston')
+BLOCK_PRODUCTS = 4096  # products smoothed together; keeps the per-step arrays cache-sized
+
+def _nanmean(x, axis=-1):
+    """Mean over non-missing values; NaN (without a warning) where there are none"""
+    count = (~np.isnan(x)).sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, np.nansum(x, axis=axis) / count, np.nan)
+
+def batch_metrics(actual, predicted):
+    """MAE, RMSE and MAPE along the last axis, e.g. one value per product row
+
+    Missing values are ignored and MAPE skips periods with zero actual demand.
+    """
+    actual = np.asarray(actual, dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    error = actual - predicted
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pct = np.where(actual != 0, np.abs(error / actual), np.nan)
+    return {
+        'mae': _nanmean(np.abs(error)),
+        'rmse': np.sqrt(_nanmean(error ** 2)),
+        'mape': _nanmean(pct) * 100
+    }
+
+def _period_series(series, freq):
+    """Per-product period ordinals and demand summed per period, from a ProductSeriesStore"""
+    lengths = np.diff(series.offsets)
+    codes = np.repeat(np.arange(len(lengths)), lengths)
+    ordinals = pd.DatetimeIndex(series.dates).to_period(freq).asi8
+    if not len(ordinals):
+        return ordinals, np.empty(0), np.zeros(len(lengths) + 1, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (ordinals[1:] != ordinals[:-1])])
+    values = np.add.reduceat(series.values, starts)
+    offsets = np.searchsorted(codes[starts], np.arange(len(lengths) + 1))
+    return ordinals[starts], values, offsets
+
+class BaselineForecaster:
+    """Simple exponential smoothing, Holt and Croston over every product at once
+
+    Series come from a ProductSeriesStore, summed per `freq` period with
+    empty periods counting as zero demand. Each recursion steps through time
+    once, updating all products and all candidate smoothing parameters with
+    a few NumPy operations per step, so the cost follows the longest series
+    rather than the number of products. Every product keeps the parameters
+    with the lowest in-sample one-step MAE. 'auto' uses Croston for
+    intermittent demand and otherwise whichever of SES and Holt fits better.
+    Meant as a whole-catalog forecast in seconds, a fallback for products
+    ARIMA/Prophet cannot fit and a triage step picking the products worth
+    fitting them on.
+    """
+
+    def __init__(self, series, freq=BASELINE_FREQ, alphas=BASELINE_ALPHAS, betas=BASELINE_BETAS):
+        self.freq = freq
+        self.alphas = np.asarray(alphas, dtype=np.float64)
+        self.betas = np.asarray(betas, dtype=np.float64)
+        self.products = series.products
+        self.ordinals, self.values, self.offsets = _period_series(series, freq)
+        counts = np.diff(self.offsets)
+        self.codes = np.repeat(np.arange(len(counts)), counts)
+        self.first = np.zeros(len(counts), dtype=np.int64)
+        self.last = np.full(len(counts), -1, dtype=np.int64)
+        self.first[counts > 0] = self.ordinals[self.offsets[:-1][counts > 0]]
+        self.last[counts > 0] = self.ordinals[self.offsets[1:][counts > 0] - 1]
+        self.spans = self.last - self.first + 1  # periods from first to last observation
+        self.fits = {}
+        self.logger = logging.getLogger(__name__)
+
+    def _grid(self, method):
+        if method == 'holt':
+            return np.repeat(self.alphas, len(self.betas)), np.tile(self.betas, len(self.alphas))
+        return self.alphas, np.full(len(self.alphas), np.nan)
+
+    def _fit(self, method, lengths):
+        """Run one method over the first lengths[i] periods of every product"""
+        alpha, beta = self._grid(method)
+        order = np.argsort(-lengths, kind='stable')  # products still running form a prefix
+        # products go through in blocks whose state stays in CPU cache across the time steps
+        blocks = [
+            self._smooth(method, alpha, beta, order[i:i + BLOCK_PRODUCTS], lengths)
+            for i in range(0, len(order), BLOCK_PRODUCTS)
+        ]
+        fit = {key: np.concatenate([b[key] for b in blocks]) for key in blocks[0]} if blocks else {
+            key: np.empty(0) for key in ('alpha', 'beta', 'level', 'trend', 'interval', 'mae', 'rmse')
+        }
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        return {key: value[inverse] for key, value in fit.items()}
+
+    def _smooth(self, method, alpha, beta, products, lengths):
+        """Recursion over a block of products sorted by decreasing length"""
+        lens = lengths[products]
+        first = self.first[products]
+        ptr = self.offsets[:-1][products].copy()  # next unread observation of each product
+        end = self.offsets[1:][products]
+        last_obs = max(len(self.values) - 1, 0)
+
+        # state is (product, parameter) so the running products are one contiguous block
+        n, g = len(products), len(alpha)
+        ab = alpha * beta
+        level = np.zeros((n, g))
+        trend = np.zeros((n, g))  # Holt trend
+        interval = np.ones((n, g))  # Croston demand interval
+        rate = np.zeros((n, g))  # Croston forecast, level / interval
+        since = np.ones(n)  # periods since the previous demand, counting the current one
+        started = np.zeros(n, dtype=bool)
+        sae, sse, n_err = np.zeros((n, g)), np.zeros((n, g)), np.zeros(n)
+        error_buf, scratch_buf = np.empty((n, g)), np.empty((n, g))
+
+        for t in range(int(lens[0])):
+            m = np.searchsorted(-lens, -t, side='left')
+            p = ptr[:m]
+            obs = np.minimum(p, last_obs)
+            hit = (p < end[:m]) & (self.ordinals[obs] == first[:m] + t)
+            y = np.where(hit, self.values[obs], 0.0)[:, None]
+            p += hit
+            L, error, scratch = level[:m], error_buf[:m], scratch_buf[:m]
+
+            if method == 'croston':
+                s = started[:m]
+                np.subtract(y, rate[:m], out=error)
+                error[~s] = 0.0
+                n_err[:m] += s
+                demand = hit & (y[:, 0] > 0)
+                update = np.flatnonzero(demand & s)
+                init = np.flatnonzero(demand & ~s)
+                q = since[:m, None]
+                interval[update] += alpha * (q[update] - interval[update])
+                level[update] += alpha * (y[update] - level[update])
+                interval[init] = q[init]
+                level[init] = y[init]
+                changed = np.flatnonzero(demand)
+                rate[changed] = level[changed] / interval[changed]
+                s |= demand
+                since[:m] = np.where(demand, 1, since[:m] + 1)
+            elif t == 0:
+                L[:] = y
+                continue
+            elif method == 'ses':
+                np.subtract(y, L, out=error)
+                L += np.multiply(alpha, error, out=scratch)
+                n_err[:m] += 1
+            elif method == 'holt':
+                B = trend[:m]
+                if t == 1:  # initial trend from the first two periods
+                    np.subtract(y, L, out=B)
+                    L[:] = y
+                    continue
+                np.subtract(y, L, out=error)
+                error -= B
+                L += B
+                L += np.multiply(alpha, error, out=scratch)
+                B += np.multiply(ab, error, out=scratch)
+                n_err[:m] += 1
+            else:
+                raise ValueError(f"Unsupported method: {method}")
+            sae[:m] += np.abs(error, out=scratch)
+            sse[:m] += np.square(error, out=scratch)
+
+        best = np.argmin(sae, axis=1) if g else np.zeros(n, dtype=int)
+        pick = lambda x: x[np.arange(n), best]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                'alpha': alpha[best], 'beta': beta[best],
+                'level': pick(level), 'trend': pick(trend), 'interval': pick(interval),
+                'mae': np.where(n_err > 0, pick(sae) / n_err, np.nan),
+                'rmse': np.where(n_err > 0, np.sqrt(pick(sse) / n_err), np.nan),
+            }
+
+    def _demand_stats(self, lengths):
+        """Mean demand and mean interval between demands (ADI) within lengths"""
+        inside = self.ordinals - self.first[self.codes] < lengths[self.codes]
+        n = len(lengths)
+        total = np.bincount(self.codes[inside], weights=self.values[inside], minlength=n)
+        demands = np.bincount(self.codes[inside & (self.values > 0)], minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (np.where(lengths > 0, total / lengths, np.nan),
+                    np.where(demands > 0, lengths / demands, np.inf))
+
+    def _select(self, fits, adi):
+        method = np.where(fits['holt']['mae'] < fits['ses']['mae'], 'holt', 'ses')
+        return np.where(adi > CROSTON_ADI_THRESHOLD, 'croston', method)
+
+    def _forecast(self, fits, methods, lengths, horizon):
+        steps = np.arange(1, horizon + 1)
+        forecasts = np.full((len(lengths), horizon), np.nan)
+        for method in METHODS:
+            rows = (methods == method) & (lengths > 0)
+            fit = fits[method]
+            if method == 'ses':
+                values = np.repeat(fit['level'][rows, None], horizon, axis=1)
+            elif method == 'holt':
+                values = np.maximum(fit['level'][rows, None] + fit['trend'][rows, None] * steps, 0)
+            else:
+                values = np.repeat((fit['level'] / fit['interval'])[rows, None], horizon, axis=1)
+            forecasts[rows] = values
+        return forecasts
+
+    def _methods(self, method, adi):
+        if method == 'auto':
+            return self._select(self.fits, adi)
+        return np.full(len(self.products), method)
+
+    def fit(self, methods=METHODS):
+        """Fit the methods on the full history of every product"""
+        self.fits = {method: self._fit(method, self.spans) for method in methods}
+        self.mean_demand, self.adi = self._demand_stats(self.spans)
+        self.logger.info(f"Fitted {', '.join(methods)} on {len(self.products)} products")
+        return self
+
+    def forecast(self, horizon=FORECAST_HORIZON, method='auto'):
+        """(products x horizon) array of forecasts; NaN rows for products without history"""
+        return self._forecast(self.fits, self._methods(method, self.adi), self.spans, horizon)
+
+    def summary(self, method='auto'):
+        """Per-product chosen method, smoothing parameters and in-sample fit"""
+        methods = self._methods(method, self.adi)
+        frame = pd.DataFrame({'method': methods, 'periods': self.spans.clip(min=0),
+                              'mean_demand': self.mean_demand, 'adi': self.adi}, index=self.products)
+        for key in ('alpha', 'beta', 'mae', 'rmse'):
+            frame[key] = np.nan
+            for name in METHODS:
+                rows = methods == name
+                frame.loc[rows, key] = self.fits[name][key][rows]
+        return frame
+
+    def backtest(self, holdout, method='auto'):
+        """Refit without the last `holdout` periods and score forecasts of them, per product"""
+        lengths = np.maximum(self.spans - holdout, 0)
+        fits = {name: self._fit(name, lengths) for name in METHODS}
+        _, adi = self._demand_stats(lengths)
+        methods = self._select(fits, adi) if method == 'auto' else np.full(len(lengths), method)
+        predicted = self._forecast(fits, methods, lengths, holdout)
+
+        actual = np.zeros((len(lengths), holdout))
+        position = self.ordinals - self.first[self.codes] - lengths[self.codes]
+        inside = (position >= 0) & (position < holdout)
+        actual[self.codes[inside], position[inside]] = self.values[inside]
+        actual[lengths == 0] = np.nan
+        metrics = batch_metrics(actual, predicted)
+        return pd.DataFrame(dict(method=methods, **metrics), index=self.products)
+
+    def triage(self, max_error=BASELINE_TRIAGE_ERROR):
+        """Products the baseline fits poorly - the ones worth an ARIMA/Prophet fit
+
+        A product qualifies when the in-sample MAE of its selected method is
+        above max_error times its mean demand. Intermittent products stay with
+        Croston, which the per-product models do not improve on.
+        """
+        summary = self.summary()
+        poor = (summary['mae'] > max_error * summary['mean_demand'].abs()) & (summary['method'] != 'croston')
+        return list(summary.index[poor.to_numpy()])
+
+    def results(self, horizon=FORECAST_HORIZON, method='auto'):
+        """Fit results in the layout ProductDemandForecaster persists to the ForecastStore"""
+        forecasts = self.forecast(horizon, method)
+        methods = self._methods(method, self.adi)
+        has_history = self.spans > 0
+        last_dates = np.full(len(self.products), None, dtype=object)
+        last_dates[has_history] = pd.PeriodIndex.from_ordinals(self.last[has_history], freq=self.freq) \
+            .to_timestamp(how='end').normalize().map(pd.Timestamp.isoformat)
+        results = []
+        for i, product in enumerate(self.products):
+            if not has_history[i]:
+                results.append({'product': product, 'status': 'failed', 'error': 'No observations',
+                                'series_hash': None, 'freq': self.freq})
+                continue
+            fit = self.fits[methods[i]]
+            params = {'method': str(methods[i]), 'alpha': float(fit['alpha'][i])}
+            if methods[i] == 'holt':
+                params['beta'] = float(fit['beta'][i])
+            results.append({
+                'product': product, 'status': 'ok', 'params': params, 'forecast': forecasts[i],
+                'last_date': last_dates[i], 'freq': self.freq, 'series_hash': None
+            })
+        return results
@@ -0,0 +1,83 @@
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from config.constants import FORECAST_STORE_PATH
+
+class ForecastStore:
+    """Compact SQLite store of per-product fitted parameters and forecasts
+
+    One row per (product, model). Forecasts are stored as float32 blobs next to
+    the hash of the series they were fitted on, so callers can skip products
+    whose history has not changed.
+    """
+
+    def __init__(self, path=FORECAST_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS forecasts ('
+            'product TEXT, model TEXT, series_hash TEXT, status TEXT, error TEXT, '
+            'params TEXT, last_date TEXT, freq TEXT, forecast BLOB, fitted_at REAL, '
+            'PRIMARY KEY (product, model))'
+        )
+        self._conn.commit()
+
+    def series_hashes(self, model):
+        """{product: (series_hash, status)} for everything stored under model"""
+        rows = self._conn.execute(
+            'SELECT product, series_hash, status FROM forecasts WHERE model = ?', (model,)
+        )
+        return {product: (series_hash, status) for product, series_hash, status in rows}
+
+    def save(self, model, results):
+        """Upsert fit results (dicts as produced by the forecaster's workers)"""
+        now = time.time()
+        rows = [(
+            r['product'], model, r['series_hash'], r['status'], r.get('error'),
+            json.dumps(r.get('params')), r.get('last_date'), r.get('freq'),
+            None if r.get('forecast') is None else np.asarray(r['forecast'], dtype=np.float32).tobytes(),
+            now
+        ) for r in results]
+        self._conn.executemany('INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self._conn.commit()
+
+    def load(self, model, products=None):
+        """Stored rows for model as a DataFrame (one row per product)"""
+        df = pd.read_sql_query(
+            'SELECT product, status, error, params, last_date, freq, forecast, fitted_at '
+            'FROM forecasts WHERE model = ?', self._conn, params=(model,)
+        )
+        if products is not None:
+            df = df[df['product'].isin(list(products))]
+        df['params'] = df['params'].map(json.loads)
+        df['forecast'] = df['forecast'].map(
+            lambda b: np.frombuffer(b, dtype=np.float32) if b is not None else None
+        )
+        return df.reset_index(drop=True)
+
+    def forecasts(self, model, products=None):
+        """Long-format forecasts: product, step, date, forecast
+
+        date is NaT for products fitted on irregularly spaced dates (no freq),
+        whose steps have no calendar dates.
+        """
+        frames = []
+        for row in self.load(model, products).itertuples():
+            if row.status != 'ok':
+                continue
+            steps = np.arange(1, len(row.forecast) + 1)
+            dates = (pd.date_range(pd.Timestamp(row.last_date), periods=len(steps) + 1, freq=row.freq)[1:]
+                     if row.freq else pd.NaT)
+            frames.append(pd.DataFrame({
+                'product': row.product, 'step': steps, 'date': dates, 'forecast': row.forecast
+            }))
+        if not frames:
+            return pd.DataFrame(columns=['product', 'step', 'date', 'forecast'])
+        return pd.concat(frames, ignore_index=True)
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,184 @@
+import logging
+import numpy as np
+import pandas as pd
+from config.constants import (
+    ANALYSIS_CACHE_DIR, CLUSTER_FEATURES, RATING_TARGET,
+    INCREMENTAL_MAX_DELTA_FRACTION, INCREMENTAL_DRIFT_RATIO
+)
+from analytics.product_analysis import engineer_features, feature_matrix, fit_clusters
+from models.predictive_models.model_store import ModelStore, params_hash
+
+# Columns summarised per cluster, matching ProductClusterAnalyzer.analyze_clusters
+STATS_COLUMNS = ['Price', 'Stock Quantity', RATING_TARGET]
+
+class IncrementalProductAnalyzer:
+    """Append mode for the clustering pipeline, keyed on Product ID
+
+    Each update() compares the catalog against the previous run by row hash.
+    Only new and changed rows go through feature engineering; they are
+    assigned to clusters with the fitted model's predict() and the per-cluster
+    sums, counts and extrema are adjusted in place. A full refit happens on the
+    first run, when the rows changed since the last fit exceed
+    max_delta_fraction of the catalog, or when the delta sits noticeably
+    further from its centroids than the training data did (drift_ratio times
+    the mean squared distance at fit time).
+    """
+
+    def __init__(self, store=None, max_delta_fraction=INCREMENTAL_MAX_DELTA_FRACTION,
+                 drift_ratio=INCREMENTAL_DRIFT_RATIO, features=CLUSTER_FEATURES,
+                 n_clusters_range=(2, 10), n_clusters=None, random_state=0):
+        self.store = store or ModelStore(ANALYSIS_CACHE_DIR, keep_versions=2)
+        self.max_delta_fraction = max_delta_fraction
+        self.drift_ratio = drift_ratio
+        self.features = features
+        self.n_clusters_range = tuple(n_clusters_range)
+        self.n_clusters = n_clusters
+        self.random_state = random_state
+        self.state_key = params_hash(features, self.n_clusters_range, n_clusters, random_state)
+        self.logger = logging.getLogger(__name__)
+
+    def update(self, data, force_refit=False):
+        """Bring clusters and cluster statistics up to date with data
+
+        Returns cluster_labels aligned with data's rows, cluster_stats in the
+        analyze_clusters layout, the delta sizes and whether (and why) the
+        model was refitted.
+        """
+        if data['Product ID'].duplicated().any():
+            self.logger.warning("Duplicate Product IDs found; keeping the last row for each")
+        rows = data.drop_duplicates('Product ID', keep='last').set_index('Product ID', drop=False)
+        hashes = pd.Series(pd.util.hash_pandas_object(rows, index=False).to_numpy(), index=rows.index)
+
+        state, _ = self.store.load('incremental-state', self.state_key)
+        if state is None or force_refit:
+            state = self._refit(rows, hashes, 'forced' if force_refit else 'initial')
+        else:
+            old = state['hashes']
+            common = hashes.index.intersection(old.index)
+            changed = common[hashes[common].to_numpy() != old[common].to_numpy()]
+            added = hashes.index.difference(old.index)
+            removed = old.index.difference(hashes.index)
+            delta = {'added': len(added), 'changed': len(changed), 'removed': len(removed)}
+            pending = state['changed_since_fit'] + sum(delta.values())
+
+            reason = None
+            if pending > self.max_delta_fraction * max(len(old), 1):
+                reason = 'delta'
+            else:
+                touched = added.append(changed)
+                X_delta = feature_matrix(engineer_features(rows.loc[touched]), self.features, state['fill'])[0]
+                X_delta = X_delta.reindex(columns=state['features'].columns)
+                labels, distances = self._assign(state, X_delta)
+                if len(distances) and distances.mean() > self.drift_ratio * state['fit_distance']:
+                    reason = 'drift'
+            if reason:
+                state = self._refit(rows, hashes, reason)
+                state['delta'] = delta
+            else:
+                self._apply_delta(state, removed.append(changed), X_delta, labels)
+                state.update(hashes=hashes, changed_since_fit=pending, refit=None, delta=delta)
+                self.logger.info(f"Incremental update: {delta}")
+
+        self.store.save('incremental-state', self.state_key, state)
+        return {
+            'cluster_labels': state['labels'].reindex(data['Product ID']).to_numpy(),
+            'cluster_stats': self.cluster_stats(state['stats']),
+            'delta': state['delta'],
+            'refit': state['refit']
+        }
+
+    def _refit(self, rows, hashes, reason):
+        """Full fit over every row; returns a fresh state"""
+        X, fill = feature_matrix(engineer_features(rows), self.features)
+        analyzer, labels, n_clusters, _ = fit_clusters(
+            X, self.n_clusters_range, random_state=self.random_state, n_clusters=self.n_clusters
+        )
+        labels = pd.Series(labels, index=X.index)
+        self.logger.info(f"Full cluster refit ({reason}): {len(X)} rows, k={n_clusters}")
+        return {
+            'hashes': hashes, 'features': X, 'fill': fill, 'labels': labels,
+            'scaler': analyzer.scaler, 'model': analyzer.model,
+            'fit_distance': analyzer.model.inertia_ / max(len(X), 1),
+            'stats': self._stats(X, labels), 'changed_since_fit': 0,
+            'refit': reason, 'delta': {'added': len(X), 'changed': 0, 'removed': 0}
+        }
+
+    def _assign(self, state, X):
+        """Nearest-centroid labels and squared distances for new rows"""
+        if not len(X):
+            return np.array([], dtype=int), np.array([])
+        scaled = state['scaler'].transform(X)
+        labels = state['model'].predict(scaled)
+        distances = state['model'].transform(scaled)[np.arange(len(labels)), labels] ** 2
+        return labels, distances
+
+    @staticmethod
+    def _stats(X, labels):
+        """Per-cluster sufficient statistics for the STATS_COLUMNS"""
+        columns = [c for c in STATS_COLUMNS if c in X.columns]
+        grouped = X[columns].groupby(labels.to_numpy())
+        stats = pd.concat({
+            'sum': grouped.sum(), 'sumsq': (X[columns] ** 2).groupby(labels.to_numpy()).sum(),
+            'min': grouped.min(), 'max': grouped.max()
+        }, axis=1)
+        stats[('count', '')] = grouped.size()
+        return stats
+
+    def _apply_delta(self, state, outgoing, X_new, new_labels):
+        """Subtract outgoing rows, add the (re)assigned ones and patch the stored rows"""
+        stats = state['stats'].copy()
+        features, labels = state['features'], state['labels']
+        columns = [c for c in STATS_COLUMNS if c in features.columns]
+        stale = set()
+
+        old = features.loc[outgoing, columns]
+        old_labels = labels.loc[outgoing].to_numpy()
+        for cluster, block in old.groupby(old_labels):
+            stats.loc[cluster, 'sum'] = (stats.loc[cluster, 'sum'] - block.sum()).to_numpy()
+            stats.loc[cluster, 'sumsq'] = (stats.loc[cluster, 'sumsq'] - (block ** 2).sum()).to_numpy()
+            stats.loc[cluster, ('count', '')] -= len(block)
+            # an extreme leaving the cluster means its min/max must be re-read
+            if ((block.min() <= stats.loc[cluster, 'min']).any()
+                    or (block.max() >= stats.loc[cluster, 'max']).any()):
+                stale.add(cluster)
+
+        new_labels = pd.Series(new_labels, index=X_new.index)
+        features = pd.concat([features.drop(index=outgoing), X_new])
+        labels = pd.concat([labels.drop(index=outgoing), new_labels])
+        for cluster, block in X_new[columns].groupby(new_labels.to_numpy()):
+            if cluster not in stats.index:
+                stats.loc[cluster] = 0
+                stats.loc[cluster, 'min'], stats.loc[cluster, 'max'] = np.inf, -np.inf
+            stats.loc[cluster, 'sum'] = (stats.loc[cluster, 'sum'] + block.sum()).to_numpy()
+            stats.loc[cluster, 'sumsq'] = (stats.loc[cluster, 'sumsq'] + (block ** 2).sum()).to_numpy()
+            stats.loc[cluster, 'min'] = np.minimum(stats.loc[cluster, 'min'], block.min()).to_numpy()
+            stats.loc[cluster, 'max'] = np.maximum(stats.loc[cluster, 'max'], block.max()).to_numpy()
+            stats.loc[cluster, ('count', '')] += len(block)
+
+        for cluster in stale:
+            members = features.loc[labels.index[labels.to_numpy() == cluster], columns]
+            stats.loc[cluster, 'min'] = members.min().to_numpy()
+            stats.loc[cluster, 'max'] = members.max().to_numpy()
+        state.update(features=features, labels=labels, stats=stats[stats[('count', '')] > 0])
+
+    @staticmethod
+    def cluster_stats(stats):
+        """Sufficient statistics rendered like ProductClusterAnalyzer.analyze_clusters"""
+        n = stats[('count', '')]
+        out = {}
+        for column in stats['sum'].columns:
+            total, sumsq = stats[('sum', column)], stats[('sumsq', column)]
+            mean = total / n
+            std = np.sqrt(((sumsq - total * mean) / (n - 1)).clip(lower=0))
+            out[(column, 'mean')] = mean
+            if column == 'Price':
+                out[(column, 'std')] = std.where(n > 1)
+                out[(column, 'min')] = stats[('min', column)]
+                out[(column, 'max')] = stats[('max', column)]
+            elif column == 'Stock Quantity':
+                out[(column, 'sum')] = total
+            else:
+                out[(column, 'count')] = n
+        result = pd.DataFrame(out)
+        result.index.name = 'Cluster'
+        return result
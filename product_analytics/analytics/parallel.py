@@ -0,0 +1,11 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def process_pool(max_workers=None):
+    """Process pool whose workers are spawned rather than forked
+
+    Pools are opened from threads (the analysis pipeline runs its stages on a
+    thread pool), and forking while other threads hold locks can deadlock the
+    child.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
@@ -1 +1,261 @@
- 
+import logging
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+from config.constants import (
+    ANALYSIS_CACHE_DIR, ANALYSIS_MAX_WORKERS, CLUSTER_FEATURES, RATING_TARGET, FORECAST_STORE_PATH
+)
+from analytics.parallel import process_pool
+from models.predictive_models.model_store import ModelStore, data_hash, params_hash
+from monitoring.metrics import METRICS
+
+# Feature and clustering steps shared with IncrementalProductAnalyzer
+
+def engineer_features(data):
+    """Run ProductFeatureEngineer unless data is already engineered"""
+    from data_processing.feature_engineering import ProductFeatureEngineer
+
+    if 'Inventory_Value' in data.columns:
+        return data
+    return ProductFeatureEngineer(
+        extract_dimensions='Product Dimensions' in data.columns,
+        add_time_features=all(c in data.columns for c in ('Manufacturing Date', 'Expiration Date'))
+    ).transform(data)
+
+def feature_matrix(data, features, fill=None):
+    """Numeric feature matrix with missing values imputed (column medians unless fill is given)"""
+    columns = [c for c in features if c in data.columns]
+    X = data[columns].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+    X = X.replace([np.inf, -np.inf], np.nan)
+    if fill is None:
+        fill = X.median().fillna(0)
+    return X.fillna(fill), fill
+
+def fit_clusters(features, n_clusters_range, n_jobs=-1, random_state=0, n_clusters=None):
+    """KMeans on the scaled features; k is picked by silhouette unless n_clusters is given"""
+    from models.clustering.product_segmentation import ProductClusterAnalyzer
+
+    analyzer = ProductClusterAnalyzer(features.copy(), n_clusters_range=n_clusters_range)
+    scores = None
+    if n_clusters is None:
+        scores = analyzer.find_optimal_clusters(n_jobs=n_jobs, random_state=random_state)
+        n_clusters = range(*n_clusters_range)[int(np.argmax(scores['silhouette']))]
+    labels = analyzer.cluster_products('kmeans', n_clusters=n_clusters, random_state=random_state)
+    return analyzer, labels, n_clusters, scores
+
+# Stage functions are module level so 'process' stages can be sent to a worker
+# process. Each gets its slice of the input frame, its params and the outputs
+# of the stages it depends on, and returns a picklable result.
+
+def _features_stage(data, params):
+    """Engineered numeric feature matrix (median-imputed) aligned with the input rows"""
+    return feature_matrix(engineer_features(data), params['features'])[0]
+
+def _clustering_stage(data, params, features):
+    """Pick k by silhouette, cluster and profile the clusters"""
+    analyzer, labels, n_clusters, scores = fit_clusters(
+        features, params['n_clusters_range'], params['n_jobs'], params['random_state']
+    )
+    profiled = {'Price', 'Stock Quantity', RATING_TARGET} <= set(features.columns)
+    profile = analyzer.analyze_clusters(labels) if profiled else None
+    return {'labels': labels, 'n_clusters': n_clusters, 'scores': scores, 'profile': profile}
+
+def _forecasting_stage(data, params):
+    """Per-product demand forecasts (long format), refitting only changed series"""
+    from analytics.forecast_store import ForecastStore
+    from analytics.time_series import ProductDemandForecaster
+
+    store = ForecastStore(params['store_path'])
+    try:
+        forecaster = ProductDemandForecaster(data, store=store)
+        return forecaster.forecast_all(model=params['model'], n_workers=params['n_workers'])
+    finally:
+        store.close()
+
+def _sentiment_stage(data, params):
+    """Review sentiment per product (mean scores); None when there is no review text"""
+    if params['review_column'] not in data.columns:
+        return None
+    from analytics.result_cache import SentimentResultCache
+    from analytics.sentiment_analysis import ProductSentimentAnalyzer
+
+    reviews = data[['Product ID', params['review_column']]].rename(columns={params['review_column']: 'Review'})
+    cache = SentimentResultCache()
+    try:
+        scores = ProductSentimentAnalyzer(cache=cache).batch_analyze_reviews(reviews)
+    finally:
+        cache.close()
+    return scores.drop(columns='transformer_label').groupby('product_id').mean()
+
+def _rating_stage(data, params, features):
+    """Stacked rating model trained on rated rows, with predictions for every row"""
+    from models.predictive_models.rating_predictor import RatingPredictorOptimizer
+
+    if RATING_TARGET not in features.columns:
+        return None
+    y = pd.to_numeric(data[RATING_TARGET], errors='coerce')
+    X = features.drop(columns=RATING_TARGET)
+    rated = y.notna().to_numpy()
+    optimizer = RatingPredictorOptimizer(X[rated], y[rated])
+    model = optimizer.create_ensemble(cv=params['cv'])
+    return {'model': model, 'predicted_ratings': model.predict(X), 'timings': optimizer.timings}
+
+def _run_stage(name, func, metrics_enabled, parent_pid, *args):
+    """Run a stage under instrumentation; records made in a worker process travel back with the output"""
+    METRICS.enabled = metrics_enabled
+    with METRICS.stage(f'analysis.{name}') as stage:
+        output = func(*args)
+        stage.rows = len(args[0])
+    return output, METRICS.drain() if os.getpid() != parent_pid else []
+
+Stage = namedtuple('Stage', 'func deps columns pool')
+
+STAGES = {
+    # columns: input frame columns the stage reads (None for all), part of its cache key
+    'features': Stage(_features_stage, (), None, 'thread'),
+    'clustering': Stage(_clustering_stage, ('features',), (), 'thread'),
+    'forecasting': Stage(_forecasting_stage, (), ('Manufacturing Date', 'Product Name', 'Stock Quantity'), 'thread'),
+    'sentiment': Stage(_sentiment_stage, (), ('Product ID', 'Review'), 'process'),  # review column is configurable
+    'rating': Stage(_rating_stage, ('features',), (RATING_TARGET,), 'process'),
+}
+
+class ComprehensiveProductAnalyzer:
+    """End-to-end product analysis as a cached stage graph
+
+    Stages run as soon as their dependencies are done, in a thread pool or
+    (for CPU-bound pure-Python work) a process pool. Each stage's output is
+    stored under a hash of its input columns, params and upstream keys, so a
+    re-run only executes stages whose inputs changed.
+    """
+
+    def __init__(self, data, cache_dir=ANALYSIS_CACHE_DIR, max_workers=ANALYSIS_MAX_WORKERS,
+                 review_column='Review', forecast_model='arima', n_clusters_range=(2, 10), random_state=0):
+        self.data = data
+        self.max_workers = max_workers
+        self.store = ModelStore(cache_dir, keep_versions=1)
+        self.logger = logging.getLogger(__name__)
+        self.params = {
+            'features': {'features': CLUSTER_FEATURES},
+            'clustering': {'n_clusters_range': tuple(n_clusters_range), 'n_jobs': -1, 'random_state': random_state},
+            'forecasting': {'model': forecast_model, 'n_workers': None, 'store_path': FORECAST_STORE_PATH},
+            'sentiment': {'review_column': review_column},
+            'rating': {'cv': 5},
+        }
+        self.report = {}
+
+    def run_full_analysis(self, stages=None, force=False):
+        """Run the requested stages (default: all) plus their dependencies
+
+        Stages that fail are logged and reported in results['stages']; their
+        dependents are skipped. force=True ignores cached outputs.
+        """
+        selected = self._with_dependencies(stages or list(STAGES))
+        keys = {}
+        for name in selected:
+            keys[name] = self._stage_key(name, keys)
+
+        outputs, self.report = {}, {}
+        pending = list(selected)
+        running = {}
+        threads = ThreadPoolExecutor(max_workers=self.max_workers)
+        processes = None
+        try:
+            while pending or running:
+                for name in list(pending):
+                    deps = STAGES[name].deps
+                    if any(self.report.get(d, {}).get('status') in ('failed', 'skipped') for d in deps):
+                        pending.remove(name)
+                        self.report[name] = {'status': 'skipped', 'key': keys[name]}
+                        continue
+                    if not all(d in outputs for d in deps):
+                        continue
+                    pending.remove(name)
+                    cached, meta = (None, None) if force else self.store.load(name, keys[name])
+                    if meta is not None:  # a stage may legitimately produce None
+                        outputs[name] = cached
+                        self.report[name] = {'status': 'cached', 'key': keys[name]}
+                        continue
+                    if STAGES[name].pool == 'process':
+                        processes = processes or process_pool(self.max_workers)
+                        pool = processes
+                    else:
+                        pool = threads
+                    future = pool.submit(
+                        _run_stage, name, STAGES[name].func, METRICS.enabled, os.getpid(),
+                        self._stage_input(name), self.params[name], *(outputs[d] for d in deps)
+                    )
+                    running[future] = (name, time.perf_counter())
+                if not running:
+                    continue  # cached stages may have unblocked others
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, start = running.pop(future)
+                    self._finish(name, keys[name], future, start, outputs)
+        finally:
+            threads.shutdown()
+            if processes is not None:
+                processes.shutdown()
+        return self._assemble(outputs)
+
+    def _finish(self, name, key, future, start, outputs):
+        seconds = time.perf_counter() - start
+        try:
+            outputs[name], records = future.result()
+            METRICS.extend(records)
+        except Exception as e:
+            self.logger.error(f"Stage {name} failed: {type(e).__name__}: {e}")
+            self.report[name] = {'status': 'failed', 'key': key, 'error': f"{type(e).__name__}: {e}"}
+            return
+        self.store.save(name, key, outputs[name], meta={'seconds': seconds})
+        self.report[name] = {'status': 'ran', 'key': key, 'seconds': seconds}
+        self.logger.info(f"Stage {name} finished in {seconds:.1f}s")
+
+    def _with_dependencies(self, stages):
+        """Requested stages plus everything upstream, in dependency order"""
+        ordered = []
+        def visit(name):
+            if name not in STAGES:
+                raise ValueError(f"Unknown stage: {name}")
+            for dep in STAGES[name].deps:
+                visit(dep)
+            if name not in ordered:
+                ordered.append(name)
+        for name in stages:
+            visit(name)
+        return ordered
+
+    def _stage_input(self, name):
+        columns = STAGES[name].columns
+        if name == 'sentiment':
+            columns = ('Product ID', self.params[name]['review_column'])
+        if columns is None:
+            return self.data
+        return self.data[[c for c in columns if c in self.data.columns]]
+
+    def _stage_key(self, name, keys):
+        """Hash of what a stage reads: its input columns, params and upstream keys"""
+        stage_input = self._stage_input(name)
+        return params_hash(
+            name, data_hash(stage_input) if len(stage_input.columns) else None,
+            self.params[name], [keys[d] for d in STAGES[name].deps]
+        )
+
+    def _assemble(self, outputs):
+        clustering = outputs.get('clustering') or {}
+        rating = outputs.get('rating') or {}
+        labels = clustering.get('labels')
+        return {
+            'features': outputs.get('features'),
+            'cluster_labels': None if labels is None else np.asarray(labels),
+            'n_clusters': clustering.get('n_clusters'),
+            'cluster_scores': clustering.get('scores'),
+            'cluster_profile': clustering.get('profile'),
+            'forecasts': outputs.get('forecasting'),
+            'sentiment': outputs.get('sentiment'),
+            'rating_model': rating.get('model'),
+            'predicted_ratings': rating.get('predicted_ratings'),
+            'stages': self.report
+        }
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config.constants import (
+    RESULT_CACHE_PATH, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_AGE_DAYS, RESULT_CACHE_MEMORY_SIZE,
+    RESULT_CACHE_PRUNE_EVERY
+)
+
+class SentimentResultCache:
+    """Content-addressed store for per-text NLP results
+
+    Results are keyed by a hash of the text plus a model key (model name and
+    version), persisted in SQLite and fronted by an in-memory LRU. Entries older
+    than max_age_days are never returned; they and entries beyond max_entries
+    (least recently used first) are deleted on prune(), which put_many runs
+    once the row count may exceed max_entries or every prune_every writes.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_entries=RESULT_CACHE_MAX_ENTRIES,
+                 max_age_days=RESULT_CACHE_MAX_AGE_DAYS, memory_size=RESULT_CACHE_MEMORY_SIZE,
+                 prune_every=RESULT_CACHE_PRUNE_EVERY):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.memory_size = memory_size
+        self.prune_every = prune_every
+        self._memory = OrderedDict()  # key -> (created, result)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results '
+            '(key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        self._conn.commit()
+        # upper bound on the row count, so writes do not have to COUNT(*) the table
+        self._rows = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        self._writes_since_prune = 0
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(model_key, text):
+        return hashlib.blake2b(f'{model_key}\0{text}'.encode('utf-8'), digest_size=20).hexdigest()
+
+    def get_many(self, model_key, texts):
+        """Return {position: result} for the texts that are cached"""
+        keys = [self.make_key(model_key, t) for t in texts]
+        found, missing, hits = {}, {}, {}
+        now = time.time()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._memory.get(key)
+                if entry is not None and self.max_age and now - entry[0] > self.max_age:
+                    del self._memory[key]
+                    entry = None
+                if entry is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = entry[1]
+                    self.counters['memory_hits'] += 1
+                    hits[key] = now
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            pending = list(missing)
+            for start in range(0, len(pending), 500):
+                batch = pending[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value, created FROM results WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, value, created in rows:
+                    if self.max_age and now - created > self.max_age:
+                        continue
+                    result = json.loads(value)
+                    self._remember(key, created, result)
+                    for i in missing[key]:
+                        found[i] = result
+                    self.counters['disk_hits'] += len(missing[key])
+                    hits[key] = now
+            # memory hits count as uses too, so size pruning keeps hot entries
+            self._conn.executemany('UPDATE results SET accessed = ? WHERE key = ?',
+                                   [(accessed, key) for key, accessed in hits.items()])
+            self._conn.commit()
+            self.counters['misses'] += len(texts) - len(found)
+        return found
+
+    def put_many(self, model_key, texts, results):
+        """Store results (JSON-serialisable) for texts"""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, result in zip(texts, results):
+                key = self.make_key(model_key, text)
+                self._remember(key, now, result)
+                rows.append((key, json.dumps(result), now, now))
+            self._conn.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', rows)
+            self._conn.commit()
+            self.counters['writes'] += len(rows)
+            self._rows += len(rows)  # replaced keys make this an overestimate until the next prune
+            self._writes_since_prune += len(rows)
+            due = ((self.max_entries and self._rows > self.max_entries)
+                   or (self.prune_every and self._writes_since_prune >= self.prune_every))
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Apply age and size limits to the on-disk store"""
+        with self._lock:
+            evicted = 0
+            if self.max_age:
+                evicted += self._conn.execute(
+                    'DELETE FROM results WHERE created < ?', (time.time() - self.max_age,)
+                ).rowcount
+            rows = self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            if self.max_entries and rows > self.max_entries:
+                evicted += self._conn.execute(
+                    'DELETE FROM results WHERE key IN '
+                    '(SELECT key FROM results ORDER BY accessed LIMIT ?)', (rows - self.max_entries,)
+                ).rowcount
+                rows = self.max_entries
+            self._conn.commit()
+            self._rows, self._writes_since_prune = rows, 0
+            if evicted:
+                self._memory.clear()
+            self.counters['evictions'] += evicted
+
+    def stats(self):
+        """Hit/miss counters plus current sizes"""
+        with self._lock:
+            lookups = sum(self.counters[k] for k in ('memory_hits', 'disk_hits', 'misses'))
+            hits = self.counters['memory_hits'] + self.counters['disk_hits']
+            return dict(
+                self.counters,
+                hit_rate=hits / lookups if lookups else 0.0,
+                memory_entries=len(self._memory),
+                disk_entries=self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            )
+
+    def close(self):
+        self._conn.close()
+
+    def _remember(self, key, created, result):
+        self._memory[key] = (created, result)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
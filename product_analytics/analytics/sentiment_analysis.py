@@ -1,18 +1,108 @@
-import nltk
-from transformers import pipeline
-from textblob import TextBlob
-import spacy
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+import os
+from functools import cached_property
+from importlib.metadata import version, PackageNotFoundError
+import numpy as np
+import pandas as pd
+from config.constants import (
+    SENTIMENT_BATCH_SIZE, LEXICON_PARALLEL_MIN_TEXTS, SPACY_BATCH_SIZE, SPACY_UNUSED_PIPES
+)
+from analytics.parallel import process_pool
+from monitoring.metrics import instrumented
 
-class ProductSentimentAnalyzer:
-    def __init__(self):
+VADER_KEYS = ['neg', 'neu', 'pos', 'compound']
+SCORE_COLUMNS = [f'vader_{k}' for k in VADER_KEYS] + [
+    'textblob_polarity', 'textblob_subjectivity', 'transformer_score'
+]
+RECORD_FIELDS = [
+    'transformer_label', 'transformer_score', 'textblob_polarity', 'textblob_subjectivity',
+    'entities', 'noun_phrases', 'keywords'
+]
+RESULT_SCHEMA_VERSION = 1  # bump when the cached per-text result layout changes
+
+# Heavy libraries (NLP models here, statsmodels/prophet in time_series, boosting
+# libraries and optuna in rating_predictor) are imported where they are first used.
+
+_worker_sia = None
+
+def _vader():
+    """VADER analyzer, downloading the lexicon only if it is not installed yet"""
+    import nltk
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
         nltk.download('vader_lexicon')
-        self.sia = SentimentIntensityAnalyzer()
-        self.transformer_pipeline = pipeline(
-            "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english"
-        )
+    return SentimentIntensityAnalyzer()
+
+def _lexicon_scores(texts):
+    """VADER and TextBlob scores for a list of texts as a (n, 6) float array"""
+    from textblob import TextBlob
+    global _worker_sia
+    if _worker_sia is None:
+        _worker_sia = _vader()
+    scores = np.empty((len(texts), len(VADER_KEYS) + 2))
+    for i, text in enumerate(texts):
+        vader = _worker_sia.polarity_scores(text)
+        sentiment = TextBlob(text).sentiment
+        scores[i, :len(VADER_KEYS)] = [vader[k] for k in VADER_KEYS]
+        scores[i, len(VADER_KEYS):] = [sentiment.polarity, sentiment.subjectivity]
+    return scores
+
+def _package_version(name):
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return 'missing'
+
+def _model_revision(analyzer):
+    """Commit hash of the analyzer's transformer checkpoint, or 'unknown'
+
+    Read from the loaded pipeline when there is one, otherwise from the local
+    Hugging Face hub cache, so a fully cached run never loads the model.
+    """
+    pipeline = analyzer.__dict__.get('transformer_pipeline')
+    config = getattr(getattr(pipeline, 'model', None), 'config', None)
+    if getattr(config, '_commit_hash', None):
+        return config._commit_hash
+    try:
+        from huggingface_hub.constants import HF_HUB_CACHE
+    except ImportError:
+        return 'unknown'
+    ref = os.path.join(HF_HUB_CACHE, f"models--{analyzer.TRANSFORMER_MODEL.replace('/', '--')}", 'refs', 'main')
+    try:
+        with open(ref) as f:
+            return f.read().strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+def _model_key(analyzer, model_name, revision, *packages):
+    """Cache namespace: analyzer, result layout, model revision and library versions"""
+    parts = [analyzer, RESULT_SCHEMA_VERSION, model_name, revision]
+    parts += [f'{p}={_package_version(p)}' for p in ('transformers',) + packages]
+    return ':'.join(str(p) for p in parts)
+
+def _sentiment_pipeline(model_name):
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=model_name)
+
+class ProductSentimentAnalyzer:
+    TRANSFORMER_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+
+    def __init__(self, cache=None):
+        # Models load on first use (see the cached properties below)
+        self.cache = cache
+
+    @cached_property
+    def model_key(self):
+        return _model_key('product', self.TRANSFORMER_MODEL, _model_revision(self), 'nltk', 'textblob')
+
+    @cached_property
+    def sia(self):
+        return _vader()
+
+    @cached_property
+    def transformer_pipeline(self):
+        return _sentiment_pipeline(self.TRANSFORMER_MODEL)
     
     def analyze_vader(self, text):
         """Basic sentiment analysis using VADER"""
@@ -20,6 +110,7 @@ class ProductSentimentAnalyzer:
     
     def analyze_textblob(self, text):
         """Alternative sentiment scoring"""
+        from textblob import TextBlob
         analysis = TextBlob(text)
         return {
             'polarity': analysis.sentiment.polarity,
@@ -30,39 +121,140 @@ class ProductSentimentAnalyzer:
         """Advanced transformer-based analysis"""
         return self.transformer_pipeline(text)[0]
     
-    def batch_analyze_reviews(self, review_df):
-        """Process dataframe of product reviews"""
-        results = []
-        for _, row in review_df.iterrows():
-            analysis = {
-                'product_id': row['Product ID'],
-                'vader': self.analyze_vader(row['Review']),
-                'textblob': self.analyze_textblob(row['Review']),
-                'transformer': self.analyze_transformers(row['Review'])
-            }
-            results.append(analysis)
-        return pd.DataFrame(results) 
+    @instrumented('sentiment.batch_analyze_reviews')
+    def batch_analyze_reviews(self, review_df, batch_size=SENTIMENT_BATCH_SIZE, n_jobs=None):
+        """Process dataframe of product reviews
+
+        Identical review texts are scored once and, when a result cache is set,
+        only texts it has not seen reach the models. The transformer runs in
+        batches of batch_size and the lexicon scorers are spread over n_jobs
+        processes. Returns one row per review with flat score columns.
+        """
+        codes, unique_texts = pd.factorize(review_df['Review'].fillna('').astype(str))
+        unique_texts = unique_texts.tolist()
+        scores = np.empty((len(unique_texts), len(SCORE_COLUMNS)))
+        labels = np.empty(len(unique_texts), dtype=object)
+
+        cached = self.cache.get_many(self.model_key, unique_texts) if self.cache else {}
+        for i, (row_scores, label) in cached.items():
+            scores[i], labels[i] = row_scores, label
+
+        todo = [i for i in range(len(unique_texts)) if i not in cached]
+        if todo:
+            texts = [unique_texts[i] for i in todo]
+            lexicon = self._lexicon_scores(texts, n_jobs)
+            transformer = self.transformer_pipeline(texts, batch_size=batch_size, truncation=True)
+            scores[todo, :-1] = lexicon
+            scores[todo, -1] = [r['score'] for r in transformer]
+            labels[todo] = [r['label'] for r in transformer]
+            if self.cache:
+                self.cache.put_many(
+                    self.model_key, texts,
+                    [(scores[i].tolist(), labels[i]) for i in todo]
+                )
+
+        columns = {'product_id': review_df['Product ID'].to_numpy()}
+        for j, name in enumerate(SCORE_COLUMNS):
+            columns[name] = scores[codes, j]
+        columns['transformer_label'] = labels[codes]
+        return pd.DataFrame(columns, index=review_df.index)[
+            ['product_id'] + SCORE_COLUMNS[:-1] + ['transformer_label', 'transformer_score']
+        ]
+
+    def _lexicon_scores(self, texts, n_jobs=None):
+        """Score unique texts with VADER/TextBlob, fanned out over a process pool for large inputs"""
+        n_jobs = n_jobs or os.cpu_count() or 1
+        if n_jobs == 1 or len(texts) < LEXICON_PARALLEL_MIN_TEXTS:
+            return _lexicon_scores(texts)
+        chunk = -(-len(texts) // (n_jobs * 4))
+        chunks = [texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+        with process_pool(n_jobs) as pool:
+            return np.vstack(list(pool.map(_lexicon_scores, chunks)))
+
 class AdvancedSentimentAnalyzer:
     """Multi-method sentiment analysis with visualization"""
     
-    def __init__(self):
-        self.nlp = spacy.load('en_core_web_sm')
-        self.transformer_pipeline = pipeline(
-            "sentiment-analysis",
-            model="finiteautomata/bertweet-base-sentiment-analysis"
+    TRANSFORMER_MODEL = "finiteautomata/bertweet-base-sentiment-analysis"
+    SPACY_MODEL = 'en_core_web_sm'
+
+    def __init__(self, cache=None):
+        # Models load on first use (see the cached properties below)
+        self.cache = cache
+
+    @cached_property
+    def model_key(self):
+        return _model_key(
+            'advanced', self.TRANSFORMER_MODEL, _model_revision(self), 'textblob', 'spacy', self.SPACY_MODEL
         )
+
+    @cached_property
+    def nlp(self):
+        import spacy
+        return spacy.load(self.SPACY_MODEL)
+
+    @cached_property
+    def transformer_pipeline(self):
+        return _sentiment_pipeline(self.TRANSFORMER_MODEL)
         
     def analyze(self, text):
         """Comprehensive sentiment analysis"""
+        doc = self.nlp(text)
         results = {
             'transformer': self._transformer_analysis(text),
             'textblob': self._textblob_analysis(text),
-            'spacy': self._spacy_analysis(text),
-            'keywords': self._extract_keywords(text)
+            'spacy': self._spacy_analysis(doc),
+            'keywords': self._extract_keywords(doc)
         }
         results['composite_score'] = self._calculate_composite(results)
         return results
-        
+
+    @instrumented('sentiment.analyze_many')
+    def analyze_many(self, texts, batch_size=SPACY_BATCH_SIZE, n_process=1,
+                     transformer_batch_size=SENTIMENT_BATCH_SIZE):
+        """Corpus-level analysis returning one row per text
+
+        Each distinct text is parsed exactly once through nlp.pipe (with unused
+        pipeline components disabled) and scored by the transformer in batches.
+        Texts already in the result cache are not re-analyzed.
+        """
+        codes, unique_texts = pd.factorize(pd.Series(list(texts), dtype=object).fillna('').astype(str))
+        unique_texts = unique_texts.tolist()
+        records = [None] * len(unique_texts)
+
+        cached = self.cache.get_many(self.model_key, unique_texts) if self.cache else {}
+        for i, record in cached.items():
+            # JSON round-trips entity tuples as lists
+            records[i] = dict(record, entities=[tuple(e) for e in record['entities']])
+
+        todo = [i for i in range(len(unique_texts)) if i not in cached]
+        if todo:
+            todo_texts = [unique_texts[i] for i in todo]
+            transformer = self.transformer_pipeline(todo_texts, batch_size=transformer_batch_size, truncation=True)
+            disabled = [p for p in SPACY_UNUSED_PIPES if p in self.nlp.pipe_names]
+            with self.nlp.select_pipes(disable=disabled):
+                docs = self.nlp.pipe(todo_texts, batch_size=batch_size, n_process=n_process)
+                for i, text, doc, result in zip(todo, todo_texts, docs, transformer):
+                    blob = self._textblob_analysis(text)
+                    spacy_result = self._spacy_analysis(doc)
+                    records[i] = {
+                        'transformer_label': result['label'],
+                        'transformer_score': result['score'],
+                        'textblob_polarity': blob['polarity'],
+                        'textblob_subjectivity': blob['subjectivity'],
+                        'entities': spacy_result['entities'],
+                        'noun_phrases': spacy_result['noun_phrases'],
+                        'keywords': self._extract_keywords(doc)
+                    }
+            if self.cache:
+                self.cache.put_many(self.model_key, todo_texts, [records[i] for i in todo])
+
+        frame = pd.DataFrame.from_records(records, columns=RECORD_FIELDS).iloc[codes].reset_index(drop=True)
+        frame['transformer_sentiment'] = np.where(frame['transformer_label'] == 'POS', 1, -1)
+        frame['composite_score'] = (
+            frame['transformer_sentiment'] * frame['transformer_score'] + frame['textblob_polarity']
+        ) / 2
+        return frame
+
     def _transformer_analysis(self, text):
         """State-of-the-art transformer model"""
         result = self.transformer_pipeline(text)[0]
@@ -74,24 +266,23 @@ class AdvancedSentimentAnalyzer:
         
     def _textblob_analysis(self, text):
         """Traditional sentiment analysis"""
+        from textblob import TextBlob
         analysis = TextBlob(text)
         return {
             'polarity': analysis.sentiment.polarity,
             'subjectivity': analysis.sentiment.subjectivity
         }
         
-    def _spacy_analysis(self, text):
-        """Entity-aware sentiment analysis"""
-        doc = self.nlp(text)
+    def _spacy_analysis(self, doc):
+        """Entity-aware sentiment analysis on a parsed Doc"""
         entities = [(ent.text, ent.label_) for ent in doc.ents]
         return {
             'entities': entities,
             'noun_phrases': [chunk.text for chunk in doc.noun_chunks]
         }
         
-    def _extract_keywords(self, text, n=5):
-        """Extract important keywords"""
-        doc = self.nlp(text)
+    def _extract_keywords(self, doc, n=5):
+        """Extract important keywords from a parsed Doc"""
         keywords = [
             token.text for token in doc 
             if not token.is_stop and not token.is_punct and token.pos_ in ['NOUN', 'ADJ']
@@ -100,6 +291,8 @@ class AdvancedSentimentAnalyzer:
         
     def generate_wordcloud(self, texts, output_path=None):
         """Visualize frequent terms"""
+        from wordcloud import WordCloud
+        import matplotlib.pyplot as plt
         wordcloud = WordCloud(width=800, height=400).generate(' '.join(texts))
         plt.figure(figsize=(15, 8))
         plt.imshow(wordcloud, interpolation='bilinear')
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from config.constants import DEFAULT_TIME_FREQ
+
+class ProductSeriesStore:
+    """Compact long-format per-product time series
+
+    Observations are summed per (product, date) and kept as two contiguous
+    arrays (dates, values) sorted by product then date, with offsets[i] to
+    offsets[i + 1] delimiting product i. A product's series is therefore a
+    slice, found through a dict lookup, and memory grows with the number of
+    observations rather than products x dates. Resampling happens on access
+    and is cached per (product, freq). The source frame is never modified.
+
+    Updates append into spare capacity that doubles when full, so N updates
+    cost O(N) copies overall; a replaced series leaves its old slice behind
+    until dates/values/offsets are next read or the dead rows outnumber the
+    live ones, when the arrays are compacted back into product order.
+    """
+
+    def __init__(self, df, product_column='Product Name', date_column='Manufacturing Date',
+                 value_column='Stock Quantity'):
+        codes, products = pd.factorize(df[product_column], sort=True)
+        dates = pd.to_datetime(df[date_column]).to_numpy(dtype='datetime64[ns]')
+        values = pd.to_numeric(df[value_column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # rows without a product or date have no place in any series
+        valid = (codes >= 0) & ~np.isnat(dates)
+        codes, dates, values = codes[valid], dates[valid], values[valid]
+        order = np.lexsort((dates, codes))
+        codes, dates, values = codes[order], dates[order], values[order]
+
+        # one observation per (product, date); missing values count as 0, as in groupby().sum()
+        starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1])]) \
+            if len(codes) else np.empty(0, dtype=np.intp)
+        self._dates = dates[starts]
+        self._values = np.add.reduceat(np.nan_to_num(values), starts) if len(starts) else np.empty(0)
+        self._size = len(self._dates)
+        self._garbage = 0  # rows of replaced series still in the arrays
+        offsets = np.searchsorted(codes[starts], np.arange(len(products) + 1))
+        self._spans = list(zip(offsets[:-1].tolist(), offsets[1:].tolist()))
+        self._offsets = offsets
+        self._product_list = list(products)
+        self._name = product_column
+        self._products = None
+        self._positions = {product: i for i, product in enumerate(self._product_list)}
+        self._resampled = {}  # product -> {freq: series}
+
+    def __len__(self):
+        return len(self._product_list)
+
+    def __iter__(self):
+        return iter(self.products)
+
+    def __contains__(self, product):
+        return product in self._positions
+
+    def __getitem__(self, product):
+        return self.series(product)
+
+    def __setitem__(self, product, value):
+        """Replace or add one product's series
+
+        value is a date-indexed Series or a scalar broadcast over every date
+        in the store; missing values are dropped. A replaced product keeps
+        its position; a new one is added at the end of the store.
+        """
+        if not isinstance(value, pd.Series):
+            value = pd.Series(value, index=self.date_index, dtype=np.float64)
+        value = value.dropna()
+        value = value.groupby(pd.DatetimeIndex(value.index)).sum()
+
+        start = self._append(value.index.to_numpy(dtype='datetime64[ns]'), value.to_numpy(dtype=np.float64))
+        span = (start, self._size)
+        position = self._positions.get(product)
+        if position is None:
+            self._positions[product] = len(self._product_list)
+            self._product_list.append(product)
+            self._spans.append(span)
+            self._products = None
+        else:
+            old_start, old_end = self._spans[position]
+            self._garbage += old_end - old_start
+            self._spans[position] = span
+        self._offsets = None
+        self._resampled.pop(product, None)
+        if self._garbage > self._size - self._garbage:
+            self._compact()
+
+    def _append(self, dates, values):
+        """Write rows after the used part of the arrays, growing them geometrically; returns the start"""
+        start, end = self._size, self._size + len(dates)
+        if end > len(self._dates):
+            capacity = max(end, 2 * len(self._dates), 16)
+            grown_dates = np.empty(capacity, dtype='datetime64[ns]')
+            grown_values = np.empty(capacity, dtype=np.float64)
+            grown_dates[:start], grown_values[:start] = self._dates[:start], self._values[:start]
+            self._dates, self._values = grown_dates, grown_values
+        self._dates[start:end], self._values[start:end] = dates, values
+        self._size = end
+        return start
+
+    def _compact(self):
+        """Lay the series out contiguously in product order, dropping replaced rows"""
+        lengths = np.array([end - start for start, end in self._spans], dtype=np.intp)
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.intp)
+        if self._garbage or any(start != offset for (start, _), offset in zip(self._spans, offsets)):
+            starts = np.array([start for start, _ in self._spans], dtype=np.intp)
+            rows = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, lengths)
+            self._dates, self._values = self._dates[rows], self._values[rows]
+        self._size, self._garbage = int(offsets[-1]), 0
+        self._spans = list(zip(offsets[:-1].tolist(), offsets[1:].tolist()))
+        self._offsets = offsets
+
+    @property
+    def products(self):
+        if self._products is None:
+            self._products = pd.Index(self._product_list, name=self._name)
+        return self._products
+
+    @property
+    def dates(self):
+        if self._offsets is None:
+            self._compact()
+        return self._dates[:self._size]
+
+    @property
+    def values(self):
+        if self._offsets is None:
+            self._compact()
+        return self._values[:self._size]
+
+    @property
+    def offsets(self):
+        if self._offsets is None:
+            self._compact()
+        return self._offsets
+
+    @property
+    def date_index(self):
+        """Every distinct observation date in the store"""
+        return pd.DatetimeIndex(np.unique(self.dates))
+
+    @property
+    def nbytes(self):
+        return self.dates.nbytes + self.values.nbytes + self.offsets.nbytes
+
+    def series(self, product, freq=None):
+        """Observed series of one product, or resampled to freq (see resample)"""
+        if freq is not None:
+            return self.resample(product, freq)
+        start, end = self._spans[self._positions[product]]
+        return pd.Series(self._values[start:end], index=pd.DatetimeIndex(self._dates[start:end]), name=product)
+
+    def resample(self, product, freq=DEFAULT_TIME_FREQ):
+        """Series summed per freq period, empty periods as 0 - computed on first access"""
+        cached = self._resampled.setdefault(product, {})
+        resampled = cached.get(freq)
+        if resampled is None:
+            resampled = cached[freq] = self.series(product).resample(freq).sum()
+        return resampled
+
+    def items(self, freq=None):
+        for product in self.products:
+            yield product, self.series(product, freq)
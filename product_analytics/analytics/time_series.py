@@ -1,27 +1,93 @@
+import hashlib
+import logging
+import warnings
+from concurrent.futures import as_completed
+import numpy as np
 import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
-from prophet import Prophet
-from sklearn.metrics import mean_absolute_error
+from config.constants import FORECAST_HORIZON, BASELINE_FREQ, BASELINE_ALPHAS, BASELINE_BETAS
+from analytics.baseline_forecast import BaselineForecaster, batch_metrics
+from analytics.forecast_store import ForecastStore
+from analytics.parallel import process_pool
+from analytics.series_store import ProductSeriesStore
+from monitoring.metrics import instrumented
+
+def _series_hash(series, model, model_kwargs, horizon):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(series.index.asi8.tobytes())
+    h.update(series.to_numpy(dtype=np.float64).tobytes())
+    h.update(repr((model, sorted(model_kwargs.items()), horizon)).encode())
+    return h.hexdigest()
+
+def _regular_freq(index):
+    """Frequency string of a regularly spaced DatetimeIndex, None for irregular dates"""
+    if len(index) < 3:
+        return None
+    try:
+        return pd.infer_freq(index)
+    except (TypeError, ValueError):
+        return None
+
+def _fit_product(product, dates, values, model, model_kwargs, horizon, freq):
+    """Fit one product's series in a worker process; never raises
+
+    freq is the spacing of dates (None when irregular); it is stored with the
+    forecast so its steps can be turned back into dates.
+    """
+    result = {'product': product, 'freq': freq}
+    try:
+        series = pd.Series(values, index=pd.DatetimeIndex(dates))
+        if len(series) < 2:
+            raise ValueError(f"Not enough observations ({len(series)})")
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            if model == 'arima':
+                from statsmodels.tsa.arima.model import ARIMA
+                fitted = ARIMA(series.to_numpy(), order=model_kwargs.get('order', (1, 1, 1))).fit()
+                result['params'] = dict(zip(fitted.param_names, np.asarray(fitted.params).tolist()))
+                result['forecast'] = np.asarray(fitted.forecast(horizon))
+            elif model == 'prophet':
+                from prophet import Prophet
+                fitted = Prophet(
+                    yearly_seasonality=True,
+                    weekly_seasonality=False,
+                    daily_seasonality=False
+                )
+                fitted.fit(pd.DataFrame({'ds': series.index, 'y': series.to_numpy()}))
+                # Prophet predicts at calendar dates, so irregular history is extended daily
+                result['freq'] = freq or 'D'
+                future = fitted.make_future_dataframe(periods=horizon, freq=result['freq'], include_history=False)
+                result['params'] = {k: np.asarray(v).ravel().tolist() for k, v in fitted.params.items()}
+                result['forecast'] = fitted.predict(future)['yhat'].to_numpy()
+            else:
+                raise ValueError(f"Unsupported model: {model}")
+        result['status'] = 'ok'
+    except Exception as e:
+        result.update(status='failed', error=f"{type(e).__name__}: {e}")
+    return result
 
 class ProductDemandForecaster:
-    def __init__(self, df):
+    def __init__(self, df, store=None, freq=None):
         self.df = df
+        self.store = store
+        self.freq = freq  # e.g. DEFAULT_TIME_FREQ to fit on resampled series; None keeps observed dates
+        self.logger = logging.getLogger(__name__)
         self.preprocess_data()
         
     def preprocess_data(self):
-        """Convert data into time-series format"""
-        self.df['Date'] = pd.to_datetime(self.df['Manufacturing Date'])
-        self.ts_data = self.df.groupby(['Date', 'Product Name'])['Stock Quantity'].sum().unstack()
-        
+        """Convert data into per-product series (long format, df is left untouched)"""
+        self.ts_data = ProductSeriesStore(self.df)
+
     def fit_arima(self, product_name, order=(1,1,1)):
         """ARIMA implementation for single product"""
-        model = ARIMA(self.ts_data[product_name], order=order)
+        from statsmodels.tsa.arima.model import ARIMA
+        model = ARIMA(self.ts_data.series(product_name, self.freq), order=order)
         self.arima_model = model.fit()
         return self.arima_model
         
     def fit_prophet(self, product_name):
         """Facebook Prophet model"""
-        prophet_df = self.ts_data[product_name].reset_index()
+        from prophet import Prophet
+        prophet_df = self.ts_data.series(product_name, self.freq).reset_index()
         prophet_df.columns = ['ds', 'y']
         
         model = Prophet(
@@ -31,9 +97,126 @@ class ProductDemandForecaster:
         )
         model.fit(prophet_df)
         return model
-        
+
+    def _fit_baseline(self, products, horizon, freq=None, alphas=BASELINE_ALPHAS, betas=BASELINE_BETAS):
+        if self.store is None:
+            self.store = ForecastStore()
+        baseline = BaselineForecaster(
+            self.ts_data, freq=freq or self.freq or BASELINE_FREQ, alphas=alphas, betas=betas
+        ).fit()
+        results = baseline.results(horizon)
+        if products is not None:
+            wanted = set(products)
+            results = [r for r in results if r['product'] in wanted]
+        self.store.save('baseline', results)
+        return baseline, results
+
+    def fit_baseline(self, products=None, horizon=FORECAST_HORIZON, freq=None,
+                     alphas=BASELINE_ALPHAS, betas=BASELINE_BETAS):
+        """Vectorized SES/Holt/Croston fit of every product, persisted under model 'baseline'
+
+        Series are smoothed per freq period (default: the forecaster's freq,
+        else BASELINE_FREQ) over the alphas/betas smoothing grid. Returns the
+        fitted BaselineForecaster (see its triage() and backtest()).
+        """
+        return self._fit_baseline(products, horizon, freq, alphas, betas)[0]
+
+    @instrumented('forecasting', rows=lambda result, self, *a, **k: len(self.df))
+    def fit_all(self, model='arima', products=None, n_workers=None, horizon=FORECAST_HORIZON,
+                refit_failed=False, **model_kwargs):
+        """Fit model for every product over a process pool and persist the results
+
+        Products whose series (and model settings) are unchanged since the stored
+        fit are skipped. A failing product is recorded with its error and does
+        not affect the others. Returns a summary of fitted/skipped/failed products.
+        Series are fitted at the forecaster's freq; without one, ARIMA fits the
+        observed dates and irregularly spaced products get undated forecasts.
+        model='baseline' fits the whole catalog in one vectorized pass (see
+        fit_baseline) and always recomputes every product, changed or not;
+        it takes only freq, alphas and betas as model_kwargs, and n_workers
+        and refit_failed do not apply.
+        """
+        if self.store is None:
+            self.store = ForecastStore()
+        if model == 'baseline':
+            unsupported = sorted(set(model_kwargs) - {'freq', 'alphas', 'betas'})
+            if unsupported:
+                raise ValueError(
+                    f"model='baseline' does not accept {unsupported}; it takes freq, alphas and betas"
+                )
+            results = self._fit_baseline(products, horizon, **model_kwargs)[1]
+            return {
+                'fitted': [r['product'] for r in results if r['status'] == 'ok'], 'skipped': [],
+                'failed': [r['product'] for r in results if r['status'] != 'ok']
+            }
+        products = list(self.ts_data.products if products is None else products)
+        known = self.store.series_hashes(model)
+
+        jobs, skipped = [], []
+        for product in products:
+            series = self.ts_data.series(product, self.freq)
+            series_hash = _series_hash(series, model, model_kwargs, horizon)
+            stored = known.get(product)
+            if stored and stored[0] == series_hash and (stored[1] == 'ok' or not refit_failed):
+                skipped.append(product)
+                continue
+            jobs.append((product, series, series_hash))
+
+        fitted, failed, pending = [], [], []
+        with process_pool(n_workers) as pool:
+            futures = {
+                pool.submit(
+                    _fit_product, product, series.index.to_numpy(), series.to_numpy(dtype=float),
+                    model, model_kwargs, horizon, self.freq or _regular_freq(series.index)
+                ): (product, series, series_hash)
+                for product, series, series_hash in jobs
+            }
+            for future in as_completed(futures):
+                product, series, series_hash = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:  # worker died (e.g. killed by the OS)
+                    result = {'product': product, 'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+                result['series_hash'] = series_hash
+                if len(series):
+                    result['last_date'] = series.index[-1].isoformat()
+                (fitted if result['status'] == 'ok' else failed).append(product)
+                pending.append(result)
+                if len(pending) >= 100:
+                    self.store.save(model, pending)
+                    pending = []
+        self.store.save(model, pending)
+
+        if failed:
+            self.logger.warning(f"{len(failed)} of {len(jobs)} {model} fits failed")
+        return {'fitted': fitted, 'skipped': skipped, 'failed': failed}
+
+    def forecast_all(self, model='arima', products=None, triage=False, fallback=False, **fit_kwargs):
+        """Long-format forecasts for all products, fitting only what changed
+
+        triage=True fits the baseline first and runs model only on the products
+        the baseline forecasts poorly, the rest keep the baseline forecast;
+        fallback=True serves baseline forecasts for products model failed on.
+        A 'model' column says which model produced each forecast.
+        """
+        if not (triage or fallback) or model == 'baseline':
+            self.fit_all(model=model, products=products, **fit_kwargs)
+            return self.store.forecasts(model, products)
+
+        horizon = fit_kwargs.get('horizon', FORECAST_HORIZON)
+        baseline = self.fit_baseline(products, horizon)
+        candidates = list(self.ts_data.products if products is None else products)
+        if triage:
+            poor = set(baseline.triage())
+            candidates = [p for p in candidates if p in poor]
+        summary = self.fit_all(model=model, products=candidates, **fit_kwargs)
+        served = [p for p in candidates if p not in set(summary['failed'])] if fallback else candidates
+        detailed = self.store.forecasts(model, served).assign(model=model)
+        rest = [p for p in (self.ts_data.products if products is None else products) if p not in set(served)]
+        simple = self.store.forecasts('baseline', rest).assign(model='baseline')
+        return pd.concat([detailed, simple], ignore_index=True)
+
     def evaluate_model(self, actual, predicted):
-        return {
-            'mae': mean_absolute_error(actual, predicted),
-            'mape': np.mean(np.abs((actual - predicted) / actual)) * 100
-        } 
+        """MAE and MAPE (plus RMSE); 2-D inputs give one value per row, e.g. per product"""
+        return batch_metrics(actual, predicted)
+
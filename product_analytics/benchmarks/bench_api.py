@@ -0,0 +1,34 @@
+"""Pages/sec of the paginated API loader at different concurrency limits
+
+Run from the product_analytics directory:
+    python -m benchmarks.bench_api --pages 200 --latency 0.02
+"""
+import argparse
+import time
+from data_processing.api_fetcher import PaginatedAPIFetcher
+from tests.fixtures import make_product_frame, PagedProductServer
+
+def run(pages=200, page_size=100, latency=0.02, levels=(1, 2, 4, 8, 16, 32)):
+    df = make_product_frame(pages * page_size)
+    results = []
+    with PagedProductServer(df, page_size=page_size, latency=latency) as server:
+        for concurrency in levels:
+            start = time.perf_counter()
+            rows = len(PaginatedAPIFetcher(concurrency=concurrency).fetch(server.url))
+            elapsed = time.perf_counter() - start
+            results.append({
+                'concurrency': concurrency,
+                'seconds': round(elapsed, 3),
+                'pages_per_sec': round(pages / elapsed, 1),
+                'rows': rows
+            })
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help='simulated server latency per page (s)')
+    args = parser.parse_args()
+    for r in run(args.pages, args.page_size, args.latency):
+        print(f"concurrency={r['concurrency']:>3}  {r['pages_per_sec']:>8} pages/s  ({r['seconds']}s, {r['rows']} rows)")
@@ -0,0 +1,54 @@
+"""Payload size and callback time of the time-series view by series length
+
+Compares sending every point (max_points=None) with server-side LTTB
+downsampling. Run from the product_analytics directory:
+    python -m benchmarks.bench_dashboard --sizes 10000 100000 1000000
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from config.constants import MAX_PLOT_POINTS
+from visualization.aggregate_store import DashboardAggregateStore
+from visualization.interactive_plots import ProductVisualizationDashboard
+
+def make_series_frame(n_points, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Product Name': 'Laptop',
+        'Manufacturing Date': pd.date_range('2000-01-01', periods=n_points, freq='min'),
+        'Price': 250 + np.cumsum(rng.normal(0, 1, n_points)),
+        'Stock Quantity': rng.integers(1, 100, n_points)
+    })
+
+def run(sizes=(10_000, 100_000, 1_000_000), metrics=('Price', 'Stock Quantity')):
+    results = []
+    store = DashboardAggregateStore(tempfile.mkdtemp(prefix='bench-aggregates-'))
+    for n_points in sizes:
+        data = make_series_frame(n_points)
+        labels = np.random.default_rng(0).integers(0, 4, n_points)
+        for mode, max_points in (('full', None), ('lttb', MAX_PLOT_POINTS)):
+            dashboard = ProductVisualizationDashboard(
+                data, cluster_labels=labels, max_points=max_points, aggregate_store=store
+            )
+            start = time.perf_counter()
+            fig = dashboard._build_time_series_figure('Laptop', metrics)
+            payload = fig.to_json()
+            elapsed = time.perf_counter() - start
+            results.append({
+                'points': n_points,
+                'mode': mode,
+                'trace_types': sorted({t.type for t in fig.data}),
+                'callback_s': round(elapsed, 4),
+                'payload_mb': round(len(payload) / 1e6, 3)
+            })
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    for r in run(args.sizes):
+        print(f"{r['points']:>9} points  {r['mode']:<5} {r['callback_s']:>8.3f}s  "
+              f"{r['payload_mb']:>8.3f} MB  {', '.join(r['trace_types'])}")
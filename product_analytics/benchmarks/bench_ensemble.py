@@ -0,0 +1,38 @@
+"""Training vs. load time of RatingPredictorOptimizer.create_ensemble
+
+Reports three paths: a cold train, a retrain that only changes the final
+estimator (out-of-fold predictions reused), and a fresh process-like load
+from the on-disk model store. Run from the product_analytics directory:
+    python -m benchmarks.bench_ensemble --rows 5000
+"""
+import argparse
+import tempfile
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from models.predictive_models.model_store import ModelStore
+from models.predictive_models.rating_predictor import RatingPredictorOptimizer
+
+def run(rows=5000, features=10, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, features))
+    y = X[:, 0] * 2 + X[:, 1] ** 2 + rng.normal(0, 0.3, rows)
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        store = ModelStore(root)
+        optimizer = RatingPredictorOptimizer(X, y)
+        optimizer.create_ensemble(store=store)
+        results['cold_train'] = optimizer.timings
+        optimizer.create_ensemble(final_estimator=LinearRegression(), store=store)
+        results['final_estimator_only'] = optimizer.timings
+        restarted = RatingPredictorOptimizer(X, y)
+        restarted.create_ensemble(store=store)
+        results['load_from_store'] = restarted.timings
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+    for path, t in run(args.rows).items():
+        detail = ', '.join(f'{k}={v:.3f}' if isinstance(v, float) else f'{k}={v}' for k, v in t.items())
+        print(f'{path:<22} {detail}')
@@ -0,0 +1,67 @@
+"""Startup cost of main.py and of each analyzer constructor
+
+Each measurement runs in a fresh interpreter so import caches do not leak
+between them. Run from the product_analytics directory:
+    python -m benchmarks.bench_startup
+"""
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    'torch', 'transformers', 'spacy', 'wordcloud', 'matplotlib', 'nltk', 'textblob',
+    'prophet', 'statsmodels', 'xgboost', 'lightgbm', 'catboost', 'optuna', 'shap', 'dash', 'plotly'
+]
+
+SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+{construct}
+done = time.perf_counter()
+print(json.dumps({{
+    'import_s': imported - start,
+    'construct_s': done - imported,
+    'heavy_modules': sorted(m for m in {heavy!r} if m in sys.modules)
+}}))
+"""
+
+CASES = {
+    'main': ('import main', 'pass'),
+    'ProductSentimentAnalyzer': (
+        'from analytics.sentiment_analysis import ProductSentimentAnalyzer',
+        'ProductSentimentAnalyzer()'
+    ),
+    'AdvancedSentimentAnalyzer': (
+        'from analytics.sentiment_analysis import AdvancedSentimentAnalyzer',
+        'AdvancedSentimentAnalyzer()'
+    ),
+    'ProductDemandForecaster': (
+        'import pandas as pd\nfrom analytics.time_series import ProductDemandForecaster',
+        "ProductDemandForecaster(pd.DataFrame({'Manufacturing Date': ['2023-01-01'], "
+        "'Product Name': ['Laptop'], 'Stock Quantity': [1]}))"
+    ),
+    'RatingPredictorOptimizer': (
+        'import numpy as np\nfrom models.predictive_models.rating_predictor import RatingPredictorOptimizer',
+        'RatingPredictorOptimizer(np.zeros((10, 2)), np.zeros(10))'
+    )
+}
+
+def measure(imports, construct):
+    code = SNIPPET.format(imports=imports, construct=construct, heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def run():
+    return {name: measure(*case) for name, case in CASES.items()}
+
+if __name__ == '__main__':
+    for name, result in run().items():
+        if 'error' in result:
+            print(f"{name:<28} error: {result['error']}")
+        else:
+            print(f"{name:<28} import {result['import_s']:.3f}s  construct {result['construct_s']:.3f}s  "
+                  f"heavy modules loaded: {', '.join(result['heavy_modules']) or 'none'}")
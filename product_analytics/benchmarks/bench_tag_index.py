@@ -0,0 +1,75 @@
+"""Tag/variation filter latency: ProductTagIndex against string scans
+
+Times building the index once, then single-tag, tag AND color and
+any-of-tags queries through the index against the equivalent str.contains
+scans of the raw columns (both the bare substring test and the exact
+token regex, which is what the index answers). Run from the
+product_analytics directory:
+    python -m benchmarks.bench_tag_index --sizes 10000 1000000
+"""
+import argparse
+import re
+import time
+import numpy as np
+from benchmarks.synthetic import make_catalog
+from data_processing.tag_index import ProductTagIndex
+
+def _best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def _token(tag):
+    return f'(?:^|,){re.escape(tag)}(?:,|$)'
+
+def run(sizes=(10_000, 1_000_000), repeat=5, seed=0):
+    results = []
+    for n_rows in sizes:
+        data = make_catalog(n_rows, seed=seed)
+        build_s, index = _best_of(lambda: ProductTagIndex(data), 1)
+        tags = data['Product Tags'].str.split(',')
+        first, second = tags.iloc[0][0], tags.iloc[n_rows // 2][1]
+        variations = data['Color/Size Variations']
+        queries = {
+            'tag': (
+                lambda: index.filter(all_of=[f'tag:{first}']),
+                lambda: np.flatnonzero(data['Product Tags'].str.contains(first, regex=False)),
+                lambda: np.flatnonzero(data['Product Tags'].str.contains(_token(first)))
+            ),
+            'tag_and_color': (
+                lambda: index.filter(all_of=[f'tag:{first}', 'color:Red']),
+                lambda: np.flatnonzero(data['Product Tags'].str.contains(first, regex=False)
+                                       & variations.str.contains('Red', regex=False)),
+                lambda: np.flatnonzero(data['Product Tags'].str.contains(_token(first))
+                                       & variations.str.contains('^Red/'))
+            ),
+            'any_of_tags': (
+                lambda: index.filter(any_of=[f'tag:{first}', f'tag:{second}']),
+                lambda: np.flatnonzero(data['Product Tags'].str.contains(first, regex=False)
+                                       | data['Product Tags'].str.contains(second, regex=False)),
+                lambda: np.flatnonzero(data['Product Tags'].str.contains(f'{_token(first)}|{_token(second)}'))
+            ),
+        }
+        for name, (indexed, substring, exact) in queries.items():
+            index_s, rows = _best_of(indexed, repeat)
+            substring_s, _ = _best_of(substring, repeat)
+            exact_s, expected = _best_of(exact, repeat)
+            results.append({
+                'rows': n_rows, 'query': name, 'matches': len(rows), 'agrees': bool(np.array_equal(rows, expected)),
+                'build_s': round(build_s, 4), 'index_ms': round(index_s * 1e3, 4),
+                'contains_ms': round(substring_s * 1e3, 3), 'regex_ms': round(exact_s * 1e3, 3)
+            })
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    for r in run(args.sizes, args.repeat):
+        print(f"{r['rows']:>9} rows  {r['query']:<14} {r['matches']:>7} matches  index {r['index_ms']:>9.3f} ms  "
+              f"str.contains {r['contains_ms']:>9.3f} ms  regex {r['regex_ms']:>9.3f} ms  "
+              f"(build {r['build_s']:.2f}s{'' if r['agrees'] else ', MISMATCH'})")
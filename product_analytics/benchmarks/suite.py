@@ -0,0 +1,246 @@
+"""Pipeline benchmark suite on synthetic catalogs, with baseline comparison
+
+Times and memory-profiles the loader, feature engineering, clustering,
+forecasting (ARIMA and the vectorized baseline), sentiment batching and the
+dashboard callbacks on generated catalogs (see benchmarks.synthetic). Every
+(case, size) runs in a fresh interpreter so peak RSS belongs to that case
+alone; setup such as loading the input is excluded from the timings. Results are written as JSON and,
+given a baseline file, compared against it - the exit status is 1 when a
+case got slower or hungrier than the thresholds allow. Run from the
+product_analytics directory:
+    python -m benchmarks.suite --sizes 10000 1000000 --output bench.json --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+TIME_THRESHOLD = 0.2  # allowed relative slowdown against the baseline
+MEMORY_THRESHOLD = 0.2  # allowed relative growth of peak RSS
+MIN_SECONDS = 0.05  # slowdowns smaller than this are treated as noise
+MIN_MB = 16  # likewise for peak RSS
+
+def _load(path):
+    from data_processing.data_loader import ProductDataLoader
+    return ProductDataLoader({}).load_data(source_type='csv', filepath=path)
+
+# Each case does its setup and returns the callable to measure; the callable
+# returns the number of rows it processed.
+
+def _case_loader(path):
+    from data_processing.data_loader import ProductDataLoader
+    loader = ProductDataLoader({})
+    return lambda: len(loader.load_data(source_type='csv', filepath=path))
+
+def _case_feature_engineering(path):
+    from data_processing.feature_engineering import ProductFeatureEngineer
+    data = _load(path)
+    return lambda: len(ProductFeatureEngineer().transform(data))
+
+def _case_clustering(path):
+    from analytics.product_analysis import engineer_features, feature_matrix
+    from config.constants import CLUSTER_FEATURES
+    from models.clustering.product_segmentation import ProductClusterAnalyzer
+    features = feature_matrix(engineer_features(_load(path)), CLUSTER_FEATURES)[0]
+
+    def measure():
+        analyzer = ProductClusterAnalyzer(features, n_clusters_range=(2, 6))
+        analyzer.find_optimal_clusters(random_state=0)
+        return len(analyzer.cluster_products('kmeans', n_clusters=4, random_state=0))
+    return measure
+
+def _case_forecasting(path):
+    from analytics.forecast_store import ForecastStore
+    from analytics.time_series import ProductDemandForecaster
+    data = _load(path)
+    store_path = os.path.join(tempfile.mkdtemp(prefix='bench-forecast-'), 'forecasts.sqlite')
+
+    def measure():
+        ProductDemandForecaster(data, store=ForecastStore(store_path)).fit_all(model='arima')
+        return len(data)
+    return measure
+
+def _case_baseline_forecasting(path):
+    from analytics.forecast_store import ForecastStore
+    from analytics.time_series import ProductDemandForecaster
+    data = _load(path)
+    store_path = os.path.join(tempfile.mkdtemp(prefix='bench-baseline-'), 'forecasts.sqlite')
+
+    def measure():
+        ProductDemandForecaster(data, store=ForecastStore(store_path)).fit_all(model='baseline')
+        return len(data)
+    return measure
+
+def _case_sentiment(path):
+    from analytics.sentiment_analysis import ProductSentimentAnalyzer
+    from benchmarks.synthetic import make_reviews
+    reviews = make_reviews(_load(path)['Product ID'])
+    analyzer = ProductSentimentAnalyzer()
+    return lambda: len(analyzer.batch_analyze_reviews(reviews))
+
+def _case_dashboard(path):
+    from visualization.aggregate_store import DashboardAggregateStore
+    from visualization.interactive_plots import ProductVisualizationDashboard
+    data = _load(path)
+    labels = np.random.default_rng(0).integers(0, 4, len(data))
+    store_dir = tempfile.mkdtemp(prefix='bench-aggregates-')
+
+    def measure():
+        # covers the aggregate refresh and building the product index
+        store = DashboardAggregateStore(store_dir)
+        store.refresh(data, labels)
+        dashboard = ProductVisualizationDashboard(data, cluster_labels=labels, aggregate_store=store)
+        for product in dashboard.product_index:
+            dashboard._time_series_figure(product, ('Price', 'Stock Quantity')).to_json()
+        for figure in (dashboard._cluster_figure(), dashboard._correlation_figure(), dashboard._sentiment_figure()):
+            figure.to_json()
+        return len(data)
+    return measure
+
+CASES = {
+    'loader': _case_loader,
+    'feature_engineering': _case_feature_engineering,
+    'clustering': _case_clustering,
+    'forecasting': _case_forecasting,
+    'baseline_forecasting': _case_baseline_forecasting,
+    'sentiment': _case_sentiment,
+    'dashboard': _case_dashboard,
+}
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return _peak_rss_mb()
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    divisor = 2 ** 20 if sys.platform == 'darwin' else 2 ** 10
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / divisor
+
+def run_case(case, path):
+    """Measure one case in this process"""
+    result = {'case': case}
+    try:
+        measure = CASES[case](path)
+        rss_before = _rss_mb()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+        rows = measure()
+        wall = time.perf_counter() - wall_start
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = (time.process_time() - cpu_start
+               + (children.ru_utime - children_start.ru_utime)
+               + (children.ru_stime - children_start.ru_stime))
+    except (ImportError, LookupError, OSError) as e:
+        # missing optional models (transformers, VADER lexicon, ...) skip the case
+        return dict(result, status='skipped', error=f"{type(e).__name__}: {e}")
+    except Exception as e:
+        return dict(result, status='error', error=f"{type(e).__name__}: {e}")
+    peak = _peak_rss_mb()
+    return dict(
+        result, status='ok', rows=rows, wall_s=round(wall, 4), cpu_s=round(cpu, 4),
+        rows_per_s=round(rows / wall, 1) if wall else None,
+        peak_rss_mb=round(peak, 1), rss_growth_mb=round(max(peak - rss_before, 0), 1)
+    )
+
+def run(sizes=DEFAULT_SIZES, cases=None, data_dir='bench_data', seed=0, timeout=None):
+    """Run every case at every size, each in a fresh interpreter"""
+    from benchmarks.synthetic import catalog_csv
+
+    results = []
+    for n_rows in sizes:
+        path = catalog_csv(data_dir, n_rows, seed=seed)
+        for case in cases or CASES:
+            try:
+                proc = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.suite', '--worker', case, path],
+                    capture_output=True, text=True, timeout=timeout
+                )
+                lines = proc.stdout.strip().splitlines()
+                result = json.loads(lines[-1]) if proc.returncode == 0 and lines else {
+                    'case': case, 'status': 'error', 'error': proc.stderr.strip()[-500:]
+                }
+            except subprocess.TimeoutExpired:
+                result = {'case': case, 'status': 'error', 'error': f'timed out after {timeout}s'}
+            result['size'] = n_rows
+            results.append(result)
+            print(_format(result), flush=True)
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': seed
+        },
+        'results': results
+    }
+
+def compare(report, baseline, time_threshold=TIME_THRESHOLD, memory_threshold=MEMORY_THRESHOLD):
+    """Regressions of report against baseline, as a list of dicts"""
+    previous = {(r['case'], r['size']): r for r in baseline['results'] if r.get('status') == 'ok'}
+    regressions = []
+    for r in report['results']:
+        base = previous.get((r['case'], r['size']))
+        if r.get('status') != 'ok' or base is None:
+            continue
+        for metric, threshold, floor in (('wall_s', time_threshold, MIN_SECONDS),
+                                         ('peak_rss_mb', memory_threshold, MIN_MB)):
+            if r[metric] - base[metric] > max(threshold * base[metric], floor):
+                regressions.append({
+                    'case': r['case'], 'size': r['size'], 'metric': metric,
+                    'baseline': base[metric], 'current': r[metric],
+                    'change': round(r[metric] / base[metric] - 1, 3) if base[metric] else None
+                })
+    return regressions
+
+def _format(r):
+    if r.get('status') != 'ok':
+        return f"{r['case']:<20} {r['size']:>10}  {r['status']}: {' '.join(r.get('error', '').split())[:100]}"
+    return (f"{r['case']:<20} {r['size']:>10}  {r['wall_s']:>9.3f}s wall  {r['cpu_s']:>9.3f}s cpu  "
+            f"{r['peak_rss_mb']:>8.1f} MB peak  {r['rows_per_s']:>12,.0f} rows/s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES))
+    parser.add_argument('--data-dir', default='bench_data', help='where generated catalogs are cached')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, help='seconds allowed per case')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='overwrite --baseline with this run')
+    parser.add_argument('--time-threshold', type=float, default=TIME_THRESHOLD)
+    parser.add_argument('--memory-threshold', type=float, default=MEMORY_THRESHOLD)
+    parser.add_argument('--worker', nargs=2, metavar=('CASE', 'CSV'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_case(*args.worker)))
+        sys.exit(0)
+
+    report = run(args.sizes, args.cases, args.data_dir, args.seed, args.timeout)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+    elif args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.time_threshold, args.memory_threshold)
+        for reg in regressions:
+            print(f"REGRESSION {reg['case']} @ {reg['size']}: {reg['metric']} "
+                  f"{reg['baseline']} -> {reg['current']} ({reg['change'] or 0:+.0%})")
+        sys.exit(1 if regressions else 0)
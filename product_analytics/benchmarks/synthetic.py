@@ -0,0 +1,105 @@
+"""Synthetic product catalogs with the data.csv schema and value distributions
+
+Columns, formats and marginal distributions follow data.csv: uniform
+categorical columns, prices uniform on [10, 500] with two decimals, stock
+1-100, dimensions 5-20 cm per side, 8-character IDs, 6-character SKUs and
+two 3-character tags. Product IDs are unique at any size. Generation is
+chunked and seeded per chunk, so a 10M-row CSV never has to fit in memory
+and the same (n_rows, seed) always produces the same file.
+    python -m benchmarks.synthetic catalog.csv --rows 1000000
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    'Product ID', 'Product Name', 'Product Category', 'Product Description', 'Price',
+    'Stock Quantity', 'Warranty Period', 'Product Dimensions', 'Manufacturing Date',
+    'Expiration Date', 'SKU', 'Product Tags', 'Color/Size Variations', 'Product Ratings'
+]
+CHOICES = {
+    'Product Name': ['Headphones', 'Smartphone', 'Monitor', 'Laptop'],
+    'Product Category': ['Electronics', 'Clothing', 'Home Appliances'],
+    'Manufacturing Date': ['2023-01-01', '2023-03-15', '2023-07-30'],
+    'Expiration Date': ['2026-01-01', '2024-01-01', '2025-01-01'],
+    'Color/Size Variations': ['Red/Small', 'Blue/Medium', 'Green/Large'],
+}
+ALPHABET = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', dtype=np.uint8)
+ID_SPACE = 36 ** 8
+ID_MULTIPLIER = 2_654_435_761  # prime, so i -> (i * m + offset) mod 36^8 is a permutation
+ID_OFFSET = 1_460_001_237
+
+REVIEW_OPENERS = ['Great', 'Terrible', 'Decent', 'Awful', 'Excellent', 'Okay', 'Disappointing', 'Solid']
+REVIEW_SUBJECTS = ['battery life', 'screen', 'sound quality', 'build quality', 'price', 'delivery', 'support']
+REVIEW_CLOSERS = ['would buy again.', 'not worth it.', 'does the job.', 'returned it.', 'highly recommended.']
+
+def _random_strings(rng, n, length):
+    codes = ALPHABET[rng.integers(0, len(ALPHABET), (n, length))]
+    return codes.view(f'S{length}').ravel().astype(str)
+
+def _encode_ids(numbers):
+    digits = np.empty((len(numbers), 8), dtype=np.uint8)
+    for position in range(7, -1, -1):
+        numbers, digits[:, position] = np.divmod(numbers, 36)
+    return ALPHABET[digits].view('S8').ravel().astype(str)
+
+def make_catalog(n_rows, seed=0, start=0):
+    """DataFrame of n_rows products; start offsets the (unique) Product IDs for chunking"""
+    rng = np.random.default_rng(seed)
+    dims = rng.integers(5, 21, (n_rows, 3)).astype(str)
+    positions = np.arange(start, start + n_rows, dtype=np.int64)
+    data = {
+        'Product ID': _encode_ids((positions * ID_MULTIPLIER + ID_OFFSET) % ID_SPACE),
+        'Product Description': np.char.add('Product_', _random_strings(rng, n_rows, 5)),
+        'Price': rng.uniform(10, 500, n_rows).round(2),
+        'Stock Quantity': rng.integers(1, 101, n_rows),
+        'Warranty Period': rng.integers(1, 4, n_rows),
+        'Product Dimensions': np.char.add(
+            np.char.add(np.char.add(np.char.add(dims[:, 0], 'x'), dims[:, 1]), np.char.add('x', dims[:, 2])), ' cm'
+        ),
+        'SKU': _random_strings(rng, n_rows, 6),
+        'Product Tags': np.char.add(np.char.add(_random_strings(rng, n_rows, 3), ','), _random_strings(rng, n_rows, 3)),
+        'Product Ratings': rng.integers(1, 6, n_rows),
+    }
+    for column, values in CHOICES.items():
+        data[column] = np.asarray(values)[rng.integers(0, len(values), n_rows)]
+    return pd.DataFrame(data)[COLUMNS]
+
+def make_reviews(product_ids, n_unique=5_000, seed=0):
+    """Review frame (Product ID, Review) drawing from n_unique template texts, as repeated reviews do"""
+    rng = np.random.default_rng(seed)
+    templates = [
+        f"{REVIEW_OPENERS[i % len(REVIEW_OPENERS)]} {REVIEW_SUBJECTS[i % len(REVIEW_SUBJECTS)]}, "
+        f"{REVIEW_CLOSERS[i % len(REVIEW_CLOSERS)]} #{i}"
+        for i in range(n_unique)
+    ]
+    return pd.DataFrame({
+        'Product ID': np.asarray(product_ids),
+        'Review': np.asarray(templates)[rng.integers(0, n_unique, len(product_ids))]
+    })
+
+def write_catalog_csv(path, n_rows, seed=0, chunk_rows=1_000_000):
+    """Write an n_rows catalog to path chunk by chunk; returns path"""
+    tmp = f'{path}.tmp'
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        chunk = make_catalog(min(chunk_rows, n_rows - start), seed=seed + i, start=start)
+        chunk.to_csv(tmp, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    os.replace(tmp, path)
+    return path
+
+def catalog_csv(data_dir, n_rows, seed=0):
+    """Path of a cached generated catalog, writing it on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f'catalog-{n_rows}-{seed}.csv')
+    if not os.path.exists(path):
+        write_catalog_csv(path, n_rows, seed=seed)
+    return path
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_catalog_csv(args.path, args.rows, seed=args.seed)
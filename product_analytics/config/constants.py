@@ -1 +1,88 @@
- 
+import os
+
+# Every on-disk cache and store resolves under CACHE_DIR, so a run reuses them
+# whatever its working directory
+CACHE_DIR = os.environ.get('PRODUCT_ANALYTICS_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'product_analytics')
+
+# Data processing constants
+DATE_FORMAT = '%Y-%m-%d'
+DATE_COLUMNS = ['Manufacturing Date', 'Expiration Date']
+CSV_CHUNK_SIZE = 100_000  # rows per streamed chunk
+COLUMNAR_CACHE_DIR = os.path.join(CACHE_DIR, 'columnar')
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # size cap for the on-disk columnar cache
+SQL_CHUNK_SIZE = 50_000  # rows per server-side cursor fetch
+SQL_MAX_WORKERS = 8  # concurrent partition reads
+API_CONCURRENCY = 8  # in-flight page requests
+API_MAX_RETRIES = 3
+API_BACKOFF_BASE = 0.5  # seconds, doubled per retry
+API_TIMEOUT = 60  # seconds per request
+
+# Compact dtypes for streamed CSV chunks (low-cardinality strings as categoricals)
+CSV_DTYPES = {
+    'Product Name': 'category',
+    'Product Category': 'category',
+    'Color/Size Variations': 'category',
+    'Price': 'float32',
+    'Stock Quantity': 'Int32',
+    'Warranty Period': 'Int32',
+    'Product Ratings': 'float32'
+}
+
+# Sentiment analysis
+SENTIMENT_BATCH_SIZE = 64  # texts per transformer forward pass
+LEXICON_PARALLEL_MIN_TEXTS = 5_000  # below this, lexicon scoring stays in-process
+SPACY_BATCH_SIZE = 256  # docs per nlp.pipe batch
+SPACY_UNUSED_PIPES = ['lemmatizer', 'textcat']  # not needed for entities, noun chunks or keywords
+RESULT_CACHE_PATH = os.path.join(CACHE_DIR, 'sentiment_cache.sqlite')
+RESULT_CACHE_MAX_ENTRIES = 5_000_000
+RESULT_CACHE_MAX_AGE_DAYS = 90
+RESULT_CACHE_MEMORY_SIZE = 100_000  # in-memory LRU entries in front of SQLite
+RESULT_CACHE_PRUNE_EVERY = 10_000  # writes between age/size prunes
+
+# Clustering
+SILHOUETTE_SAMPLE_SIZE = 10_000  # rows used to estimate silhouette scores
+MINIBATCH_THRESHOLD = 100_000  # switch to MiniBatchKMeans above this many rows
+OUT_OF_CORE_EPOCHS = 3  # MiniBatchKMeans passes over the streamed chunks
+
+# Forecasting
+FORECAST_HORIZON = 90  # days
+DEFAULT_TIME_FREQ = 'W'  # resampling frequency of per-product series
+BASELINE_FREQ = 'D'  # baseline forecasts step in days, like FORECAST_HORIZON
+BASELINE_ALPHAS = (0.1, 0.2, 0.3, 0.5, 0.7)  # level smoothing candidates, best kept per product
+BASELINE_BETAS = (0.05, 0.1, 0.2)  # Holt trend smoothing candidates
+CROSTON_ADI_THRESHOLD = 1.32  # mean periods between demands above which demand counts as intermittent
+BASELINE_TRIAGE_ERROR = 0.5  # in-sample MAE / mean demand above which a product gets a full model
+FORECAST_STORE_PATH = os.path.join(CACHE_DIR, 'forecasts.sqlite')
+
+# Rating prediction
+XGB_EARLY_STOPPING_ROUNDS = 50  # boosting rounds without validation improvement
+MODEL_STORE_DIR = os.path.join(CACHE_DIR, 'model_store')
+MODEL_STORE_KEEP_VERSIONS = 3
+SHAP_BACKGROUND_SIZE = 100  # background rows for interventional TreeExplainer
+SHAP_BATCH_SIZE = 5_000  # rows explained per worker task
+
+# Analysis pipeline
+ANALYSIS_CACHE_DIR = os.path.join(CACHE_DIR, 'analysis_cache')  # stage outputs keyed by a hash of their inputs
+ANALYSIS_MAX_WORKERS = 4  # stages running at the same time
+CLUSTER_FEATURES = ['Price', 'Stock Quantity', 'Warranty Period', 'Product Ratings',
+                    'Volume_cm3', 'Shelf_Life_Days', 'Inventory_Value']
+RATING_TARGET = 'Product Ratings'
+INCREMENTAL_MAX_DELTA_FRACTION = 0.2  # rows changed since the last full fit before refitting
+INCREMENTAL_DRIFT_RATIO = 1.5  # delta's mean squared centroid distance vs. at fit time
+
+# Instrumentation
+METRICS_REPORT_PATH = 'run_report.json'
+METRICS_PROMETHEUS_PATH = 'run_metrics.prom'  # for the node_exporter textfile collector
+
+# Visualization
+FIGURE_CACHE_SIZE = 256  # memoized (product, metrics, tags) figures per dashboard
+MAX_PLOT_POINTS = 2_000  # per-trace point budget sent to the browser
+WEBGL_THRESHOLD = 5_000  # render traces with more points as Scattergl
+AGGREGATE_STORE_DIR = os.path.join(CACHE_DIR, 'dashboard_aggregates')
+AGGREGATE_STORE_BUCKETS = 256  # hash buckets an incremental refresh diffs by
+CORRELATION_COLUMNS = ['Price', 'Stock Quantity', 'Warranty Period', 'Product Ratings']
+SENTIMENT_COLUMN = 'Sentiment Score'  # composite score in [-1, 1], if present in the data
+SENTIMENT_BINS = 20
+AGGREGATE_POLL_INTERVAL = 60_000  # ms between dashboard checks for refreshed aggregates
+AGGREGATE_READER_TTL = 600  # s without a check before a reader stops pinning its aggregate version
+TAG_OPTION_LIMIT = 50  # tag/color/size filter suggestions offered per search
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import random
+import pandas as pd
+from config.constants import API_CONCURRENCY, API_MAX_RETRIES, API_BACKOFF_BASE, API_TIMEOUT
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class PaginatedAPIFetcher:
+    """Concurrent page fetcher for paginated JSON product APIs
+
+    Expects each page to be either a list of records or an object holding the
+    records under records_key, optionally with a total_pages field. When the
+    page count is unknown, pages are requested in windows of `concurrency`
+    until an empty page is returned.
+    """
+
+    def __init__(self, concurrency=API_CONCURRENCY, max_retries=API_MAX_RETRIES,
+                 backoff_base=API_BACKOFF_BASE, timeout=API_TIMEOUT,
+                 page_param='page', records_key='data', total_pages_key='total_pages'):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.page_param = page_param
+        self.records_key = records_key
+        self.total_pages_key = total_pages_key
+        self.logger = logging.getLogger(__name__)
+
+    def fetch(self, endpoint, params=None):
+        """Blocking entry point - runs the event loop until all pages are assembled
+
+        Inside a running event loop (async code, Jupyter) use
+        `await fetch_async(...)` instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.fetch_async(endpoint, params))
+        raise RuntimeError(
+            "fetch() cannot run inside a running event loop; use 'await fetch_async(...)' instead"
+        )
+
+    async def fetch_async(self, endpoint, params=None):
+        """Fetch every page of endpoint and assemble the records into one DataFrame"""
+        import aiohttp
+
+        # One session, keep-alive connector sized to the concurrency limit
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pages = {}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            first = await self._fetch_page(session, semaphore, endpoint, params, 1)
+            pages[1] = self._to_frame(first)
+            total_pages = first.get(self.total_pages_key) if isinstance(first, dict) else None
+
+            if total_pages is not None:
+                await self._fetch_range(session, semaphore, endpoint, params, range(2, int(total_pages) + 1), pages)
+            else:
+                start = 2
+                while len(pages[start - 1]):
+                    window = range(start, start + self.concurrency)
+                    await self._fetch_range(session, semaphore, endpoint, params, window, pages)
+                    if any(len(pages[p]) == 0 for p in window):
+                        break
+                    start += self.concurrency
+
+        frames = [pages[p] for p in sorted(pages) if len(pages[p])]
+        self.logger.info(f"Fetched {len(pages)} pages from {endpoint}")
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    async def _fetch_range(self, session, semaphore, endpoint, params, page_numbers, pages):
+        async def fetch_one(page):
+            # Convert each page as soon as it arrives rather than holding raw JSON
+            pages[page] = self._to_frame(
+                await self._fetch_page(session, semaphore, endpoint, params, page)
+            )
+        await asyncio.gather(*(fetch_one(p) for p in page_numbers))
+
+    async def _fetch_page(self, session, semaphore, endpoint, params, page):
+        """GET a single page, retrying transient failures with jittered exponential backoff"""
+        import aiohttp
+
+        query = dict(params or {}, **{self.page_param: page})
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with semaphore:
+                    async with session.get(endpoint, params=query) as resp:
+                        if resp.status not in RETRY_STATUSES:
+                            resp.raise_for_status()
+                            return await resp.json()
+                        retry_after = resp.headers.get('Retry-After')
+                        error = f"HTTP {resp.status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+            if attempt == self.max_retries:
+                raise RuntimeError(f"Page {page} failed after {attempt + 1} attempts: {error}")
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff_base * 2 ** attempt
+            self.logger.warning(f"Page {page} failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay * (1 + random.random() * 0.1))
+
+    def _to_frame(self, payload):
+        records = payload.get(self.records_key, []) if isinstance(payload, dict) else payload
+        return pd.DataFrame.from_records(records)
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from config.constants import CACHE_MAX_BYTES
+
+class ColumnarCache:
+    """On-disk cache of loaded DataFrames stored as memory-mappable NumPy column files
+
+    Entries are keyed by the content hash of the source file. A small stat index
+    (path, size, mtime) avoids re-hashing unchanged files, and the least recently
+    used entries are evicted once the cache directory exceeds max_bytes.
+
+    Numeric, datetime, nullable and categorical columns are memory-mapped.
+    Other (object/string) columns are stored as codes into their distinct
+    values; on load only the codes are mapped and the column is rebuilt as an
+    object array pointing at those shared values, i.e. 8 bytes per row rather
+    than a copy of every string. Load such columns as category dtypes to keep
+    them fully mapped.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, cache_dir, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(os.path.join(cache_dir, 'keys'), exist_ok=True)
+
+    # ---- keys -------------------------------------------------------------
+    @staticmethod
+    def file_hash(path, block_size=1 << 20):
+        """Content hash of a source file"""
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                h.update(block)
+        return h.hexdigest()
+
+    @staticmethod
+    def _stat_key(path, options):
+        st = os.stat(path)
+        raw = json.dumps([os.path.abspath(path), st.st_size, st.st_mtime_ns, options], default=str)
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def _entry_key(self, path, options):
+        """Resolve the entry key, hashing file contents only when stat info changed"""
+        key_file = os.path.join(self.cache_dir, 'keys', self._stat_key(path, options))
+        if os.path.exists(key_file):
+            with open(key_file) as f:
+                return f.read().strip(), key_file
+        raw = json.dumps([self.file_hash(path), options], default=str)
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest(), key_file
+
+    # ---- public API -------------------------------------------------------
+    def get(self, path, options=None):
+        """Return the cached DataFrame for path (memory-mapped) or None"""
+        key, key_file = self._entry_key(path, options)
+        entry = os.path.join(self.cache_dir, key)
+        manifest_path = os.path.join(entry, self.MANIFEST)
+        if not os.path.exists(manifest_path):
+            return None
+        self._write_key(key_file, key)
+        os.utime(manifest_path)  # LRU bookkeeping
+        self.logger.info(f"Columnar cache hit for {path}")
+        return self._read_entry(entry)
+
+    def put(self, path, df, options=None):
+        """Store df as the cached result of loading path"""
+        key, key_file = self._entry_key(path, options)
+        entry = os.path.join(self.cache_dir, key)
+        if not os.path.exists(entry):
+            tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+            try:
+                self._write_entry(tmp, df, source=os.path.abspath(path))
+                os.rename(tmp, entry)
+            except OSError:
+                # Another process published the same entry first
+                shutil.rmtree(tmp, ignore_errors=True)
+        self._write_key(key_file, key)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            manifest_path = os.path.join(self.cache_dir, name, self.MANIFEST)
+            if os.path.exists(manifest_path):
+                entry = os.path.join(self.cache_dir, name)
+                size = sum(e.stat().st_size for e in os.scandir(entry))
+                entries.append((os.stat(manifest_path).st_mtime, size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            total -= size
+            self.logger.info(f"Evicted columnar cache entry {name}")
+        self._prune_keys()
+
+    def _prune_keys(self):
+        keys_dir = os.path.join(self.cache_dir, 'keys')
+        for name in os.listdir(keys_dir):
+            key_file = os.path.join(keys_dir, name)
+            try:
+                with open(key_file) as f:
+                    key = f.read().strip()
+                if not os.path.exists(os.path.join(self.cache_dir, key)):
+                    os.remove(key_file)
+            except OSError:
+                pass
+
+    def _write_key(self, key_file, key):
+        tmp = key_file + f'.{os.getpid()}'
+        with open(tmp, 'w') as f:
+            f.write(key)
+        os.replace(tmp, key_file)
+
+    # ---- column encoding --------------------------------------------------
+    def _write_entry(self, entry, df, source):
+        columns = []
+        for i, name in enumerate(df.columns):
+            col = df[name]
+            meta = {'name': name, 'file': f'{i}.npy'}
+            if isinstance(col.dtype, pd.CategoricalDtype):
+                meta['kind'] = 'category'
+                meta['ordered'] = bool(col.cat.ordered)
+                np.save(os.path.join(entry, meta['file']), col.cat.codes.to_numpy())
+                np.save(os.path.join(entry, f'{i}.categories.npy'), self._to_numpy(col.cat.categories))
+            elif isinstance(col.dtype, pd.api.extensions.ExtensionDtype) and col.dtype.kind in 'iufb':
+                meta['kind'] = 'masked'
+                meta['dtype'] = str(col.dtype)
+                np.save(os.path.join(entry, meta['file']), col.to_numpy(dtype=col.dtype.numpy_dtype, na_value=0))
+                np.save(os.path.join(entry, f'{i}.mask.npy'), col.isna().to_numpy())
+            elif isinstance(col.dtype, np.dtype) and col.dtype.kind in 'iufbM':
+                meta['kind'] = 'numeric'
+                np.save(os.path.join(entry, meta['file']), col.to_numpy())
+            else:
+                meta['kind'] = 'string'
+                codes, uniques = pd.factorize(col.astype(object))  # missing values get code -1
+                np.save(os.path.join(entry, meta['file']), codes)
+                uniques = self._to_numpy(np.asarray(uniques, dtype=object))
+                np.save(os.path.join(entry, f'{i}.categories.npy'), uniques)
+            columns.append(meta)
+        manifest = {'source': source, 'rows': len(df), 'columns': columns}
+        with open(os.path.join(entry, self.MANIFEST), 'w') as f:
+            json.dump(manifest, f)
+
+    @staticmethod
+    def _to_numpy(values):
+        values = np.asarray(values)
+        if values.dtype == object:
+            values = values.astype(str)  # fixed-width unicode, memory-mappable
+        return values
+
+    def _read_entry(self, entry):
+        with open(os.path.join(entry, self.MANIFEST)) as f:
+            manifest = json.load(f)
+        # Copy-on-write maps: pages are shared until a caller modifies them
+        mmap_mode = 'c' if manifest['rows'] else None
+        data = {}
+        for i, meta in enumerate(manifest['columns']):
+            # Plain ndarray view over the map so pandas treats it like any other column
+            values = np.asarray(np.load(os.path.join(entry, meta['file']), mmap_mode=mmap_mode))
+            if meta['kind'] == 'category':
+                categories = np.load(os.path.join(entry, f'{i}.categories.npy'))
+                data[meta['name']] = pd.Categorical.from_codes(
+                    values, categories=categories, ordered=meta['ordered']
+                )
+            elif meta['kind'] == 'masked':
+                mask = np.load(os.path.join(entry, f'{i}.mask.npy'), mmap_mode=mmap_mode)
+                array_type = pd.api.types.pandas_dtype(meta['dtype']).construct_array_type()
+                data[meta['name']] = array_type(values, np.asarray(mask))
+            elif meta['kind'] == 'numeric':
+                data[meta['name']] = values
+            else:
+                # code -1 picks the trailing NaN
+                uniques = np.append(np.load(os.path.join(entry, f'{i}.categories.npy')).astype(object), np.nan)
+                data[meta['name']] = uniques[values]
+        return pd.DataFrame(data, copy=False)
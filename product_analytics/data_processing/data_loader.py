@@ -1,6 +1,38 @@
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from pandas.api.types import union_categoricals
+from sqlalchemy import create_engine, text
 import logging
+from config.constants import (
+    DATE_FORMAT, DATE_COLUMNS, CSV_CHUNK_SIZE, CSV_DTYPES, CACHE_MAX_BYTES,
+    SQL_CHUNK_SIZE, SQL_MAX_WORKERS, API_CONCURRENCY, API_MAX_RETRIES
+)
+from data_processing.cache import ColumnarCache
+from data_processing.api_fetcher import PaginatedAPIFetcher
+from monitoring.metrics import instrumented
+
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+def get_engine(connection_string):
+    """Process-wide SQLAlchemy engine (and its connection pool) per connection string"""
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(connection_string)
+        if engine is None:
+            engine = create_engine(connection_string, pool_pre_ping=True)
+            _ENGINES[connection_string] = engine
+        return engine
+
+def dispose_engines():
+    """Close all pooled connections, e.g. at shutdown or after forking"""
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
 
 class ProductDataLoader:
     """Handles all data loading operations with multiple source support"""
@@ -9,20 +41,50 @@ class ProductDataLoader:
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.supported_sources = ['csv', 'sql', 'api']
+        self.cache = None
+        if config.get('cache_dir'):
+            self.cache = ColumnarCache(
+                config['cache_dir'],
+                max_bytes=config.get('cache_max_bytes', CACHE_MAX_BYTES)
+            )
         
+    @instrumented('loader')
     def load_data(self, source_type='csv', **kwargs):
         """
         Main data loading method with source switching
         Args:
             source_type: Type of data source (csv/sql/api)
             kwargs: Source-specific parameters
+                (csv: pass stream=True and optionally chunksize to get typed chunks;
+                 sql: pass stream=True/chunksize for server-side cursor chunks, or
+                 partition_column with partitions/partition_bounds for concurrent
+                 range-partitioned reads)
         Returns:
-            Cleaned pandas DataFrame
+            Cleaned pandas DataFrame, or an iterator of DataFrame chunks when streaming
         """
         try:
             if source_type == 'csv':
+                if kwargs.get('stream') or kwargs.get('chunksize'):
+                    return self._stream_csv(
+                        kwargs.get('filepath'),
+                        kwargs.get('chunksize') or CSV_CHUNK_SIZE
+                    )
                 return self._load_csv(kwargs.get('filepath'))
             elif source_type == 'sql':
+                if kwargs.get('partition_column'):
+                    return self._load_sql_partitioned(
+                        kwargs.get('connection_string'),
+                        kwargs.get('query'),
+                        kwargs['partition_column'],
+                        partitions=kwargs.get('partitions', SQL_MAX_WORKERS),
+                        bounds=kwargs.get('partition_bounds')
+                    )
+                if kwargs.get('stream') or kwargs.get('chunksize'):
+                    return self._stream_sql(
+                        kwargs.get('connection_string'),
+                        kwargs.get('query'),
+                        kwargs.get('chunksize') or SQL_CHUNK_SIZE
+                    )
                 return self._load_sql(
                     kwargs.get('connection_string'),
                     kwargs.get('query')
@@ -39,23 +101,150 @@ class ProductDataLoader:
             raise
 
     def _load_csv(self, filepath):
-        """CSV-specific loader with automatic date parsing"""
+        """CSV-specific loader with automatic date parsing and optional columnar cache"""
+        cache_options = {'reader': 'csv', 'encoding': self.config.get('csv_encoding')}
+        if self.cache is not None:
+            df = self.cache.get(filepath, cache_options)
+            if df is not None:
+                self._validate_data(df)
+                return df
+
         df = pd.read_csv(
             filepath,
             parse_dates=['Manufacturing Date', 'Expiration Date'],
-            infer_datetime_format=True
+            encoding=cache_options['encoding']
         )
         self._validate_data(df)
+        if self.cache is not None:
+            self.cache.put(filepath, df, cache_options)
         return df
 
+    def _stream_csv(self, filepath, chunksize):
+        """Chunked CSV reader with compact dtypes - memory bounded by chunk size"""
+        dtypes = self.config.get('csv_dtypes', CSV_DTYPES)
+        reader = pd.read_csv(
+            filepath,
+            chunksize=chunksize,
+            dtype=dtypes,
+            parse_dates=DATE_COLUMNS,
+            date_format=DATE_FORMAT,
+            encoding=self.config.get('csv_encoding')
+        )
+        try:
+            with reader:
+                for chunk in reader:
+                    self._validate_data(chunk)
+                    yield chunk
+        except Exception as e:
+            self.logger.error(f"CSV streaming failed: {str(e)}")
+            raise
+
+    @staticmethod
+    def concat_chunks(chunks):
+        """Combine streamed chunks while keeping categorical columns categorical"""
+        chunks = list(chunks)
+        if not chunks:
+            return pd.DataFrame()
+        for col in chunks[0].columns:
+            if all(isinstance(c[col].dtype, pd.CategoricalDtype) for c in chunks):
+                merged = union_categoricals([c[col] for c in chunks]).categories
+                for c in chunks:
+                    c[col] = c[col].cat.set_categories(merged)
+        return pd.concat(chunks, ignore_index=True)
+
     def _load_sql(self, connection_string, query):
         """Database loader with connection pooling"""
-        engine = create_engine(connection_string)
+        engine = get_engine(connection_string)
         with engine.connect() as conn:
             df = pd.read_sql(query, conn)
         self._validate_data(df)
         return df
 
+    def _stream_sql(self, connection_string, query, chunksize):
+        """Chunked database reader using a server-side cursor where the driver supports it"""
+        engine = get_engine(connection_string)
+        try:
+            with engine.connect() as conn:
+                conn = conn.execution_options(stream_results=True)
+                for chunk in pd.read_sql(query, conn, chunksize=chunksize):
+                    self._validate_data(chunk)
+                    yield chunk
+        except Exception as e:
+            self.logger.error(f"SQL streaming failed: {str(e)}")
+            raise
+
+    def _load_sql_partitioned(self, connection_string, query, column, partitions=SQL_MAX_WORKERS, bounds=None):
+        """Split query into key ranges on column and fetch the ranges (and NULL keys) concurrently"""
+        engine = get_engine(connection_string)
+        col = engine.dialect.identifier_preparer.quote(column)
+        if bounds is None:
+            bounds = self._partition_bounds(engine, query, col, partitions)
+        if len(bounds) < 2:
+            return self._load_sql(connection_string, query)
+
+        def fetch(i):
+            if i == len(bounds) - 1:  # rows with a NULL key fall outside every range
+                sql, params = text(f"SELECT * FROM ({query}) AS q WHERE {col} IS NULL"), {}
+            else:
+                upper = '<=' if i == len(bounds) - 2 else '<'
+                sql = text(f"SELECT * FROM ({query}) AS q WHERE {col} >= :lo AND {col} {upper} :hi")
+                params = {'lo': bounds[i], 'hi': bounds[i + 1]}
+            with engine.connect() as conn:
+                return pd.read_sql(sql, conn, params=params)
+
+        workers = min(len(bounds), self.config.get('sql_max_workers', SQL_MAX_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(fetch, range(len(bounds))))
+        self.logger.info(f"Fetched {len(parts)} partitions on {column}")
+        df = pd.concat([p for p in parts if len(p)] or parts[:1], ignore_index=True)
+        self._validate_data(df)
+        return df
+
+    @staticmethod
+    def _partition_bounds(engine, query, col, partitions):
+        """Evenly spaced boundaries between MIN and MAX of a numeric, decimal or date column"""
+        with engine.connect() as conn:
+            lo, hi = conn.execute(text(f"SELECT MIN({col}), MAX({col}) FROM ({query}) AS q")).one()
+        if lo is None or lo == hi:
+            return [lo, hi] if lo is not None else []
+        if isinstance(lo, Decimal):  # NUMERIC/DECIMAL columns; the outer edges stay exact
+            bounds = [Decimal(str(b)) for b in np.linspace(float(lo), float(hi), partitions + 1)]
+            bounds[0], bounds[-1] = lo, hi
+            return sorted(set(bounds))
+        if isinstance(lo, (int, float, np.number)):
+            bounds = np.linspace(lo, hi, partitions + 1)
+            if isinstance(lo, (int, np.integer)):
+                bounds = np.unique(bounds.round().astype(int))
+            return bounds.tolist()
+        if not isinstance(lo, (str, datetime.date, np.datetime64)):
+            raise ValueError(
+                f"Cannot derive partition bounds for {col} values of type {type(lo).__name__}; "
+                "pass partition_bounds explicitly"
+            )
+        # Dates (native or stored as text): split the time range, keep the column's representation
+        as_text = isinstance(lo, str)
+        edges = pd.date_range(pd.Timestamp(lo), pd.Timestamp(hi), periods=partitions + 1)
+        if as_text and pd.Timestamp(lo).strftime(DATE_FORMAT) == lo:
+            edges = edges.normalize().unique()
+            bounds = [e.strftime(DATE_FORMAT) for e in edges]
+            bounds[0], bounds[-1] = lo, hi
+            return bounds
+        bounds = [str(e) if as_text else e.to_pydatetime() for e in edges]
+        bounds[0], bounds[-1] = lo, hi
+        return bounds
+
+    def _load_api(self, endpoint, params):
+        """Paginated API loader fetching pages concurrently over keep-alive connections"""
+        fetcher = PaginatedAPIFetcher(
+            concurrency=self.config.get('api_concurrency', API_CONCURRENCY),
+            max_retries=self.config.get('api_max_retries', API_MAX_RETRIES),
+            page_param=self.config.get('api_page_param', 'page'),
+            records_key=self.config.get('api_records_key', 'data')
+        )
+        df = fetcher.fetch(endpoint, params)
+        self._validate_data(df)
+        return df
+
     def _validate_data(self, df):
         """Data quality checks"""
         required_columns = ['Product ID', 'Product Name', 'Price', 'Stock Quantity']
@@ -1,5 +1,7 @@
 import numpy as np
+import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
+from monitoring.metrics import instrumented
 
 class ProductFeatureEngineer(BaseEstimator, TransformerMixin):
     """Feature engineering pipeline with scikit-learn compatibility"""
@@ -11,6 +13,7 @@ class ProductFeatureEngineer(BaseEstimator, TransformerMixin):
     def fit(self, X, y=None):
         return self
     
+    @instrumented('feature_engineering')
     def transform(self, X):
         X = X.copy()
         
@@ -26,7 +29,7 @@ class ProductFeatureEngineer(BaseEstimator, TransformerMixin):
     
     def _extract_dimensions(self, X):
         """Parse product dimensions into numerical features"""
-        dims = X['Product Dimensions'].str.split('x', expand=True)
+        dims = X['Product Dimensions'].str.replace(r'\s*cm$', '', regex=True).str.split('x', expand=True)
         X[['Length_cm', 'Width_cm', 'Height_cm']] = dims.astype(float)
         X['Volume_cm3'] = X['Length_cm'] * X['Width_cm'] * X['Height_cm']
         X['Size_Category'] = pd.cut(
@@ -0,0 +1,136 @@
+import logging
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# column -> (separator, term kind per position, or one kind for every part)
+TERM_COLUMNS = {
+    'Product Tags': (',', 'tag'),
+    'Color/Size Variations': ('/', ('color', 'size')),
+}
+
+def _parse(values, separator, kinds):
+    """Multi-hot (rows x terms) matrix for one column, splitting each distinct value once"""
+    codes, uniques = pd.factorize(values)  # unsorted: terms are ordered once for the whole index
+    categories = pd.Series(np.asarray(uniques, dtype=object)).astype(str)
+    parts = categories.str.split(separator, expand=True) if len(categories) else pd.DataFrame()
+    if isinstance(kinds, str):
+        prefixes = [f'{kinds}:'] * parts.shape[1]
+    else:
+        parts = parts.iloc[:, :len(kinds)]
+        prefixes = [f'{kind}:' for kind in kinds[:parts.shape[1]]]
+    parts = parts.apply(lambda c: c.str.strip())
+    parts.columns = prefixes
+    long = parts.melt(ignore_index=False, var_name='prefix', value_name='part')
+    long = long[long['part'].notna() & (long['part'] != '')]
+    term_codes, vocabulary = pd.factorize(long['prefix'] + long['part'])
+    by_category = sp.csr_matrix(
+        (np.ones(len(term_codes), dtype=np.float32), (long.index.to_numpy(), term_codes)),
+        shape=(len(categories), len(vocabulary))
+    )
+    present = codes >= 0  # missing values select no terms
+    by_row = sp.csr_matrix(
+        (np.ones(present.sum(), dtype=np.float32), (np.flatnonzero(present), codes[present])),
+        shape=(len(codes), len(categories))
+    )
+    return by_row @ by_category, list(vocabulary)
+
+def _members(values, sorted_array):
+    """Mask of values present in sorted_array (binary search, no sort of values)"""
+    if not len(sorted_array):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_array, values), len(sorted_array) - 1)
+    return sorted_array[positions] == values
+
+class ProductTagIndex:
+    """Inverted index and sparse multi-hot encoding of tags and color/size variations
+
+    Product Tags ("VNU,NZ6") and Color/Size Variations ("Green/Large") are
+    parsed once, each distinct string only once, into terms such as
+    'tag:VNU', 'color:Green' and 'size:Large'. The same data serves as a CSR
+    multi-hot matrix (rows x terms, for clustering features) and, through
+    its CSC transpose, as sorted posting lists of row positions per term, so
+    a filter costs the length of the postings involved instead of a string
+    scan over the frame.
+    """
+
+    def __init__(self, data, columns=TERM_COLUMNS):
+        self.logger = logging.getLogger(__name__)
+        self.n_rows = len(data)
+        blocks, terms = [], []
+        for column, (separator, kinds) in columns.items():
+            if column not in data.columns:
+                continue
+            matrix, vocabulary = _parse(data[column].to_numpy(dtype=object), separator, kinds)
+            blocks.append(matrix)
+            terms += vocabulary
+        matrix = sp.hstack(blocks, format='csr') if blocks else sp.csr_matrix((self.n_rows, 0), dtype=np.float32)
+
+        # columns in term order, so prefix searches are a binary search
+        order = np.argsort(np.asarray(terms, dtype=object), kind='stable') if terms else np.empty(0, dtype=int)
+        self.terms = np.asarray(terms, dtype=object)[order]
+        self.matrix = matrix[:, order].tocsr()
+        self.matrix.sum_duplicates()
+        self.matrix.data[:] = 1.0  # repeated tags within a row still count once
+        postings = self.matrix.tocsc()
+        postings.sort_indices()
+        self._indptr, self._rows = postings.indptr, postings.indices
+        self._columns = {term: j for j, term in enumerate(self.terms)}
+        self.logger.info(f"Indexed {len(self.terms)} terms over {self.n_rows} rows")
+
+    def __contains__(self, term):
+        return term in self._columns
+
+    def rows(self, term):
+        """Sorted row positions carrying term (empty for unknown terms)"""
+        j = self._columns.get(term)
+        if j is None:
+            return np.empty(0, dtype=self._rows.dtype)
+        return self._rows[self._indptr[j]:self._indptr[j + 1]]
+
+    def _union(self, terms):
+        postings = [self.rows(t) for t in terms]
+        if len(postings) == 1:
+            return postings[0]
+        return np.unique(np.concatenate(postings)) if postings else np.empty(0, dtype=self._rows.dtype)
+
+    def filter(self, all_of=(), any_of=(), none_of=()):
+        """Sorted row positions with every term in all_of, at least one of any_of and none of none_of"""
+        if all_of:
+            # start from the shortest posting list and binary-search the others
+            postings = sorted((self.rows(t) for t in all_of), key=len)
+            result = postings[0]
+            for p in postings[1:]:
+                result = result[_members(result, p)]
+            if any_of:
+                result = result[_members(result, self._union(any_of))]
+        elif any_of:
+            result = self._union(any_of)
+        else:
+            result = np.arange(self.n_rows)
+        if none_of:
+            result = result[~_members(result, self._union(none_of))]
+        return result
+
+    def mask(self, all_of=(), any_of=(), none_of=()):
+        """Boolean row mask of filter()"""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.filter(all_of, any_of, none_of)] = True
+        return mask
+
+    def counts(self):
+        """Rows per term"""
+        return pd.Series(np.diff(self._indptr), index=pd.Index(self.terms, name='term'), name='rows')
+
+    def search(self, prefix, limit=None):
+        """Terms starting with prefix, e.g. 'tag:VN' or 'color:'"""
+        lo = np.searchsorted(self.terms, prefix, side='left')
+        hi = np.searchsorted(self.terms, prefix + '\U0010ffff', side='left')
+        return list(self.terms[lo:hi if limit is None else min(hi, lo + limit)])
+
+    def features(self, kinds=('tag', 'color', 'size'), min_rows=1):
+        """(CSR multi-hot matrix, term names) restricted to kinds and terms on at least min_rows rows"""
+        keep = np.flatnonzero(
+            np.isin([t.split(':', 1)[0] for t in self.terms], list(kinds)) & (np.diff(self._indptr) >= min_rows)
+        )
+        return self.matrix[:, keep], list(self.terms[keep])
@@ -2,7 +2,8 @@ import logging
 from data_processing.data_loader import ProductDataLoader
 from data_processing.feature_engineering import ProductFeatureEngineer
 from analytics.product_analysis import ComprehensiveProductAnalyzer
-from visualization.interactive_plots import ProductVisualizationDashboard
+from config.constants import COLUMNAR_CACHE_DIR, METRICS_REPORT_PATH, METRICS_PROMETHEUS_PATH, AGGREGATE_STORE_DIR
+from monitoring.metrics import METRICS
 
 def configure_logging():
     """Set up comprehensive logging"""
@@ -19,11 +20,15 @@ def main():
     # Configuration
     configure_logging()
     logger = logging.getLogger(__name__)
+    METRICS.enabled = True
     
     try:
         # Data Loading
         logger.info("Loading product data...")
-        loader = ProductDataLoader(config={'csv_encoding': 'utf-8'})
+        loader = ProductDataLoader(config={
+            'csv_encoding': 'utf-8',
+            'cache_dir': COLUMNAR_CACHE_DIR
+        })
         raw_data = loader.load_data(source_type='csv', filepath='products.csv')
         
         # Feature Engineering
@@ -38,12 +43,22 @@ def main():
         logger.info("Performing product analysis...")
         analyzer = ComprehensiveProductAnalyzer(processed_data)
         analysis_results = analyzer.run_full_analysis()
+
+        # Run report (per-stage time, memory, throughput)
+        METRICS.write_json(METRICS_REPORT_PATH)
+        METRICS.write_prometheus(METRICS_PROMETHEUS_PATH)
+        logger.info(f"Stage metrics written to {METRICS_REPORT_PATH} and {METRICS_PROMETHEUS_PATH}")
         
         # Visualization
         logger.info("Launching dashboard...")
+        from visualization.aggregate_store import DashboardAggregateStore
+        from visualization.interactive_plots import ProductVisualizationDashboard  # pulls in dash/plotly
+        aggregates = DashboardAggregateStore(AGGREGATE_STORE_DIR)
+        aggregates.refresh(processed_data, analysis_results['cluster_labels'])
         dashboard = ProductVisualizationDashboard(
             processed_data,
-            cluster_labels=analysis_results['cluster_labels']
+            cluster_labels=analysis_results['cluster_labels'],
+            aggregate_store=aggregates
         )
         dashboard.run(debug=False)
         
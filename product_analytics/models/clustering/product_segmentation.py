@@ -1,63 +1,206 @@
  
-from sklearn.cluster import KMeans, DBSCAN, OPTICS
+import glob
+import logging
+import os
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN, OPTICS, cluster_optics_xi
 from sklearn.mixture import GaussianMixture
 from sklearn.metrics import silhouette_score
+from sklearn.model_selection import ParameterGrid
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+from joblib import Parallel, delayed
 import numpy as np
+import scipy.sparse as sp
+from config.constants import SILHOUETTE_SAMPLE_SIZE, MINIBATCH_THRESHOLD
+from models.predictive_models.model_store import data_hash
+from monitoring.metrics import instrumented
+
+def _evaluate_k(data, k, silhouette_sample_size, use_minibatch, random_state):
+    """Fit one KMeans and one GMM for k and score both"""
+    if use_minibatch:
+        kmeans = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=3)
+    else:
+        kmeans = KMeans(n_clusters=k, random_state=random_state)
+    labels = kmeans.fit_predict(data)
+    sample_size = silhouette_sample_size if silhouette_sample_size and data.shape[0] > silhouette_sample_size else None
+    silhouette = silhouette_score(data, labels, sample_size=sample_size, random_state=random_state)
+
+    if sp.issparse(data):  # GaussianMixture needs dense input
+        return kmeans.inertia_, silhouette, np.nan
+    gmm = GaussianMixture(n_components=k, random_state=random_state)
+    gmm.fit(data)
+    return kmeans.inertia_, silhouette, gmm.bic(data)
+
+def _pad_graph(graph, min_neighbors, max_eps):
+    """Give every row at least min_neighbors stored entries for OPTICS
+
+    OPTICS reads core distances from the min_samples nearest stored entries,
+    so rows with fewer neighbors inside the graph radius get filler entries
+    beyond max_eps - their core distance becomes infinite, exactly as when
+    OPTICS searches the raw data, and radius queries at max_eps ignore them.
+    """
+    counts = np.diff(graph.indptr)
+    short = np.flatnonzero(counts < min_neighbors)
+    if not len(short):
+        return graph
+    # among the first 2 * min_neighbors columns a short row misses at least min_neighbors
+    width = min(graph.shape[1], 2 * min_neighbors)
+    present = np.zeros((len(short), width), dtype=bool)
+    short_pos = np.full(graph.shape[0], -1)
+    short_pos[short] = np.arange(len(short))
+    row_pos = np.repeat(short_pos, counts)
+    cols = graph.indices
+    keep = (row_pos >= 0) & (cols < width)
+    present[row_pos[keep], cols[keep]] = True
+    free = np.argsort(present, axis=1, kind='stable')[:, :min_neighbors]
+    take = np.arange(free.shape[1]) < (min_neighbors - counts[short])[:, None]
+    coo = graph.tocoo()
+    # built from COO parts: sparse addition would drop the explicit zero self-distances
+    rows = np.concatenate([coo.row, np.broadcast_to(short[:, None], free.shape)[take]])
+    cols = np.concatenate([coo.col, free[take]])
+    dists = np.concatenate([coo.data, np.full(int(take.sum()), 2 * max_eps + 1.0)])
+    order = np.lexsort((dists, rows))
+    return sp.csr_matrix((dists[order], (rows[order], cols[order])), shape=graph.shape)
 
 class ProductClusterAnalyzer:
     """Advanced clustering for product segmentation"""
     
-    def __init__(self, data, n_clusters_range=(2, 10)):
+    def __init__(self, data, n_clusters_range=(2, 10), graph_dir=None, sparse_features=None):
+        """
+        Args:
+            graph_dir: directory persisting neighbors graphs across analyzers
+                (None keeps them in memory only, see neighbors_graph)
+            sparse_features: optional sparse matrix with one row per row of data,
+                e.g. ProductTagIndex.features(); appended unscaled to the scaled
+                columns of data, and scaled_data then stays a CSR matrix
+                (the GMM scores and method are unavailable on sparse input)
+        """
         self.data = data
         self.n_clusters_range = n_clusters_range
         self.scaler = StandardScaler()
         self.scaled_data = self.scaler.fit_transform(data)
+        if sparse_features is not None:
+            self.scaled_data = sp.hstack([sp.csr_matrix(self.scaled_data), sparse_features], format='csr')
+        self.graph_dir = graph_dir
+        self._graph = None  # (radius, csr matrix) of the widest neighbors graph loaded so far
+        self._data_key = None
+        self.logger = logging.getLogger(__name__)
         
-    def find_optimal_clusters(self):
-        """Determine best number of clusters using multiple methods"""
-        results = {}
-        
-        # Elbow method
-        distortions = []
-        for k in range(*self.n_clusters_range):
-            kmeans = KMeans(n_clusters=k)
-            kmeans.fit(self.scaled_data)
-            distortions.append(kmeans.inertia_)
-        results['elbow'] = distortions
-        
-        # Silhouette analysis
-        silhouette_scores = []
-        for k in range(*self.n_clusters_range):
-            kmeans = KMeans(n_clusters=k)
-            labels = kmeans.fit_predict(self.scaled_data)
-            silhouette_scores.append(silhouette_score(self.scaled_data, labels))
-        results['silhouette'] = silhouette_scores
-        
-        # Bayesian Information Criterion for GMM
-        bic_scores = []
-        for k in range(*self.n_clusters_range):
-            gmm = GaussianMixture(n_components=k)
-            gmm.fit(self.scaled_data)
-            bic_scores.append(gmm.bic(self.scaled_data))
-        results['bic'] = bic_scores
-        
-        return results
+    @instrumented('clustering.find_optimal_clusters', rows=lambda result, self, *a, **k: self.scaled_data.shape[0])
+    def find_optimal_clusters(self, n_jobs=-1, silhouette_sample_size=SILHOUETTE_SAMPLE_SIZE,
+                              minibatch_threshold=MINIBATCH_THRESHOLD, random_state=None):
+        """Determine best number of clusters using multiple methods
+
+        Each k is fitted once (inertia and silhouette share the KMeans fit) and
+        candidate k values run in parallel over n_jobs processes. Silhouette is
+        estimated on a sample of silhouette_sample_size rows (None for exact),
+        and inputs above minibatch_threshold rows use MiniBatchKMeans.
+        """
+        ks = range(*self.n_clusters_range)
+        use_minibatch = minibatch_threshold is not None and self.scaled_data.shape[0] > minibatch_threshold
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluate_k)(self.scaled_data, k, silhouette_sample_size, use_minibatch, random_state)
+            for k in ks
+        )
+        return {
+            'elbow': [s[0] for s in scores],
+            'silhouette': [s[1] for s in scores],
+            'bic': [s[2] for s in scores]
+        }
         
+    def neighbors_graph(self, radius):
+        """Sparse radius-neighbors distance graph of scaled_data covering `radius`
+
+        Built once and reused for any radius up to the one it was built at:
+        DBSCAN and OPTICS with metric='precomputed' only look at entries
+        within their own eps/max_eps. With a graph_dir the graph is also saved
+        there, keyed by a hash of scaled_data, so later analyzers on the same
+        data skip the neighbor search as well; saving a wider graph deletes the
+        narrower ones it covers.
+        """
+        if self._graph is not None and self._graph[0] >= radius:
+            return self._graph[1]
+        if self._data_key is None:
+            self._data_key = data_hash(self.scaled_data)
+
+        graph = None
+        if self.graph_dir:
+            cached = []
+            for path in glob.glob(os.path.join(self.graph_dir, f'{self._data_key}-*.npz')):
+                try:
+                    cached.append((float(os.path.basename(path)[len(self._data_key) + 1:-4]), path))
+                except ValueError:
+                    continue
+            wide_enough = sorted(c for c in cached if c[0] >= radius)
+            if wide_enough:
+                radius, path = wide_enough[0]
+                graph = sp.load_npz(path).tocsr()
+                self.logger.info(f"Loaded neighbors graph (radius {radius:g}) from {path}")
+
+        if graph is None:
+            nn = NearestNeighbors(radius=radius).fit(self.scaled_data)
+            # querying with the data itself keeps each point as its own zero-distance neighbor
+            graph = nn.radius_neighbors_graph(self.scaled_data, mode='distance', sort_results=True).tocsr()
+            self.logger.info(f"Built neighbors graph (radius {radius:g}) with {graph.nnz} edges")
+            if self.graph_dir:
+                os.makedirs(self.graph_dir, exist_ok=True)
+                path = os.path.join(self.graph_dir, f'{self._data_key}-{radius!r}.npz')
+                tmp = f'{path}.tmp'
+                with open(tmp, 'wb') as f:
+                    sp.save_npz(f, graph)
+                os.replace(tmp, path)
+                for old_radius, old_path in cached:
+                    if old_radius < radius:
+                        try:
+                            os.remove(old_path)
+                        except FileNotFoundError:
+                            pass
+
+        self._graph = (radius, graph)
+        return graph
+
+    def _optics_input(self, min_samples, max_eps):
+        """Padded shared graph when max_eps bounds the search, else the raw data"""
+        if not np.isfinite(max_eps):
+            return self.scaled_data
+        return _pad_graph(self.neighbors_graph(max_eps), min_samples, max_eps)
+
+    @instrumented('clustering.cluster_products')
     def cluster_products(self, method='kmeans', **kwargs):
-        """Apply selected clustering algorithm"""
+        """Apply selected clustering algorithm
+
+        optics with a finite max_eps runs on the shared neighbors graph (see
+        neighbors_graph) instead of the raw data. So does dbscan when the
+        graph is worth building for one fit: with a graph_dir, which keeps it
+        for later analyzers, or when a graph covering eps is already loaded
+        (e.g. by sweep_density_clusters); otherwise DBSCAN searches the data.
+        """
+        X = self.scaled_data
         if method == 'kmeans':
-            model = KMeans(n_clusters=kwargs.get('n_clusters', 4))
+            model = KMeans(n_clusters=kwargs.get('n_clusters', 4), random_state=kwargs.get('random_state'))
         elif method == 'dbscan':
+            eps = kwargs.get('eps', 0.5)
+            precomputed = self.graph_dir or (self._graph is not None and self._graph[0] >= eps)
             model = DBSCAN(
-                eps=kwargs.get('eps', 0.5),
-                min_samples=kwargs.get('min_samples', 5)
+                eps=eps,
+                min_samples=kwargs.get('min_samples', 5),
+                metric='precomputed' if precomputed else 'euclidean'
             )
+            if precomputed:
+                X = self.neighbors_graph(eps)
         elif method == 'optics':
+            min_samples = kwargs.get('min_samples', 5)
+            max_eps = kwargs.get('max_eps', np.inf)
             model = OPTICS(
-                min_samples=kwargs.get('min_samples', 5),
-                xi=kwargs.get('xi', 0.05)
+                min_samples=min_samples,
+                xi=kwargs.get('xi', 0.05),
+                max_eps=max_eps,
+                metric='precomputed' if np.isfinite(max_eps) else 'minkowski'
             )
+            X = self._optics_input(min_samples, max_eps)
         elif method == 'gmm':
+            if sp.issparse(X):
+                raise ValueError("GaussianMixture needs dense features; drop sparse_features")
             model = GaussianMixture(
                 n_components=kwargs.get('n_components', 4),
                 covariance_type=kwargs.get('covariance_type', 'full')
@@ -65,8 +208,50 @@ class ProductClusterAnalyzer:
         else:
             raise ValueError("Unsupported clustering method")
             
-        labels = model.fit_predict(self.scaled_data)
+        labels = model.fit_predict(X)
+        self.model = model  # kept so new rows can be assigned with predict()
         return labels
+
+    @instrumented('clustering.sweep_density_clusters', rows=lambda result, self, *a, **k: self.scaled_data.shape[0])
+    def sweep_density_clusters(self, method, param_grid):
+        """Labels for every setting in param_grid, as a list of (params, labels)
+
+        param_grid is a dict of lists, as for sklearn's ParameterGrid.
+        dbscan takes eps and min_samples; one neighbors graph at the largest
+        eps serves the whole grid. optics takes min_samples, xi and max_eps;
+        OPTICS runs once per (min_samples, max_eps) and every xi is extracted
+        from that reachability ordering.
+        """
+        grid = list(ParameterGrid(param_grid))
+        results = []
+        if method == 'dbscan':
+            graph = self.neighbors_graph(max(p.get('eps', 0.5) for p in grid))
+            for params in grid:
+                model = DBSCAN(eps=params.get('eps', 0.5), min_samples=params.get('min_samples', 5),
+                               metric='precomputed')
+                results.append((params, model.fit_predict(graph)))
+        elif method == 'optics':
+            finite = [p['max_eps'] for p in grid if np.isfinite(p.get('max_eps', np.inf))]
+            if finite:
+                self.neighbors_graph(max(finite))
+            fitted = {}
+            for params in grid:
+                min_samples, max_eps = params.get('min_samples', 5), params.get('max_eps', np.inf)
+                model = fitted.get((min_samples, max_eps))
+                if model is None:
+                    model = OPTICS(min_samples=min_samples, max_eps=max_eps,
+                                   metric='precomputed' if np.isfinite(max_eps) else 'minkowski')
+                    model.fit(self._optics_input(min_samples, max_eps))
+                    fitted[(min_samples, max_eps)] = model
+                labels, _ = cluster_optics_xi(
+                    reachability=model.reachability_, predecessor=model.predecessor_,
+                    ordering=model.ordering_, min_samples=min_samples, xi=params.get('xi', 0.05)
+                )
+                results.append((params, labels))
+        else:
+            raise ValueError("Parameter sweeps support dbscan and optics")
+        self.logger.info(f"Swept {len(grid)} {method} settings")
+        return results
         
     def analyze_clusters(self, labels):
         """Statistical analysis of each cluster"""
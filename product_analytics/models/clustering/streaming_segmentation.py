@@ -0,0 +1,175 @@
+import logging
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+from config.constants import OUT_OF_CORE_EPOCHS
+
+# Columns summarised per cluster, as in ProductClusterAnalyzer.analyze_clusters
+STATS_AGGREGATIONS = {
+    'Price': ['mean', 'std', 'min', 'max'],
+    'Stock Quantity': ['mean', 'sum'],
+    'Product Ratings': ['mean', 'count']
+}
+
+class ClusterStatsAccumulator:
+    """Per-cluster count/sum/sum of squares/min/max, updated chunk by chunk"""
+
+    def __init__(self, aggregations=STATS_AGGREGATIONS):
+        self.aggregations = aggregations
+        self.totals = {}  # column -> {cluster: [count, sum, sumsq, min, max]}
+
+    def update(self, labels, chunk):
+        for column in self.aggregations:
+            if column not in chunk.columns:
+                continue
+            values = pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            valid = ~np.isnan(values)
+            frame = pd.DataFrame({'label': labels[valid], 'value': values[valid]})
+            grouped = frame.groupby('label')['value']
+            partial = pd.DataFrame({
+                'count': grouped.size(), 'sum': grouped.sum(),
+                'sumsq': frame.assign(value=frame['value'] ** 2).groupby('label')['value'].sum(),
+                'min': grouped.min(), 'max': grouped.max()
+            })
+            totals = self.totals.setdefault(column, {})
+            for cluster, row in zip(partial.index, partial.to_numpy()):
+                current = totals.get(cluster)
+                if current is None:
+                    totals[cluster] = row.copy()
+                else:
+                    current[:3] += row[:3]
+                    current[3] = min(current[3], row[3])
+                    current[4] = max(current[4], row[4])
+
+    def result(self):
+        """Statistics in the analyze_clusters layout"""
+        out = {}
+        for column, aggs in self.aggregations.items():
+            if column not in self.totals:
+                continue
+            t = pd.DataFrame.from_dict(self.totals[column], orient='index',
+                                       columns=['count', 'sum', 'sumsq', 'min', 'max']).sort_index()
+            n = t['count']
+            mean = t['sum'] / n
+            derived = {
+                'mean': mean,
+                'std': np.sqrt(((t['sumsq'] - t['sum'] * mean) / (n - 1)).clip(lower=0)).where(n > 1),
+                'min': t['min'], 'max': t['max'], 'sum': t['sum'], 'count': n.astype(int)
+            }
+            for agg in aggs:
+                out[(column, agg)] = derived[agg]
+        result = pd.DataFrame(out)
+        result.index.name = 'Cluster'
+        return result
+
+class StreamingClusterAnalyzer:
+    """Out-of-core product segmentation over chunks from the data loader
+
+    `chunks` is a callable returning a fresh iterator of DataFrame chunks,
+    e.g. lambda: loader.load_data('csv', filepath=path, stream=True), since
+    fitting takes several passes: one for StandardScaler.partial_fit, `epochs`
+    for MiniBatchKMeans.partial_fit and one to write labels to a memory-mapped
+    array while accumulating cluster statistics. Missing values are imputed
+    with the running mean. Memory use is bounded by the chunk size.
+    """
+
+    def __init__(self, chunks, features=('Price', 'Stock Quantity', 'Product Ratings'), n_clusters=4,
+                 epochs=OUT_OF_CORE_EPOCHS, transform=None, random_state=None):
+        self.chunks = chunks
+        self.features = list(features)
+        self.n_clusters = n_clusters
+        self.epochs = epochs
+        self.transform = transform
+        self.random_state = random_state
+        self.scaler = StandardScaler()
+        self.model = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3)
+        self.n_rows = 0
+        self.stats = None
+        self._temp_labels = None
+        self.logger = logging.getLogger(__name__)
+
+    def _iter_chunks(self):
+        for chunk in self.chunks():
+            yield self.transform(chunk) if self.transform else chunk
+
+    def _matrix(self, chunk):
+        return chunk[self.features].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def _scaled(self, chunk):
+        return np.nan_to_num(self.scaler.transform(self._matrix(chunk)), nan=0.0)
+
+    def fit(self):
+        """Fit the scaler, then MiniBatchKMeans over `epochs` passes of the chunks"""
+        self.n_rows = 0
+        for chunk in self._iter_chunks():
+            self.scaler.partial_fit(self._matrix(chunk))  # NaNs are ignored by the scaler
+            self.n_rows += len(chunk)
+
+        pending = None  # chunks smaller than n_clusters are carried into the next batch
+        for epoch in range(self.epochs):
+            for chunk in self._iter_chunks():
+                batch = self._scaled(chunk)
+                if pending is not None:
+                    batch, pending = np.vstack([pending, batch]), None
+                if len(batch) < self.n_clusters:
+                    pending = batch
+                    continue
+                self.model.partial_fit(batch)
+        if pending is not None and hasattr(self.model, 'cluster_centers_'):
+            self.model.partial_fit(pending)
+        self.logger.info(f"Fitted {self.n_clusters} clusters on {self.n_rows} rows over {self.epochs} epochs")
+        return self
+
+    def cluster_products(self, labels_path=None):
+        """Fit, then label every row into a memory-mapped int32 array (one chunk at a time)
+
+        Without labels_path the labels go to a temporary file that close()
+        (or leaving the analyzer's with block) deletes.
+        """
+        self.fit()
+        self.close()
+        if labels_path is None:
+            fd, labels_path = tempfile.mkstemp(suffix='.labels')
+            os.close(fd)
+            self._temp_labels = labels_path
+        try:
+            labels = np.memmap(labels_path, dtype=np.int32, mode='w+', shape=(self.n_rows,))
+            accumulator = ClusterStatsAccumulator()
+            offset = 0
+            for chunk in self._iter_chunks():
+                chunk_labels = self.model.predict(self._scaled(chunk)).astype(np.int32)
+                labels[offset:offset + len(chunk)] = chunk_labels
+                accumulator.update(chunk_labels, chunk)
+                offset += len(chunk)
+            labels.flush()
+        except Exception:
+            self.close()
+            raise
+        self.labels_path = labels_path
+        self.stats = accumulator.result()
+        return labels
+
+    def close(self):
+        """Delete the temporary labels file, if cluster_products created one"""
+        if self._temp_labels is not None:
+            try:
+                os.remove(self._temp_labels)
+            except FileNotFoundError:
+                pass
+            self._temp_labels = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def analyze_clusters(self):
+        """Per-cluster statistics accumulated while labelling"""
+        if self.stats is None:
+            raise RuntimeError("Call cluster_products() first")
+        return self.stats
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from config.constants import MODEL_STORE_DIR, MODEL_STORE_KEEP_VERSIONS
+
+def data_hash(*arrays):
+    """Stable content hash of feature matrices / targets (arrays, sparse matrices or pandas objects)"""
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        if isinstance(a, (pd.DataFrame, pd.Series)):
+            h.update(repr(list(a.columns) if isinstance(a, pd.DataFrame) else a.name).encode())
+            h.update(pd.util.hash_pandas_object(a, index=False).to_numpy().tobytes())
+        elif sp.issparse(a):
+            a = a.tocsr()
+            a.sum_duplicates()
+            h.update(repr(('csr', a.shape, str(a.dtype))).encode())
+            for part in (a.data, a.indices, a.indptr):
+                h.update(np.ascontiguousarray(part).tobytes())
+        else:
+            a = np.ascontiguousarray(a)
+            h.update(repr((a.shape, str(a.dtype))).encode())
+            h.update(a.tobytes())
+    return h.hexdigest()
+
+def params_hash(*params):
+    """Hash of estimator settings (get_params() dicts or plain values)"""
+    raw = json.dumps(params, sort_keys=True, default=repr)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+class ModelStore:
+    """Versioned on-disk store for trained model artifacts
+
+    Artifacts live under <root>/<name>/<key>/v<N>/ with a meta.json next to the
+    joblib payload. Saving the same key again creates a new version; only the
+    newest keep_versions are retained.
+    """
+
+    def __init__(self, root=MODEL_STORE_DIR, keep_versions=MODEL_STORE_KEEP_VERSIONS):
+        self.root = root
+        self.keep_versions = keep_versions
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(root, exist_ok=True)
+
+    def _versions(self, name, key):
+        path = os.path.join(self.root, name, key)
+        if not os.path.isdir(path):
+            return []
+        return sorted(int(v[1:]) for v in os.listdir(path) if v.startswith('v') and v[1:].isdigit())
+
+    def save(self, name, key, obj, meta=None):
+        """Persist obj as the next version of (name, key); returns the version"""
+        versions = self._versions(name, key)
+        version = versions[-1] + 1 if versions else 1
+        base = os.path.join(self.root, name, key)
+        os.makedirs(base, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=base, prefix='.tmp-')
+        joblib.dump(obj, os.path.join(tmp, 'model.joblib'))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(dict(meta or {}, version=version, saved_at=time.time()), f, default=str)
+        os.rename(tmp, os.path.join(base, f'v{version}'))
+        for old in versions[:max(0, len(versions) + 1 - self.keep_versions)]:
+            shutil.rmtree(os.path.join(base, f'v{old}'), ignore_errors=True)
+        return version
+
+    def load(self, name, key, version=None):
+        """(obj, meta) for the requested or latest version, or (None, None)"""
+        versions = self._versions(name, key)
+        if not versions:
+            return None, None
+        version = version or versions[-1]
+        path = os.path.join(self.root, name, key, f'v{version}')
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        return joblib.load(os.path.join(path, 'model.joblib'), mmap_mode='r'), meta
@@ -1,10 +1,39 @@
-import optuna
-from sklearn.model_selection import cross_val_score
-from sklearn.ensemble import StackingRegressor
+import logging
+import os
+import time
+import joblib
+from joblib import Parallel, delayed
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import KFold, cross_val_predict
 from sklearn.linear_model import RidgeCV
-import xgboost as xgb
-import lightgbm as lgb
-import catboost as cb
+from models.predictive_models.model_store import data_hash, params_hash
+from config.constants import XGB_EARLY_STOPPING_ROUNDS, SHAP_BACKGROUND_SIZE, SHAP_BATCH_SIZE
+from monitoring.metrics import instrumented
+
+def _training_rows(result, self, *args, **kwargs):
+    return len(self.X)
+
+def _shap_batch(explainer, X):
+    return explainer.shap_values(X, check_additivity=False)
+
+class StackedEnsemble:
+    """Fitted stack: base models feed their predictions to a final estimator
+
+    Equivalent to a fitted StackingRegressor (passthrough=False), but built
+    from cached out-of-fold predictions.
+    """
+
+    def __init__(self, estimators, final_estimator):
+        self.estimators_ = estimators
+        self.named_estimators_ = dict(estimators)
+        self.final_estimator_ = final_estimator
+
+    def transform(self, X):
+        return np.column_stack([est.predict(X) for _, est in self.estimators_])
+
+    def predict(self, X):
+        return self.final_estimator_.predict(self.transform(X))
 
 class RatingPredictorOptimizer:
     """Advanced rating prediction with hyperparameter optimization"""
@@ -14,58 +43,186 @@ class RatingPredictorOptimizer:
         self.y = y
         self.study = None
         self.best_model = None
+        self._fold_cache = {}
+        self._oof_cache = {}
+        self.timings = {}
+        self.logger = logging.getLogger(__name__)
         
-    def optimize_xgb(self, n_trials=100):
-        """Bayesian optimization for XGBoost"""
+    @instrumented('rating.optimize_xgb', rows=_training_rows)
+    def optimize_xgb(self, n_trials=100, n_jobs=1, storage=None, study_name='xgb-rating',
+                     n_folds=5, early_stopping_rounds=XGB_EARLY_STOPPING_ROUNDS, pruner=None):
+        """Bayesian optimization for XGBoost
+
+        Trials report their running CV error after every fold so the pruner can
+        stop hopeless configurations early, and each fold's booster stops once
+        the validation error stops improving. Fold matrices are built once and
+        shared by all trials. With storage (e.g. 'sqlite:///optuna.db') the study
+        is persisted: re-running resumes it, and other processes can join it by
+        calling optimize_xgb with the same storage and study_name. n_trials is
+        the total the study should reach, including trials already stored.
+        """
+        import optuna
+        import xgboost as xgb
+
+        folds = self._xgb_folds(n_folds)
+        threads = max(1, (os.cpu_count() or 1) // max(1, n_jobs))
+
         def objective(trial):
             params = {
-                'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
                 'max_depth': trial.suggest_int('max_depth', 3, 10),
-                'learning_rate': trial.suggest_loguniform('learning_rate', 0.01, 0.3),
-                'subsample': trial.suggest_uniform('subsample', 0.6, 1.0),
-                'colsample_bytree': trial.suggest_uniform('colsample_bytree', 0.6, 1.0),
-                'gamma': trial.suggest_loguniform('gamma', 1e-8, 1.0),
-                'reg_alpha': trial.suggest_loguniform('reg_alpha', 1e-8, 1.0),
-                'reg_lambda': trial.suggest_loguniform('reg_lambda', 1e-8, 1.0)
+                'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3, log=True),
+                'subsample': trial.suggest_float('subsample', 0.6, 1.0),
+                'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
+                'gamma': trial.suggest_float('gamma', 1e-8, 1.0, log=True),
+                'reg_alpha': trial.suggest_float('reg_alpha', 1e-8, 1.0, log=True),
+                'reg_lambda': trial.suggest_float('reg_lambda', 1e-8, 1.0, log=True)
             }
-            
-            model = xgb.XGBRegressor(**params)
-            return -cross_val_score(  # NEGATIVE MSE agar bisa diminimalkan
-                model, self.X, self.y,
-                scoring='neg_mean_squared_error',
-                cv=5
-            ).mean()
-            
-        self.study = optuna.create_study(direction='minimize')  # Ganti dari maximize ke minimize
-        self.study.optimize(objective, n_trials=n_trials)
-        
-        if self.study.best_params:  # Cek apakah best_params sudah ada
-            self.best_model = xgb.XGBRegressor(**self.study.best_params)
+            n_estimators = trial.suggest_int('n_estimators', 100, 1000)
+            train_params = dict(params, objective='reg:squarederror', eval_metric='rmse', nthread=threads)
+
+            fold_mse, best_rounds = [], []
+            for step, (dtrain, dvalid) in enumerate(folds):
+                booster = xgb.train(
+                    train_params, dtrain,
+                    num_boost_round=n_estimators,
+                    evals=[(dvalid, 'valid')],
+                    early_stopping_rounds=early_stopping_rounds,
+                    verbose_eval=False
+                )
+                fold_mse.append(booster.best_score ** 2)
+                best_rounds.append(booster.best_iteration + 1)
+                trial.report(float(np.mean(fold_mse)), step)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
+            trial.set_user_attr('best_n_estimators', int(np.mean(best_rounds)))
+            return float(np.mean(fold_mse))  # MSE diminimalkan
+
+        self.study = optuna.create_study(
+            direction='minimize',
+            storage=storage,
+            study_name=study_name if storage else None,
+            load_if_exists=bool(storage),
+            pruner=pruner or optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
+        )
+        finished = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+        remaining = n_trials - len(self.study.get_trials(deepcopy=False, states=finished))
+        if remaining > 0:
+            self.study.optimize(objective, n_trials=remaining, n_jobs=n_jobs)
+
+        completed = self.study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,))
+        if completed:
+            best = self.study.best_trial
+            params = dict(best.params)
+            # Train as many trees as early stopping found useful in CV
+            params['n_estimators'] = best.user_attrs.get('best_n_estimators', params['n_estimators'])
+            self.best_model = xgb.XGBRegressor(**params)
             self.best_model.fit(self.X, self.y)
         return self.best_model
+
+    def _xgb_folds(self, n_folds):
+        """(train, valid) DMatrix pairs for KFold CV, built once per fold count"""
+        import xgboost as xgb
+
+        if n_folds not in self._fold_cache:
+            X, y = np.asarray(self.X, dtype=np.float32), np.asarray(self.y, dtype=np.float32)
+            self._fold_cache[n_folds] = [
+                (xgb.DMatrix(X[train], label=y[train]), xgb.DMatrix(X[valid], label=y[valid]))
+                for train, valid in KFold(n_splits=n_folds).split(X)
+            ]
+        return self._fold_cache[n_folds]
         
-    def create_ensemble(self):
-        """Stacking ensemble of multiple models with optimized XGBoost"""
+    @instrumented('rating.create_ensemble', rows=_training_rows)
+    def create_ensemble(self, final_estimator=None, store=None, cv=5):
+        """Stacking ensemble of multiple models with optimized XGBoost
+
+        The base models' out-of-fold predictions are kept (in memory, and in
+        store when one is given) under a hash of X, y, cv and the base model
+        parameters, so changing only final_estimator refits just the final
+        estimator. With a ModelStore the fitted ensemble is also versioned on
+        disk and loaded on later calls instead of retrained. Training/load
+        times for the call are recorded in self.timings.
+        """
+        import xgboost as xgb
+        import lightgbm as lgb
+        import catboost as cb
+
         if self.best_model is None:
-            print("Warning: XGBoost belum dioptimasi, menggunakan default model.")
+            self.logger.warning("XGBoost has not been tuned; using a default model in the ensemble")
             self.best_model = xgb.XGBRegressor()
         
         estimators = [
             ('xgb', self.best_model),
-            ('lgb', lgb.LGBMRegressor()),  # Bisa ditambahkan optimasi
-            ('cat', cb.CatBoostRegressor(verbose=0))  # Bisa ditambahkan optimasi
+            ('lgb', lgb.LGBMRegressor(verbose=-1)),  # Bisa ditambahkan optimasi
+            ('cat', cb.CatBoostRegressor(verbose=0, allow_writing_files=False))  # Bisa ditambahkan optimasi
         ]
-        
-        self.ensemble = StackingRegressor(
-            estimators=estimators,
-            final_estimator=RidgeCV(),
-            cv=5
+        if final_estimator is None:
+            final_estimator = RidgeCV()
+
+        base_key = params_hash(
+            data_hash(self.X, self.y), cv,
+            {name: est.get_params() for name, est in estimators}
         )
-        self.ensemble.fit(self.X, self.y)
+        ensemble_key = params_hash(base_key, type(final_estimator).__name__, final_estimator.get_params())
+
+        if store is not None:
+            start = time.perf_counter()
+            ensemble, meta = store.load('ensemble', ensemble_key)
+            if ensemble is not None:
+                self.timings = {
+                    'source': 'store', 'load_s': time.perf_counter() - start,
+                    'train_s': meta.get('train_s'), 'version': meta.get('version')
+                }
+                self.logger.info(f"Loaded ensemble v{meta['version']} in {self.timings['load_s']:.3f}s "
+                                 f"(training took {meta.get('train_s', 0):.1f}s)")
+                self.ensemble = ensemble
+                return self.ensemble
+
+        start = time.perf_counter()
+        base_models, oof, source = self._stack_bases(estimators, base_key, cv, store)
+        bases_s = time.perf_counter() - start
+        final = clone(final_estimator).fit(oof, self.y)
+        self.ensemble = StackedEnsemble(base_models, final)
+        train_s = time.perf_counter() - start
+        self.timings = {'source': source, 'bases_s': bases_s, 'train_s': train_s}
+
+        if store is not None:
+            start = time.perf_counter()
+            self.timings['version'] = store.save('ensemble', ensemble_key, self.ensemble, meta={'train_s': train_s})
+            self.timings['save_s'] = time.perf_counter() - start
+        self.logger.info(f"Trained ensemble in {train_s:.1f}s (base models: {source}, {bases_s:.1f}s)")
         return self.ensemble
+
+    def _stack_bases(self, estimators, key, cv, store):
+        """Fitted base models and their out-of-fold predictions, reused when available"""
+        if key in self._oof_cache:
+            return self._oof_cache[key] + ('memory',)
+        if store is not None:
+            cached, _ = store.load('stack-bases', key)
+            if cached is not None:
+                self._oof_cache[key] = cached
+                return cached + ('store',)
+
+        oof = np.column_stack([
+            cross_val_predict(clone(est), self.X, self.y, cv=cv) for _, est in estimators
+        ])
+        base_models = [(name, clone(est).fit(self.X, self.y)) for name, est in estimators]
+        self._oof_cache[key] = (base_models, oof)
+        if store is not None:
+            store.save('stack-bases', key, (base_models, oof))
+        return base_models, oof, 'trained'
         
-    def explain_model(self, model=None):
-        """SHAP explanations for model interpretability"""
+    @instrumented('rating.explain_model', rows=_training_rows)
+    def explain_model(self, model=None, method='default', plot=True, background_size=SHAP_BACKGROUND_SIZE,
+                      batch_size=SHAP_BATCH_SIZE, n_jobs=1, store=None, random_state=0):
+        """SHAP explanations for model interpretability
+
+        method='tree' uses shap.TreeExplainer against a sampled background of
+        background_size rows (None: the faster tree-path-dependent algorithm,
+        no background) and computes the SHAP matrix in batches of
+        batch_size rows over n_jobs worker processes. With a ModelStore the
+        matrix is persisted under a hash of the model and data and served from
+        disk on later calls. plot=False skips the (blocking) summary plot.
+        """
         import shap
         if model is None:
             model = self.best_model
@@ -73,9 +230,43 @@ class RatingPredictorOptimizer:
         if model is None:
             raise ValueError("Tidak ada model yang bisa dijelaskan.")
 
-        explainer = shap.Explainer(model)
-        shap_values = explainer(self.X)
+        if method == 'tree':
+            shap_values = self._tree_shap(model, background_size, batch_size, n_jobs, store, random_state)
+        else:
+            explainer = shap.Explainer(model)
+            shap_values = explainer(self.X)
         
         # Visualization
-        shap.summary_plot(shap_values, self.X)
+        if plot:
+            shap.summary_plot(shap_values, self.X)
         return shap_values
+
+    def _tree_shap(self, model, background_size, batch_size, n_jobs, store, random_state):
+        """Batched, optionally persisted TreeExplainer SHAP values as a shap.Explanation"""
+        import shap
+
+        X = self.X
+        key = params_hash(joblib.hash(model), data_hash(X), background_size, random_state)
+        cached = store.load('shap', key)[0] if store is not None else None
+        if cached is not None:
+            values, base_value = cached
+        else:
+            if background_size:
+                background = shap.utils.sample(X, min(background_size, len(X)), random_state=random_state)
+                explainer = shap.TreeExplainer(model, data=background, feature_perturbation='interventional')
+            else:
+                explainer = shap.TreeExplainer(model, feature_perturbation='tree_path_dependent')
+            batches = [X[i:i + batch_size] for i in range(0, len(X), batch_size)]
+            values = np.vstack(Parallel(n_jobs=n_jobs)(
+                delayed(_shap_batch)(explainer, batch) for batch in batches
+            ))
+            base_value = float(np.ravel(explainer.expected_value)[0])
+            if store is not None:
+                store.save('shap', key, (values, base_value), meta={'rows': len(values)})
+
+        return shap.Explanation(
+            values=values,
+            base_values=np.full(len(values), base_value),
+            data=np.asarray(X),
+            feature_names=list(X.columns) if hasattr(X, 'columns') else None
+        )
@@ -0,0 +1,260 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROMETHEUS_PREFIX = 'product_analytics_stage'
+
+_current_stage = ContextVar('current_stage', default=None)
+
+def _rss_bytes():
+    """Current resident set size (Linux /proc, else the peak so far)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return _peak_rss_bytes()
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _count_rows(result):
+    """Row count of a stage result when it has one (frames, arrays, lists)"""
+    if hasattr(result, 'shape'):
+        return int(result.shape[0]) if result.shape else None
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return None
+
+class _NullStage:
+    """Stand-in yielded while instrumentation is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    """One timed stage; set .rows inside the block to get throughput (.record = False drops it)"""
+
+    def __init__(self, metrics, name, rows=None):
+        self.metrics = metrics
+        self.name = name
+        self.rows = rows
+        self.record = True
+
+    def __enter__(self):
+        self._parent = _current_stage.get()
+        self._token = _current_stage.set(self.name)
+        self._rss_start = _rss_bytes()
+        self._started = time.time()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        _current_stage.reset(self._token)
+        if not self.record:
+            return False
+        self.metrics.add(_record(
+            self.name, self._parent, 'ok' if exc_type is None else 'error',
+            self._started, wall, cpu, self._rss_start, self.rows
+        ))
+        return False
+
+def _record(name, parent, status, started, wall, cpu, rss_start, rows):
+    rss_end = _rss_bytes()
+    return {
+        'stage': name,
+        'parent': parent,
+        'status': status,
+        'started': started,
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'peak_rss_bytes': _peak_rss_bytes(),
+        'rss_delta_bytes': None if rss_end is None or rss_start is None else rss_end - rss_start,
+        'rows': rows,
+        'rows_per_s': rows / wall if rows is not None and wall > 0 else None,
+    }
+
+class StageMetrics:
+    """Collector for per-stage wall time, CPU time, memory and throughput
+
+    Stages are recorded with stage() (context manager) or instrument()
+    (decorator). While disabled both reduce to a single attribute check, so
+    the decorators can stay on hot entry points. CPU time is process-wide:
+    stages running concurrently in threads see each other's CPU. Peak RSS is
+    the process high-water mark at the end of the stage.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.records = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def stage(self, name, rows=None):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows)
+
+    def instrument(self, name, rows=None):
+        """Decorator recording every call as stage `name`
+
+        rows, if given, is called as rows(result, *args, **kwargs) to count the
+        rows processed; otherwise the result's length is used when it has one.
+        A call returning a generator (e.g. a streaming load) is recorded as it
+        is consumed instead, see stream().
+        """
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                parent = _current_stage.get()
+                with _Stage(self, name) as stage:
+                    result = func(*args, **kwargs)
+                    if inspect.isgenerator(result):
+                        stage.record = False  # creating the generator did none of the work
+                    else:
+                        stage.rows = rows(result, *args, **kwargs) if rows else _count_rows(result)
+                if inspect.isgenerator(result):
+                    return self.stream(name, result, parent)
+                return result
+            return wrapper
+        return decorate
+
+    def stream(self, name, items, parent=None):
+        """Wrap a generator so consuming it is recorded as stage `name`
+
+        Wall and CPU time cover only the work of producing the items, not what
+        the consumer does between them; rows add up the items' lengths. The
+        record is added when the generator is exhausted, fails or is closed.
+        """
+        started, rss_start = time.time(), _rss_bytes()
+        wall = cpu = 0.0
+        n_rows, status = 0, 'ok'
+        try:
+            while True:
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                finally:
+                    wall += time.perf_counter() - wall_start
+                    cpu += time.process_time() - cpu_start
+                n_rows += _count_rows(item) or 0
+                yield item
+        except GeneratorExit:  # consumer stopped early
+            items.close()
+            raise
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            self.add(_record(name, parent, status, started, wall, cpu, rss_start, n_rows))
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+        self.logger.debug(f"Stage {record['stage']} took {record['wall_s']:.3f}s")
+
+    def extend(self, records):
+        """Merge records collected elsewhere (e.g. in a worker process)"""
+        with self._lock:
+            self.records.extend(records)
+
+    def drain(self):
+        """Return and clear the collected records"""
+        with self._lock:
+            records, self.records = self.records, []
+        return records
+
+    def reset(self):
+        self.drain()
+
+    def summary(self):
+        """Per-stage totals: calls, wall/CPU seconds, rows, throughput and peak RSS"""
+        totals = {}
+        with self._lock:
+            records = list(self.records)
+        for r in records:
+            t = totals.setdefault(r['stage'], {
+                'calls': 0, 'errors': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'peak_rss_bytes': 0
+            })
+            t['calls'] += 1
+            t['errors'] += r['status'] != 'ok'
+            t['wall_s'] += r['wall_s']
+            t['cpu_s'] += r['cpu_s'] or 0.0
+            t['rows'] += r['rows'] or 0
+            t['peak_rss_bytes'] = max(t['peak_rss_bytes'], r['peak_rss_bytes'] or 0)
+        for t in totals.values():
+            t['rows_per_s'] = t['rows'] / t['wall_s'] if t['rows'] and t['wall_s'] else None
+        return totals
+
+    def report(self):
+        """JSON-serialisable run report"""
+        with self._lock:
+            records = list(self.records)
+        return {'pid': os.getpid(), 'created': time.time(), 'stages': records, 'summary': self.summary()}
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def prometheus_text(self):
+        """Per-stage totals in the Prometheus text exposition format"""
+        metrics = [
+            ('calls_total', 'counter', 'Recorded calls per pipeline stage', 'calls'),
+            ('errors_total', 'counter', 'Calls that raised per pipeline stage', 'errors'),
+            ('wall_seconds', 'gauge', 'Wall-clock time spent in the stage', 'wall_s'),
+            ('cpu_seconds', 'gauge', 'Process CPU time spent in the stage', 'cpu_s'),
+            ('rows', 'gauge', 'Rows processed by the stage', 'rows'),
+            ('rows_per_second', 'gauge', 'Stage throughput', 'rows_per_s'),
+            ('peak_rss_bytes', 'gauge', 'Process peak resident set size at stage end', 'peak_rss_bytes'),
+        ]
+        summary = self.summary()
+        lines = []
+        for suffix, kind, help_text, key in metrics:
+            name = f'{PROMETHEUS_PREFIX}_{suffix}'
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for stage, t in sorted(summary.items()):
+                if t[key] is not None:
+                    label = stage.replace('\\', '\\\\').replace('"', '\\"')
+                    lines.append(f'{name}{{stage="{label}"}} {t[key]:g}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write prometheus_text() atomically (for the node_exporter textfile collector)"""
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+# Process-wide collector; PRODUCT_ANALYTICS_METRICS=1 enables it at import
+METRICS = StageMetrics(enabled=os.environ.get('PRODUCT_ANALYTICS_METRICS') == '1')
+stage = METRICS.stage
+instrumented = METRICS.instrument
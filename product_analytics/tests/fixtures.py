@@ -0,0 +1,114 @@
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+
+def make_product_frame(n_rows, seed=0):
+    """Small synthetic product table with the columns the loaders validate"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Product ID': [f'P{i:07d}' for i in range(n_rows)],
+        'Product Name': rng.choice(['Laptop', 'Smartphone', 'Headphones'], n_rows),
+        'Product Category': rng.choice(['Electronics', 'Clothing'], n_rows),
+        'Price': rng.uniform(10, 500, n_rows).round(2),
+        'Stock Quantity': rng.integers(1, 100, n_rows),
+        'Manufacturing Date': rng.choice(['2023-01-01', '2023-03-15', '2023-06-01'], n_rows),
+        'Expiration Date': rng.choice(['2025-01-01', '2026-01-01'], n_rows),
+        'Color/Size Variations': rng.choice(['Red/Small', 'Blue/Large'], n_rows)
+    })
+
+def make_sqlite_products(path, n_rows, seed=0):
+    """Write a products table to a SQLite file and return its SQLAlchemy URL
+
+    Used by the loader tests and for measuring SQL read throughput locally.
+    """
+    df = make_product_frame(n_rows, seed=seed)
+    df.insert(0, 'row_id', np.arange(n_rows))
+    with sqlite3.connect(path) as conn:
+        df.to_sql('products', conn, index=False, if_exists='replace')
+    return f'sqlite:///{path}'
+
+class _BacklogHTTPServer(ThreadingHTTPServer):
+    request_queue_size = 128  # room for many concurrent keep-alive clients
+
+class PagedProductServer:
+    """Local stand-in for the product API, serving a DataFrame page by page
+
+    Runs a threaded HTTP/1.1 server (keep-alive) on localhost. `latency` adds
+    a per-page delay and `fail_every` answers every n-th request with a 503
+    to exercise retries.
+    """
+
+    def __init__(self, df, page_size=100, latency=0.0, fail_every=0, report_total=True):
+        self.df = df
+        self.page_size = page_size
+        self.latency = latency
+        self.fail_every = fail_every
+        self.report_total = report_total
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._bodies = {}
+
+    def __enter__(self):
+        handler = self._make_handler()
+        self.httpd = _BacklogHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/products'
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _page_body(self, page):
+        if page not in self._bodies:
+            start = (page - 1) * self.page_size
+            rows = self.df.iloc[start:start + self.page_size]
+            payload = {'data': json.loads(rows.to_json(orient='records'))}
+            if self.report_total:
+                payload['total_pages'] = self.total_pages
+            self._bodies[page] = json.dumps(payload).encode()
+        return self._bodies[page]
+
+    @property
+    def total_pages(self):
+        return -(-len(self.df) // self.page_size)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    n = server.requests
+                    server.connections.add(self.client_address)
+                if server.latency:
+                    time.sleep(server.latency)
+                if server.fail_every and n % server.fail_every == 0:
+                    self._send(503, b'{}')
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                self._send(200, server._page_body(int(query.get('page', ['1'])[0])))
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -1,7 +1,14 @@
+import os
+import tempfile
 import unittest
+from types import ModuleType
+from unittest import mock
 import pandas as pd
 import numpy as np
-from analytics.time_series import ProductDemandForecaster
+from analytics.time_series import ProductDemandForecaster, _fit_product
+from analytics.forecast_store import ForecastStore
+from analytics.series_store import ProductSeriesStore
+from analytics.baseline_forecast import BaselineForecaster
 
 class TestTimeSeriesAnalysis(unittest.TestCase):
     @classmethod
@@ -34,3 +41,253 @@ class TestTimeSeriesAnalysis(unittest.TestCase):
         self.assertTrue(hasattr(results, 'forecast'))
         
     # Additional test cases...
+
+class TestBulkForecasting(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Weekly history for a few products"""
+        dates = pd.date_range(start='2020-01-01', periods=60, freq='W')
+        cls.test_data = pd.DataFrame({
+            'Manufacturing Date': np.tile(dates, 3),
+            'Product Name': np.repeat(['Laptop', 'Smartphone', 'Headphones'], 60),
+            'Stock Quantity': np.random.randint(50, 200, size=180)
+        })
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = ForecastStore(os.path.join(self.tmpdir.name, 'forecasts.sqlite'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_fit_all_only_refits_changed_products(self):
+        forecaster = ProductDemandForecaster(self.test_data.copy(), store=self.store)
+        summary = forecaster.fit_all(n_workers=2, horizon=4)
+        self.assertEqual(sorted(summary['fitted']), ['Headphones', 'Laptop', 'Smartphone'])
+
+        changed = self.test_data.copy()
+        changed.loc[changed['Product Name'] == 'Laptop', 'Stock Quantity'] += 1
+        forecaster = ProductDemandForecaster(changed, store=self.store)
+        summary = forecaster.fit_all(n_workers=2, horizon=4)
+        self.assertEqual(summary['fitted'], ['Laptop'])
+        self.assertEqual(sorted(summary['skipped']), ['Headphones', 'Smartphone'])
+
+    def test_failures_are_isolated(self):
+        forecaster = ProductDemandForecaster(self.test_data.copy(), store=self.store)
+        forecaster.ts_data['Broken'] = np.nan
+        summary = forecaster.fit_all(n_workers=2, horizon=4)
+        self.assertEqual(summary['failed'], ['Broken'])
+        forecasts = forecaster.store.forecasts('arima')
+        self.assertEqual(sorted(forecasts['product'].unique()), ['Headphones', 'Laptop', 'Smartphone'])
+        self.assertEqual(len(forecasts), 12)
+
+    def test_forecast_dates_follow_the_series_frequency(self):
+        forecaster = ProductDemandForecaster(self.test_data.copy(), store=self.store)
+        forecaster.fit_all(n_workers=1, horizon=3, products=['Laptop'])
+        dates = forecaster.store.forecasts('arima')['date']
+        self.assertEqual(dates.iloc[0], self.test_data['Manufacturing Date'].max() + pd.Timedelta(weeks=1))
+        self.assertTrue((dates.diff().dropna() == pd.Timedelta(weeks=1)).all())
+
+        irregular = self.test_data[self.test_data['Product Name'] == 'Laptop'].iloc[[0, 1, 5, 6, 20, 40, 59]]
+        forecaster = ProductDemandForecaster(irregular.assign(**{'Product Name': 'Irregular'}), store=self.store)
+        forecaster.fit_all(n_workers=1, horizon=3, order=(0, 0, 0))
+        forecasts = forecaster.store.forecasts('arima', ['Irregular'])
+        self.assertEqual(forecasts['step'].tolist(), [1, 2, 3])
+        self.assertTrue(forecasts['date'].isna().all())
+
+    def test_prophet_forecasts_at_the_forecaster_frequency(self):
+        future_freqs = []
+
+        class StubProphet:
+            params = {}
+
+            def __init__(self, **kwargs):
+                pass
+
+            def fit(self, df):
+                self.last = df['ds'].iloc[-1]
+
+            def make_future_dataframe(self, periods, freq, include_history):
+                future_freqs.append(freq)
+                return pd.DataFrame({'ds': pd.date_range(self.last, periods=periods + 1, freq=freq)[1:]})
+
+            def predict(self, future):
+                return pd.DataFrame({'yhat': np.zeros(len(future))})
+
+        series = ProductSeriesStore(self.test_data).series('Laptop')
+        with mock.patch.dict('sys.modules', {'prophet': ModuleType('prophet')}) as modules:
+            modules['prophet'].Prophet = StubProphet
+            weekly = _fit_product('Laptop', series.index.to_numpy(), series.to_numpy(), 'prophet', {}, 3, 'W')
+            irregular = _fit_product('Laptop', series.index.to_numpy(), series.to_numpy(), 'prophet', {}, 3, None)
+        self.assertEqual(future_freqs, ['W', 'D'])
+        self.assertEqual((weekly['status'], weekly['freq']), ('ok', 'W'))
+        self.assertEqual(irregular['freq'], 'D')
+
+class TestSeriesStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Irregular dates per product, with repeated (product, date) rows and gaps"""
+        rng = np.random.default_rng(0)
+        dates = pd.date_range(start='2023-01-01', periods=120, freq='D')
+        cls.test_data = pd.DataFrame({
+            'Manufacturing Date': rng.choice(dates, 400).astype(str),
+            'Product Name': rng.choice(['Laptop', 'Monitor', 'Smartphone'], 400),
+            'Stock Quantity': rng.integers(1, 100, 400).astype(float)
+        })
+        cls.test_data.loc[::50, 'Stock Quantity'] = np.nan
+
+    def test_matches_grouped_series(self):
+        data = self.test_data.copy()
+        store = ProductSeriesStore(data)
+        pd.testing.assert_frame_equal(data, self.test_data)  # caller's frame untouched
+
+        grouped = self.test_data.assign(Date=pd.to_datetime(self.test_data['Manufacturing Date'])) \
+            .groupby(['Date', 'Product Name'])['Stock Quantity'].sum().unstack()
+        self.assertEqual(list(store.products), list(grouped.columns))
+        for product in grouped.columns:
+            pd.testing.assert_series_equal(
+                store[product], grouped[product].dropna(), check_names=False, check_freq=False
+            )
+
+    def test_resample(self):
+        store = ProductSeriesStore(self.test_data)
+        weekly = store.resample('Laptop')
+        expected = store.series('Laptop').resample('W').sum()
+        pd.testing.assert_series_equal(weekly, expected)
+        self.assertIs(store.series('Laptop', freq='W'), weekly)  # cached
+        self.assertEqual(weekly.sum(), store.series('Laptop').sum())
+
+    def test_replace_and_add_products(self):
+        store = ProductSeriesStore(self.test_data)
+        laptop = store.series('Laptop') + 1
+        store['Laptop'] = laptop
+        store['Broken'] = np.nan
+        pd.testing.assert_series_equal(store['Laptop'], laptop)
+        self.assertEqual(len(store['Broken']), 0)
+        self.assertEqual(sorted(store), ['Broken', 'Laptop', 'Monitor', 'Smartphone'])
+        self.assertEqual(store.offsets[-1], len(store.values))
+
+    def test_repeated_updates_reuse_capacity(self):
+        store = ProductSeriesStore(self.test_data)
+        laptop = store.series('Laptop')
+        expected = {product: store.series(product) for product in store}
+        reallocations, buffer = 0, store.values
+        for i in range(300):
+            product = f'P{i % 60}'
+            expected[product] = laptop * i
+            store[product] = expected[product]
+            if not np.shares_memory(store._values, buffer):
+                reallocations, buffer = reallocations + 1, store._values
+        self.assertLess(reallocations, 20)
+
+        self.assertEqual(list(store), list(expected))
+        self.assertEqual(store.offsets[-1], len(store.values))
+        for position, (product, series) in enumerate(expected.items()):
+            pd.testing.assert_series_equal(store[product], series, check_names=False, check_freq=False)
+            start, end = store.offsets[position], store.offsets[position + 1]
+            np.testing.assert_array_equal(store.values[start:end], series.to_numpy())
+
+class TestBaselineForecasting(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """A smooth daily series and an intermittent one"""
+        rng = np.random.default_rng(0)
+        dates = pd.date_range(start='2023-01-01', periods=60, freq='D')
+        cls.smooth = rng.integers(50, 100, 60).astype(float)
+        cls.sparse = np.where(rng.random(60) < 0.3, rng.integers(1, 10, 60), 0).astype(float)
+        cls.sparse[0] = 4.0
+        cls.test_data = pd.DataFrame({
+            'Manufacturing Date': np.concatenate([dates, dates[cls.sparse > 0]]),
+            'Product Name': ['Laptop'] * 60 + ['Monitor'] * int((cls.sparse > 0).sum()),
+            'Stock Quantity': np.concatenate([cls.smooth, cls.sparse[cls.sparse > 0]])
+        })
+
+    def test_recursions(self):
+        baseline = BaselineForecaster(ProductSeriesStore(self.test_data), alphas=[0.3], betas=[0.1]).fit()
+        y = self.smooth
+        level = y[0]
+        for value in y[1:]:
+            level += 0.3 * (value - level)
+        self.assertAlmostEqual(baseline.fits['ses']['level'][0], level)
+
+        level, trend = y[1], y[1] - y[0]
+        for value in y[2:]:
+            error = value - (level + trend)
+            level, trend = level + trend + 0.3 * error, trend + 0.03 * error
+        self.assertAlmostEqual(baseline.fits['holt']['level'][0], level)
+        self.assertAlmostEqual(baseline.fits['holt']['trend'][0], trend)
+
+        size, interval, since = None, None, 1
+        for value in self.sparse:
+            if value > 0:
+                if size is None:
+                    size, interval = value, since
+                else:
+                    size, interval = size + 0.3 * (value - size), interval + 0.3 * (since - interval)
+                since = 1
+            else:
+                since += 1
+        croston = baseline.fits['croston']
+        self.assertAlmostEqual(croston['level'][1] / croston['interval'][1], size / interval)
+
+    def test_selection_and_forecast(self):
+        store = ProductSeriesStore(self.test_data)
+        store['Broken'] = np.nan
+        baseline = BaselineForecaster(store).fit()
+        summary = baseline.summary()
+        self.assertEqual(summary.loc['Monitor', 'method'], 'croston')
+        self.assertIn(summary.loc['Laptop', 'method'], ('ses', 'holt'))
+
+        forecasts = baseline.forecast(horizon=7)
+        self.assertEqual(forecasts.shape, (3, 7))
+        self.assertTrue(np.isnan(forecasts[2]).all())
+        self.assertFalse(np.isnan(forecasts[:2]).any())
+
+        scores = baseline.backtest(holdout=10)
+        self.assertEqual(list(scores.columns), ['method', 'mae', 'rmse', 'mape'])
+        self.assertTrue((scores.loc[['Laptop', 'Monitor'], 'mae'] > 0).all())
+
+    def test_batched_evaluation(self):
+        forecaster = ProductDemandForecaster(self.test_data)
+        rng = np.random.default_rng(1)
+        actual, predicted = rng.uniform(1, 10, (4, 12)), rng.uniform(1, 10, (4, 12))
+        batched = forecaster.evaluate_model(actual, predicted)
+        for i in range(4):
+            single = forecaster.evaluate_model(actual[i], predicted[i])
+            self.assertAlmostEqual(batched['mae'][i], single['mae'])
+            self.assertAlmostEqual(batched['mape'][i], single['mape'])
+        self.assertAlmostEqual(single['mae'], np.mean(np.abs(actual[3] - predicted[3])))
+
+    def test_fallback_for_failed_fits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ForecastStore(os.path.join(tmp, 'forecasts.sqlite'))
+            forecaster = ProductDemandForecaster(self.test_data, store=store)
+            forecaster.ts_data['Broken'] = pd.Series([5.0], index=pd.DatetimeIndex(['2023-01-01']))
+            forecasts = forecaster.forecast_all('arima', fallback=True, n_workers=2, horizon=4)
+            models = forecasts.groupby('product')['model'].first()
+            self.assertEqual(models.to_dict(), {'Broken': 'baseline', 'Laptop': 'arima', 'Monitor': 'arima'})
+            np.testing.assert_allclose(forecasts.loc[forecasts['product'] == 'Broken', 'forecast'], 5.0)
+
+            summary = forecaster.fit_all(model='baseline', horizon=4)
+            self.assertEqual(sorted(summary['fitted']), ['Broken', 'Laptop', 'Monitor'])
+            with self.assertRaisesRegex(ValueError, "does not accept \\['order'\\]"):
+                forecaster.fit_all(model='baseline', horizon=4, order=(1, 1, 1))
+            store.close()
+
+    def test_triage_limits_expensive_fits(self):
+        dates = pd.date_range(start='2020-01-01', periods=60, freq='W')
+        rng = np.random.default_rng(2)
+        data = pd.DataFrame({
+            'Manufacturing Date': np.tile(dates, 2),
+            'Product Name': np.repeat(['Steady', 'Erratic'], 60),
+            'Stock Quantity': np.concatenate([rng.integers(50, 55, 60), rng.choice([10, 500], 60)])
+        })
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ForecastStore(os.path.join(tmp, 'forecasts.sqlite'))
+            forecaster = ProductDemandForecaster(data, store=store, freq='W')
+            forecasts = forecaster.forecast_all('arima', triage=True, n_workers=1, horizon=4)
+            models = forecasts.groupby('product')['model'].first()
+            self.assertEqual(models.to_dict(), {'Erratic': 'arima', 'Steady': 'baseline'})
+            self.assertEqual(len(forecasts), 8)
+            store.close()
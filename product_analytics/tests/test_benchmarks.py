@@ -0,0 +1,39 @@
+import os
+import unittest
+import pandas as pd
+from benchmarks.suite import compare
+from benchmarks.synthetic import COLUMNS, make_catalog
+
+DATA_CSV = os.path.join(os.path.dirname(__file__), '..', '..', 'data.csv')
+
+class TestSyntheticCatalog(unittest.TestCase):
+    def test_schema_and_unique_ids(self):
+        df = make_catalog(20_000, seed=3)
+        self.assertEqual(list(df.columns), COLUMNS)
+        self.assertTrue(df['Product ID'].is_unique)
+        self.assertTrue(df['Product Dimensions'].str.fullmatch(r'\d+x\d+x\d+ cm').all())
+        self.assertTrue(df['Price'].between(10, 500).all())
+        pd.testing.assert_frame_equal(make_catalog(20_000, seed=3), df)
+        chunk = make_catalog(100, seed=4, start=20_000)
+        self.assertFalse(chunk['Product ID'].isin(df['Product ID']).any())
+
+    @unittest.skipUnless(os.path.exists(DATA_CSV), 'data.csv not available')
+    def test_matches_data_csv_header(self):
+        self.assertEqual(list(pd.read_csv(DATA_CSV, nrows=1).columns), COLUMNS)
+
+class TestBaselineComparison(unittest.TestCase):
+    def _report(self, wall_s, peak_rss_mb, status='ok'):
+        return {'results': [{'case': 'loader', 'size': 1000, 'status': status,
+                             'wall_s': wall_s, 'peak_rss_mb': peak_rss_mb}]}
+
+    def test_flags_slowdowns_beyond_threshold_and_noise_floor(self):
+        baseline = self._report(1.0, 500)
+        self.assertEqual(compare(self._report(1.1, 510), baseline), [])
+        regressions = compare(self._report(1.5, 800), baseline)
+        self.assertEqual({r['metric'] for r in regressions}, {'wall_s', 'peak_rss_mb'})
+        # relative jumps on tiny timings are noise
+        self.assertEqual(compare(self._report(0.03, 500), self._report(0.01, 500)), [])
+        self.assertEqual(compare(self._report(9.0, 500, status='error'), baseline), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+from sklearn.cluster import DBSCAN, OPTICS
+from sklearn.metrics import adjusted_rand_score
+from data_processing.data_loader import ProductDataLoader
+from models.clustering.product_segmentation import ProductClusterAnalyzer
+from models.clustering.streaming_segmentation import StreamingClusterAnalyzer
+
+class TestProductClustering(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Three well separated product groups"""
+        rng = np.random.default_rng(0)
+        centers = np.array([[50, 10, 1], [250, 60, 3], [450, 90, 5]])
+        cls.test_data = pd.DataFrame(
+            np.vstack([c + rng.normal(0, [10, 3, 0.2], size=(100, 3)) for c in centers]),
+            columns=['Price', 'Stock Quantity', 'Product Ratings']
+        )
+
+    def test_find_optimal_clusters(self):
+        analyzer = ProductClusterAnalyzer(self.test_data, n_clusters_range=(2, 6))
+        results = analyzer.find_optimal_clusters(n_jobs=2, random_state=0)
+        for key in ('elbow', 'silhouette', 'bic'):
+            self.assertEqual(len(results[key]), 4)
+        self.assertEqual(int(np.argmax(results['silhouette'])) + 2, 3)
+
+    def test_sampled_silhouette_and_minibatch(self):
+        analyzer = ProductClusterAnalyzer(self.test_data, n_clusters_range=(2, 5))
+        results = analyzer.find_optimal_clusters(
+            n_jobs=1, silhouette_sample_size=100, minibatch_threshold=10, random_state=0
+        )
+        self.assertEqual(int(np.argmax(results['silhouette'])) + 2, 3)
+
+class TestDensityClustering(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Three blobs, scattered noise and a few duplicated rows"""
+        rng = np.random.default_rng(2)
+        points = np.vstack([rng.normal(c, 0.3, (150, 2)) for c in (0, 3, 6)] + [rng.uniform(-2, 8, (30, 2))])
+        cls.data = pd.DataFrame(np.vstack([points, points[:5]]), columns=['Price', 'Stock Quantity'])
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _analyzer(self):
+        return ProductClusterAnalyzer(self.data.copy(), graph_dir=self.tmp.name)
+
+    def test_graph_matches_dense_results(self):
+        analyzer = self._analyzer()
+        analyzer.neighbors_graph(1.0)
+        for eps in (0.2, 0.5):
+            expected = DBSCAN(eps=eps, min_samples=5).fit_predict(analyzer.scaled_data)
+            np.testing.assert_array_equal(analyzer.cluster_products('dbscan', eps=eps, min_samples=5), expected)
+
+        expected = OPTICS(min_samples=10, max_eps=0.8).fit(analyzer.scaled_data)
+        labels = analyzer.cluster_products('optics', min_samples=10, max_eps=0.8)
+        np.testing.assert_array_equal(labels, expected.labels_)
+        np.testing.assert_allclose(analyzer.model.reachability_, expected.reachability_)
+
+    def test_graph_cached_on_disk(self):
+        graph = self._analyzer().neighbors_graph(0.8)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+
+        other = self._analyzer()
+        reused = other.neighbors_graph(0.5)  # a smaller radius reuses the cached graph
+        self.assertEqual(other._graph[0], 0.8)
+        self.assertEqual((graph != reused).nnz, 0)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+
+        other.neighbors_graph(1.2)  # the wider graph replaces the one it covers
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+        self.assertTrue(os.listdir(self.tmp.name)[0].endswith('-1.2.npz'))
+
+    def test_graph_kept_in_memory_by_default(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            analyzer = ProductClusterAnalyzer(self.data.copy())
+            analyzer.sweep_density_clusters('dbscan', {'eps': [0.3, 0.5]})
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+        self.assertEqual(analyzer._graph[0], 0.5)
+
+    def test_single_dbscan_fit_skips_graph(self):
+        analyzer = ProductClusterAnalyzer(self.data.copy())
+        expected = DBSCAN(eps=0.4, min_samples=5).fit_predict(analyzer.scaled_data)
+        with mock.patch.object(analyzer, 'neighbors_graph', wraps=analyzer.neighbors_graph) as graph:
+            np.testing.assert_array_equal(analyzer.cluster_products('dbscan', eps=0.4, min_samples=5), expected)
+            graph.assert_not_called()
+
+            analyzer.neighbors_graph(0.5)  # a loaded graph that covers eps is reused
+            np.testing.assert_array_equal(analyzer.cluster_products('dbscan', eps=0.4, min_samples=5), expected)
+        self.assertEqual(analyzer.model.metric, 'precomputed')
+
+    def test_parameter_sweep(self):
+        analyzer = self._analyzer()
+        sweep = analyzer.sweep_density_clusters('dbscan', {'eps': [0.2, 0.4], 'min_samples': [3, 8]})
+        self.assertEqual(len(sweep), 4)
+        for params, labels in sweep:
+            np.testing.assert_array_equal(labels, DBSCAN(**params).fit_predict(analyzer.scaled_data))
+
+        sweep = analyzer.sweep_density_clusters('optics', {'min_samples': [10], 'xi': [0.05, 0.1], 'max_eps': [1.0]})
+        for params, labels in sweep:
+            np.testing.assert_array_equal(labels, OPTICS(**params).fit_predict(analyzer.scaled_data))
+        with self.assertRaises(ValueError):
+            analyzer.sweep_density_clusters('kmeans', {'n_clusters': [2]})
+
+class TestStreamingClustering(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(1)
+        centers = np.array([[50, 10, 1], [250, 60, 3], [450, 90, 5]])
+        cls.truth = np.repeat(np.arange(3), 200)
+        cls.data = pd.DataFrame(
+            np.vstack([c + rng.normal(0, [10, 3, 0.2], size=(200, 3)) for c in centers]),
+            columns=['Price', 'Stock Quantity', 'Product Ratings']
+        ).sample(frac=1, random_state=0)
+        cls.truth = cls.truth[cls.data.index]
+        cls.data = cls.data.reset_index(drop=True)
+        cls.data['Stock Quantity'] = cls.data['Stock Quantity'].round().astype(int)
+        cls.data.loc[::17, 'Product Ratings'] = np.nan
+
+    def _chunks(self, size=64):
+        return lambda: (self.data.iloc[i:i + size] for i in range(0, len(self.data), size))
+
+    def test_labels_and_streamed_statistics(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = StreamingClusterAnalyzer(self._chunks(), n_clusters=3, random_state=0)
+            labels = analyzer.cluster_products(os.path.join(tmp, 'labels.int32'))
+            self.assertIsInstance(labels, np.memmap)
+            self.assertEqual(len(labels), len(self.data))
+            self.assertGreater(adjusted_rand_score(self.truth, labels), 0.95)
+
+            expected = self.data.assign(Cluster=np.asarray(labels, dtype=np.int64)).groupby('Cluster').agg({
+                'Price': ['mean', 'std', 'min', 'max'],
+                'Stock Quantity': ['mean', 'sum'],
+                'Product Ratings': ['mean', 'count']
+            })
+            pd.testing.assert_frame_equal(analyzer.analyze_clusters(), expected, check_dtype=False)
+            del labels
+
+    def test_streams_from_loader(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'products.csv')
+            self.data.assign(**{
+                'Product ID': range(len(self.data)), 'Product Name': 'Laptop',
+                'Manufacturing Date': '2023-01-01', 'Expiration Date': '2025-01-01'
+            }).to_csv(path, index=False)
+            loader = ProductDataLoader({})
+            analyzer = StreamingClusterAnalyzer(
+                lambda: loader.load_data(source_type='csv', filepath=path, chunksize=100),
+                n_clusters=3, random_state=0
+            )
+            labels = analyzer.cluster_products(os.path.join(tmp, 'labels.int32'))
+            self.assertEqual(analyzer.n_rows, len(self.data))
+            self.assertGreater(adjusted_rand_score(self.truth, labels), 0.95)
+            del labels
+
+    def test_temporary_labels_are_deleted(self):
+        with StreamingClusterAnalyzer(self._chunks(), n_clusters=3, random_state=0) as analyzer:
+            labels = np.array(analyzer.cluster_products())
+            first = analyzer.labels_path
+            self.assertTrue(os.path.exists(first))
+            analyzer.cluster_products()
+            self.assertFalse(os.path.exists(first))  # replaced by the second run's file
+        self.assertFalse(os.path.exists(analyzer.labels_path))
+        self.assertEqual(len(labels), len(self.data))
@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from tests.fixtures import make_product_frame
+from visualization.interactive_plots import ProductVisualizationDashboard
+from visualization.downsampling import lttb
+
+class TestProductIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        data = make_product_frame(200)
+        cls.data = data.assign(**{'Manufacturing Date': pd.to_datetime(data['Manufacturing Date'])})
+
+    def setUp(self):
+        self.dashboard = ProductVisualizationDashboard(self.data)
+
+    def test_positions_are_date_ordered_per_product(self):
+        index = self.dashboard.product_index
+        self.assertEqual(set(index), set(self.data['Product Name']))
+        self.assertEqual(sorted(np.concatenate(list(index.values()))), list(range(len(self.data))))
+        for product, positions in index.items():
+            rows = self.data.iloc[positions]
+            self.assertTrue((rows['Product Name'] == product).all())
+            self.assertTrue(rows['Manufacturing Date'].is_monotonic_increasing)
+
+    def test_repeated_requests_hit_the_figure_cache(self):
+        first = self.dashboard._time_series_figure('Laptop', ('Price',))
+        again = self.dashboard._time_series_figure('Laptop', ('Price',))
+        self.dashboard._time_series_figure('Laptop', ('Price', 'Stock Quantity'))
+        self.assertIs(again, first)
+        self.assertEqual(self.dashboard.cache_stats(), {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 256})
+
+        response = self.dashboard.app.server.test_client().get('/cache-stats')
+        self.assertEqual(response.get_json()['hits'], 1)
+
+        self.dashboard._build_product_index()
+        self.assertEqual(self.dashboard.cache_stats()['size'], 0)
+        self.assertIsNot(self.dashboard._time_series_figure('Laptop', ('Price',)), first)
+
+class TestDownsampling(unittest.TestCase):
+    def test_lttb_keeps_endpoints_and_budget(self):
+        rng = np.random.default_rng(0)
+        x = np.arange(1000)
+        y = np.cumsum(rng.normal(size=1000))
+        y[500] = 100  # a spike LTTB must not smooth away
+        keep = lttb(x, y, 50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertTrue((np.diff(keep) > 0).all())
+        self.assertIn(500, keep)
+
+    def test_short_input_passes_through(self):
+        np.testing.assert_array_equal(lttb(np.arange(10), np.arange(10.0), 50), np.arange(10))
+        np.testing.assert_array_equal(lttb(np.arange(10), np.arange(10.0), 10), np.arange(10))
+
+    def test_dashboard_downsamples_and_switches_to_webgl(self):
+        n_points = 3000
+        data = pd.DataFrame({
+            'Product Name': 'Laptop',
+            'Manufacturing Date': pd.date_range('2020-01-01', periods=n_points, freq='h'),
+            'Price': np.sin(np.arange(n_points) / 50),
+            'Stock Quantity': np.arange(n_points)
+        })
+        dashboard = ProductVisualizationDashboard(data, max_points=500, webgl_threshold=1000)
+        trace = dashboard._build_time_series_figure('Laptop', ('Price',)).data[0]
+        self.assertIsInstance(trace, go.Scatter)
+        self.assertEqual(len(trace.y), 500)
+        self.assertEqual(pd.Timestamp(trace.x[0]), data['Manufacturing Date'].iloc[0])
+        self.assertEqual(pd.Timestamp(trace.x[-1]), data['Manufacturing Date'].iloc[-1])
+
+        full = ProductVisualizationDashboard(data, max_points=None, webgl_threshold=1000)
+        trace = full._build_time_series_figure('Laptop', ('Price',)).data[0]
+        self.assertIsInstance(trace, go.Scattergl)
+        self.assertEqual(len(trace.y), n_points)
+        self.assertIs(full._trace_class(1000), go.Scatter)
+        self.assertIs(full._trace_class(1001), go.Scattergl)
+
+if __name__ == '__main__':
+    unittest.main()
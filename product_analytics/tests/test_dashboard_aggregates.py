@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from tests.fixtures import make_product_frame
+from visualization.aggregate_store import DashboardAggregateStore
+
+class TestDashboardAggregateStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.data = make_product_frame(500).assign(
+            **{'Product Ratings': rng.uniform(1, 5, 500), 'Sentiment Score': rng.uniform(-1, 1, 500)}
+        )
+        self.data.loc[::7, 'Product Ratings'] = np.nan
+        self.labels = rng.integers(0, 3, 500)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _store(self, name='store'):
+        return DashboardAggregateStore(f'{self.tmpdir.name}/{name}')
+
+    def test_matches_pandas(self):
+        store = self._store()
+        store.refresh(self.data, self.labels)
+        columns = ['Price', 'Stock Quantity', 'Product Ratings']
+        pd.testing.assert_frame_equal(store.correlation(), self.data[columns].astype(float).corr(), check_exact=False)
+        summary = store.cluster_summary().set_index('Cluster')
+        expected = self.data.groupby(self.labels)['Price'].agg(['count', 'mean'])
+        np.testing.assert_array_equal(summary['count'], expected['count'])
+        np.testing.assert_allclose(summary['Price mean'], expected['mean'])
+        _, counts = store.sentiment_histogram()
+        self.assertEqual(counts.sum(), 500)
+
+    def test_cluster_summary_skips_missing_values(self):
+        store = self._store()
+        store.refresh(self.data, self.labels)
+        summary = store.cluster_summary().set_index('Cluster')
+        ratings = self.data.groupby(self.labels)['Product Ratings']
+        np.testing.assert_allclose(summary['Product Ratings mean'], ratings.mean())
+        np.testing.assert_allclose(summary['Product Ratings std'], ratings.std(ddof=0))
+        np.testing.assert_array_equal(summary['count'], ratings.size())
+
+    def test_incremental_refresh_matches_rebuild(self):
+        store = self._store()
+        store.refresh(self.data, self.labels)
+        changed = self.data.drop(index=range(10)).copy()
+        changed.loc[20:40, 'Price'] *= 2
+        new_rows = make_product_frame(30, seed=1).assign(**{'Product Ratings': 3.0, 'Sentiment Score': 0.5})
+        changed = pd.concat([changed, new_rows], ignore_index=True)
+        labels = np.concatenate([self.labels[10:], np.full(30, 3)])
+
+        applied = store.refresh(changed, labels)
+        self.assertLess(applied, len(changed))
+        rebuilt = self._store('rebuilt')
+        rebuilt.refresh(changed, labels)
+        pd.testing.assert_frame_equal(store.correlation(), rebuilt.correlation(), check_exact=False)
+        pd.testing.assert_frame_equal(store.cluster_summary(), rebuilt.cluster_summary(), check_exact=False)
+        np.testing.assert_array_equal(store.sentiment_histogram()[1], rebuilt.sentiment_histogram()[1])
+
+    def test_readers_pick_up_new_versions(self):
+        writer, reader = self._store(), self._store()
+        writer.refresh(self.data, self.labels)
+        self.assertEqual(reader.cluster_summary()['count'].sum(), 500)
+        writer.refresh(self.data.iloc[:100], self.labels[:100])
+        self.assertEqual(reader.cluster_summary()['count'].sum(), 100)
+        self.assertEqual(writer.refresh(self.data.iloc[:100], self.labels[:100]), 0)
+
+    def test_versions_hold_no_row_data(self):
+        store = self._store()
+        store.refresh(self.data, self.labels)
+        base = os.path.join(store.path, f'v{store._current_version()}')
+        expected = {f'{name}.npy' for name in store.ARRAYS + store.BUCKETS} | {'meta.json'}
+        self.assertEqual(set(os.listdir(base)), expected)
+        self.assertEqual(np.load(os.path.join(base, 'bucket_n.npy')).shape[0], store.n_buckets)
+
+    def test_versions_mapped_by_readers_are_kept(self):
+        writer, reader = self._store(), self._store()
+        versions = lambda: sorted(int(n[1:]) for n in os.listdir(writer.path) if n[1:].isdigit())
+        writer.refresh(self.data, self.labels)
+        reader.cluster_summary()  # maps v1
+        for n_rows in (400, 300, 200):
+            writer.refresh(self.data.iloc[:n_rows], self.labels[:n_rows])
+        self.assertEqual(versions(), [1, 3, 4])  # v2 was never mapped
+
+        self.assertEqual(reader.cluster_summary()['count'].sum(), 200)  # switches to v4
+        writer.refresh(self.data.iloc[:100], self.labels[:100])
+        self.assertEqual(versions(), [4, 5])
+
+        # a reader that stopped checking no longer pins its version
+        for lease in os.listdir(os.path.join(writer.path, 'readers')):
+            os.utime(os.path.join(writer.path, 'readers', lease), (0, 0))
+        writer.refresh(self.data.iloc[:50], self.labels[:50])
+        writer.refresh(self.data.iloc[:25], self.labels[:25])
+        self.assertEqual(versions(), [6, 7])
+
+    def test_concurrent_writers_claim_distinct_versions(self):
+        first, second = self._store(), self._store()
+        first.refresh(self.data, self.labels)
+        # both workers see v1 as current; the second claims v2 before the first writes
+        os.mkdir(os.path.join(second.path, 'v2'))
+        first.refresh(self.data.iloc[:100], self.labels[:100])
+        self.assertEqual(first._current_version(), 3)
+        self.assertEqual(second.cluster_summary()['count'].sum(), 100)
+
+    def test_dashboard_without_store_skips_aggregate_panels(self):
+        from visualization.interactive_plots import ProductVisualizationDashboard
+
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        try:
+            dashboard = ProductVisualizationDashboard(self.data, cluster_labels=self.labels)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+        self.assertNotIn('cluster-plot', str(dashboard.app.layout))
+
+        store = self._store()
+        dashboard = ProductVisualizationDashboard(self.data, cluster_labels=self.labels, aggregate_store=store)
+        self.assertIsNone(store._current_version())  # the dashboard never writes
+        store.refresh(self.data, self.labels)
+        self.assertEqual(dashboard._cluster_figure().data[0].y.sum(), 500)
+
+if __name__ == '__main__':
+    unittest.main()
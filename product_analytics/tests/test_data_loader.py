@@ -0,0 +1,241 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import contextmanager
+from decimal import Decimal
+from types import SimpleNamespace
+import pandas as pd
+import numpy as np
+from data_processing.data_loader import ProductDataLoader, get_engine, dispose_engines
+from data_processing.cache import ColumnarCache
+from data_processing.api_fetcher import PaginatedAPIFetcher
+from tests.fixtures import make_product_frame, make_sqlite_products, PagedProductServer
+
+class TestCSVStreaming(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Write a small product export to disk"""
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.csv_path = os.path.join(cls.tmpdir.name, 'products.csv')
+        cls.test_data = make_product_frame(250)
+        cls.test_data.to_csv(cls.csv_path, index=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_stream_yields_typed_chunks(self):
+        """Chunks are bounded and carry compact dtypes"""
+        loader = ProductDataLoader(config={})
+        chunks = list(loader.load_data(source_type='csv', filepath=self.csv_path, chunksize=100))
+        self.assertEqual([len(c) for c in chunks], [100, 100, 50])
+        chunk = chunks[0]
+        self.assertIsInstance(chunk['Product Name'].dtype, pd.CategoricalDtype)
+        self.assertEqual(chunk['Price'].dtype, np.float32)
+        self.assertEqual(chunk['Stock Quantity'].dtype, 'Int32')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(chunk['Manufacturing Date']))
+
+    def test_concat_chunks_keeps_categoricals(self):
+        loader = ProductDataLoader(config={})
+        df = loader.concat_chunks(
+            loader.load_data(source_type='csv', filepath=self.csv_path, chunksize=60)
+        )
+        self.assertEqual(len(df), len(self.test_data))
+        self.assertIsInstance(df['Product Category'].dtype, pd.CategoricalDtype)
+        self.assertEqual(
+            df['Product Name'].astype(str).tolist(),
+            self.test_data['Product Name'].tolist()
+        )
+
+    def test_stream_validates_each_chunk(self):
+        loader = ProductDataLoader(config={})
+        self.test_data.drop(columns=['Price']).to_csv(self.csv_path + '.bad', index=False)
+        with self.assertRaises(ValueError):
+            next(loader.load_data(source_type='csv', filepath=self.csv_path + '.bad', chunksize=50))
+
+class TestColumnarCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmpdir.name, 'products.csv')
+        self.cache_dir = os.path.join(self.tmpdir.name, 'cache')
+        self.test_data = pd.DataFrame({
+            'Product ID': ['A1', 'B2', 'C3'],
+            'Product Name': ['Laptop', None, 'Laptop'],
+            'Price': [10.5, 20.0, 30.25],
+            'Stock Quantity': [1, 2, 3],
+            'Manufacturing Date': ['2023-01-01', '2023-03-15', '2023-01-01'],
+            'Expiration Date': ['2025-01-01', '2026-01-01', '2025-01-01']
+        })
+        self.test_data.to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_second_load_is_served_from_cache(self):
+        loader = ProductDataLoader(config={'cache_dir': self.cache_dir})
+        first = loader.load_data(source_type='csv', filepath=self.csv_path)
+        self.assertIsNone(loader.cache.get(self.csv_path, {'reader': 'xlsx'}))
+        second = loader.load_data(source_type='csv', filepath=self.csv_path)
+        pd.testing.assert_frame_equal(first, second, check_dtype=False)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(second['Manufacturing Date']))
+        self.assertTrue(pd.isna(second.loc[1, 'Product Name']))
+
+    def test_changed_source_misses_cache(self):
+        loader = ProductDataLoader(config={'cache_dir': self.cache_dir})
+        loader.load_data(source_type='csv', filepath=self.csv_path)
+        self.test_data.assign(Price=[1.0, 2.0, 3.0]).to_csv(self.csv_path, index=False)
+        df = loader.load_data(source_type='csv', filepath=self.csv_path)
+        self.assertEqual(df['Price'].tolist(), [1.0, 2.0, 3.0])
+
+    def test_csv_encoding_is_applied(self):
+        self.test_data.assign(**{'Product Name': ['Café', None, 'Laptop']}).to_csv(
+            self.csv_path, index=False, encoding='latin-1'
+        )
+        loader = ProductDataLoader(config={'cache_dir': self.cache_dir, 'csv_encoding': 'latin-1'})
+        for _ in range(2):  # parsed, then served from the cache
+            df = loader.load_data(source_type='csv', filepath=self.csv_path)
+            self.assertEqual(df.loc[0, 'Product Name'], 'Café')
+
+    def test_eviction_respects_size_cap(self):
+        loader = ProductDataLoader(config={'cache_dir': self.cache_dir, 'cache_max_bytes': 1})
+        loader.load_data(source_type='csv', filepath=self.csv_path)
+        entries = [n for n in os.listdir(self.cache_dir) if n not in ('keys',)]
+        self.assertEqual(entries, [])
+
+    def test_compact_dtypes_round_trip(self):
+        cache = ColumnarCache(self.cache_dir)
+        df = pd.DataFrame({
+            'Product Name': pd.Categorical(['Laptop', 'Phone', 'Laptop']),
+            'Stock Quantity': pd.array([1, None, 3], dtype='Int32'),
+            'Price': np.array([1.5, 2.5, 3.5], dtype='float32')
+        })
+        cache.put(self.csv_path, df)
+        pd.testing.assert_frame_equal(cache.get(self.csv_path), df)
+
+    def test_datetime_and_string_columns_round_trip(self):
+        cache = ColumnarCache(self.cache_dir)
+        df = pd.DataFrame({
+            'Product Name': ['Laptop', np.nan, 'Laptop', 'Phone'],
+            'Manufacturing Date': pd.to_datetime(
+                ['2023-01-01 00:00:00', None, '2023-03-15 12:30:00', '2024-02-29 00:00:00']
+            )
+        })
+        cache.put(self.csv_path, df)
+        pd.testing.assert_frame_equal(cache.get(self.csv_path), df)
+
+        entry = next(n for n in os.listdir(self.cache_dir) if n != 'keys')
+        codes = np.load(os.path.join(self.cache_dir, entry, '0.npy'), mmap_mode='r')
+        self.assertEqual(codes.tolist(), [0, -1, 0, 1])  # strings are stored once
+
+class TestSQLSource(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.n_rows = 1000
+        cls.url = make_sqlite_products(os.path.join(cls.tmpdir.name, 'products.db'), cls.n_rows)
+        cls.loader = ProductDataLoader(config={})
+
+    @classmethod
+    def tearDownClass(cls):
+        dispose_engines()
+        cls.tmpdir.cleanup()
+
+    def test_engine_is_reused(self):
+        self.assertIs(get_engine(self.url), get_engine(self.url))
+
+    def test_streaming_chunks(self):
+        chunks = self.loader.load_data(
+            source_type='sql', connection_string=self.url,
+            query='SELECT * FROM products', chunksize=300
+        )
+        self.assertEqual([len(c) for c in chunks], [300, 300, 300, 100])
+
+    def test_partitioned_numeric_key(self):
+        df = self.loader.load_data(
+            source_type='sql', connection_string=self.url,
+            query='SELECT * FROM products', partition_column='row_id', partitions=4
+        )
+        self.assertEqual(sorted(df['row_id']), list(range(self.n_rows)))
+
+    def test_partitioned_date_key(self):
+        df = self.loader.load_data(
+            source_type='sql', connection_string=self.url,
+            query='SELECT * FROM products', partition_column='Manufacturing Date', partitions=3
+        )
+        self.assertEqual(len(df), self.n_rows)
+        self.assertEqual(df['row_id'].nunique(), self.n_rows)
+
+    def test_partitioned_explicit_bounds(self):
+        df = self.loader.load_data(
+            source_type='sql', connection_string=self.url,
+            query='SELECT * FROM products', partition_column='Product ID',
+            partition_bounds=['P0000000', 'P0000500', 'P9999999']
+        )
+        self.assertEqual(len(df), self.n_rows)
+
+    def test_partitioned_keeps_null_keys(self):
+        path = os.path.join(self.tmpdir.name, 'with_nulls.db')
+        url = make_sqlite_products(path, 100)
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE products SET row_id = NULL WHERE row_id % 10 = 0")
+        df = self.loader.load_data(
+            source_type='sql', connection_string=url,
+            query='SELECT * FROM products', partition_column='row_id', partitions=4
+        )
+        self.assertEqual(len(df), 100)
+        self.assertEqual(df['row_id'].isna().sum(), 10)
+
+    def test_partition_bounds_by_key_type(self):
+        class FakeEngine:
+            def __init__(self, lo, hi):
+                self.row = (lo, hi)
+
+            @contextmanager
+            def connect(self):
+                yield SimpleNamespace(execute=lambda sql: SimpleNamespace(one=lambda: self.row))
+
+        bounds = ProductDataLoader._partition_bounds(FakeEngine(Decimal('1.50'), Decimal('9.50')), 'q', 'price', 4)
+        self.assertEqual(bounds, [Decimal('1.50'), Decimal('3.5'), Decimal('5.5'), Decimal('7.5'), Decimal('9.50')])
+        with self.assertRaisesRegex(ValueError, 'partition_bounds'):
+            ProductDataLoader._partition_bounds(FakeEngine(b'\x00', b'\xff'), 'q', 'blob', 4)
+
+class TestAPISource(unittest.TestCase):
+    def setUp(self):
+        self.test_data = make_product_frame(1050)
+
+    def test_fetches_all_pages_in_order(self):
+        with PagedProductServer(self.test_data, page_size=100) as server:
+            loader = ProductDataLoader(config={'api_concurrency': 4})
+            df = loader.load_data(source_type='api', endpoint=server.url, params={'q': 'all'})
+        self.assertEqual(df['Product ID'].tolist(), self.test_data['Product ID'].tolist())
+        # Keep-alive: far fewer connections than requests
+        self.assertLessEqual(len(server.connections), 4)
+
+    def test_unknown_page_count(self):
+        with PagedProductServer(self.test_data, page_size=100, report_total=False) as server:
+            df = PaginatedAPIFetcher(concurrency=3).fetch(server.url)
+        self.assertEqual(len(df), len(self.test_data))
+
+    def test_retries_transient_errors(self):
+        with PagedProductServer(self.test_data, page_size=100, fail_every=4) as server:
+            df = PaginatedAPIFetcher(concurrency=4, backoff_base=0.01).fetch(server.url)
+        self.assertEqual(len(df), len(self.test_data))
+
+    def test_gives_up_after_max_retries(self):
+        with PagedProductServer(self.test_data, fail_every=1) as server:
+            with self.assertRaises(RuntimeError):
+                PaginatedAPIFetcher(max_retries=2, backoff_base=0.01).fetch(server.url)
+
+    def test_blocking_fetch_inside_event_loop(self):
+        fetcher = PaginatedAPIFetcher(concurrency=3)
+
+        async def fetch_both(url):
+            with self.assertRaisesRegex(RuntimeError, 'fetch_async'):
+                fetcher.fetch(url)
+            return await fetcher.fetch_async(url)
+
+        with PagedProductServer(self.test_data, page_size=100) as server:
+            df = asyncio.run(fetch_both(server.url))
+        self.assertEqual(len(df), len(self.test_data))
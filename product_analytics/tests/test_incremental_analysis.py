@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from tests.fixtures import make_product_frame
+from analytics.incremental_analysis import IncrementalProductAnalyzer
+from analytics.product_analysis import engineer_features, feature_matrix
+from config.constants import CLUSTER_FEATURES
+from models.predictive_models.model_store import ModelStore
+
+def make_catalog(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    data = make_product_frame(n_rows, seed=seed).assign(**{
+        'Product Ratings': rng.integers(1, 6, n_rows).astype(float),
+        'Warranty Period': rng.integers(1, 4, n_rows),
+        'Product Dimensions': rng.choice(['16x15x15 cm', '10x5x8 cm'], n_rows)
+    })
+    for column in ('Manufacturing Date', 'Expiration Date'):
+        data[column] = pd.to_datetime(data[column])
+    return data
+
+class TestIncrementalProductAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data = make_catalog(400)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _analyzer(self, **kwargs):
+        return IncrementalProductAnalyzer(store=ModelStore(self.tmpdir.name), n_clusters=3, **kwargs)
+
+    def _expected_stats(self, data, labels):
+        X = feature_matrix(engineer_features(data), CLUSTER_FEATURES)[0]
+        X['Cluster'] = labels
+        return X.groupby('Cluster').agg({
+            'Price': ['mean', 'std', 'min', 'max'],
+            'Stock Quantity': ['mean', 'sum'],
+            'Product Ratings': ['mean', 'count']
+        })
+
+    def test_small_delta_is_applied_without_refit(self):
+        first = self._analyzer().update(self.data)
+        self.assertEqual(first['refit'], 'initial')
+
+        updated = self.data.drop(index=range(5)).copy()
+        updated.loc[10:14, 'Price'] = updated.loc[10:14, 'Price'] + 1
+        updated = pd.concat([updated, make_catalog(10, seed=1).assign(
+            **{'Product ID': [f'N{i}' for i in range(10)]}
+        )], ignore_index=True)
+
+        result = self._analyzer().update(updated)
+        self.assertIsNone(result['refit'])
+        self.assertEqual(result['delta'], {'added': 10, 'changed': 5, 'removed': 5})
+        # unchanged products keep their labels
+        unchanged = updated['Product ID'].isin(self.data['Product ID'].iloc[15:])
+        previous = pd.Series(first['cluster_labels'], index=self.data['Product ID'])
+        np.testing.assert_array_equal(result['cluster_labels'][unchanged],
+                                      previous[updated['Product ID'][unchanged]].to_numpy())
+        expected = self._expected_stats(updated, result['cluster_labels'])
+        pd.testing.assert_frame_equal(result['cluster_stats'], expected, check_dtype=False, check_names=False)
+
+    def test_large_delta_triggers_refit(self):
+        self._analyzer(max_delta_fraction=0.05).update(self.data)
+        updated = self.data.copy()
+        updated.loc[:50, 'Stock Quantity'] += 1
+        result = self._analyzer(max_delta_fraction=0.05).update(updated)
+        self.assertEqual(result['refit'], 'delta')
+        self.assertEqual(result['delta']['changed'], 51)
+
+    def test_drift_triggers_refit(self):
+        self._analyzer().update(self.data)
+        outliers = make_catalog(5, seed=2).assign(**{'Product ID': [f'X{i}' for i in range(5)], 'Price': 1e6})
+        result = self._analyzer().update(pd.concat([self.data, outliers], ignore_index=True))
+        self.assertEqual(result['refit'], 'drift')
+
+if __name__ == '__main__':
+    unittest.main()
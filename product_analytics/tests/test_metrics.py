@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from monitoring.metrics import StageMetrics, METRICS
+from data_processing.data_loader import ProductDataLoader
+from tests.fixtures import make_product_frame
+
+class TestStageMetrics(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        metrics = StageMetrics(enabled=False)
+
+        @metrics.instrument('noop')
+        def work(n):
+            return np.zeros(n)
+
+        self.assertEqual(len(work(5)), 5)
+        with metrics.stage('block') as stage:
+            stage.rows = 10
+        self.assertEqual(metrics.records, [])
+
+    def test_records_rows_nesting_and_errors(self):
+        metrics = StageMetrics(enabled=True)
+
+        @metrics.instrument('inner')
+        def inner(n):
+            return np.zeros(n)
+
+        with metrics.stage('outer') as stage:
+            inner(100)
+            stage.rows = 7
+        with self.assertRaises(ValueError):
+            with metrics.stage('broken'):
+                raise ValueError('boom')
+
+        records = {r['stage']: r for r in metrics.records}
+        self.assertEqual(records['inner']['rows'], 100)
+        self.assertEqual(records['inner']['parent'], 'outer')
+        self.assertIsNone(records['outer']['parent'])
+        self.assertEqual(records['outer']['rows'], 7)
+        self.assertEqual(records['broken']['status'], 'error')
+        for key in ('wall_s', 'cpu_s', 'peak_rss_bytes'):
+            self.assertIsNotNone(records['inner'][key])
+
+    def test_exports(self):
+        metrics = StageMetrics(enabled=True)
+        for _ in range(2):
+            with metrics.stage('loader') as stage:
+                stage.rows = 50
+        summary = metrics.summary()['loader']
+        self.assertEqual((summary['calls'], summary['rows']), (2, 100))
+
+        text = metrics.prometheus_text()
+        self.assertIn('# TYPE product_analytics_stage_wall_seconds gauge', text)
+        self.assertIn('product_analytics_stage_calls_total{stage="loader"} 2', text)
+        self.assertIn('product_analytics_stage_rows{stage="loader"} 100', text)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            metrics.write_json(path)
+            with open(path) as f:
+                report = json.load(f)
+        self.assertEqual(len(report['stages']), 2)
+        self.assertEqual(report['summary']['loader']['calls'], 2)
+
+    def test_generators_are_measured_while_consumed(self):
+        metrics = StageMetrics(enabled=True)
+
+        @metrics.instrument('stream')
+        def produce(n_chunks):
+            def chunks():
+                for _ in range(n_chunks):
+                    time.sleep(0.02)
+                    yield np.zeros(10)
+            return chunks()
+
+        stream = produce(3)
+        self.assertEqual(metrics.records, [])
+        for _ in stream:
+            time.sleep(0.05)  # consumer work is not the stage's
+        record, = metrics.records
+        self.assertEqual(record['rows'], 30)
+        self.assertGreaterEqual(record['wall_s'], 0.06)
+        self.assertLess(record['wall_s'], 0.2)  # consuming took 0.15s more
+
+        stream = produce(5)
+        next(stream)
+        stream.close()
+        self.assertEqual((metrics.records[-1]['rows'], metrics.records[-1]['status']), (10, 'ok'))
+
+    def test_streaming_load_records_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'products.csv')
+            make_product_frame(250).to_csv(path, index=False)
+            enabled, METRICS.enabled = METRICS.enabled, True
+            previous = METRICS.drain()
+            try:
+                chunks = ProductDataLoader(config={}).load_data('csv', filepath=path, chunksize=100)
+                self.assertEqual([r['stage'] for r in METRICS.records], [])
+                self.assertEqual(sum(len(c) for c in chunks), 250)
+                loader, = [r for r in METRICS.records if r['stage'] == 'loader']
+                self.assertEqual(loader['rows'], 250)
+            finally:
+                METRICS.drain()
+                METRICS.extend(previous)
+                METRICS.enabled = enabled
+
+if __name__ == '__main__':
+    unittest.main()
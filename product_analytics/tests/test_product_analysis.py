@@ -0,0 +1,50 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from tests.fixtures import make_product_frame
+from analytics.product_analysis import ComprehensiveProductAnalyzer
+
+class TestComprehensiveProductAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.data = make_product_frame(300).assign(
+            **{'Product Ratings': rng.integers(1, 6, 300), 'Warranty Period': rng.integers(1, 4, 300),
+               'Product Dimensions': rng.choice(['16x15x15 cm', '10x5x8 cm'], 300)}
+        )
+        for column in ('Manufacturing Date', 'Expiration Date'):  # as parsed by the loader
+            self.data[column] = pd.to_datetime(self.data[column])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _run(self, data, stages=('clustering',)):
+        analyzer = ComprehensiveProductAnalyzer(data, cache_dir=self.tmpdir.name, n_clusters_range=(2, 4))
+        return analyzer.run_full_analysis(list(stages))
+
+    def test_rerun_uses_cached_stages(self):
+        first = self._run(self.data)
+        self.assertEqual({k: v['status'] for k, v in first['stages'].items()},
+                         {'features': 'ran', 'clustering': 'ran'})
+        self.assertEqual(len(first['cluster_labels']), len(self.data))
+        second = self._run(self.data)
+        self.assertEqual({v['status'] for v in second['stages'].values()}, {'cached'})
+        np.testing.assert_array_equal(first['cluster_labels'], second['cluster_labels'])
+
+    def test_changed_input_reruns_only_affected_stages(self):
+        self._run(self.data, stages=('clustering', 'sentiment'))
+        changed = self.data.copy()
+        changed.loc[:10, 'Price'] += 100
+        results = self._run(changed, stages=('clustering', 'sentiment'))
+        self.assertEqual(results['stages']['features']['status'], 'ran')
+        self.assertEqual(results['stages']['clustering']['status'], 'ran')
+        self.assertEqual(results['stages']['sentiment']['status'], 'cached')
+        self.assertIsNone(results['sentiment'])  # no review column in the data
+
+    def test_unknown_stage(self):
+        with self.assertRaises(ValueError):
+            self._run(self.data, stages=('nope',))
+
+if __name__ == '__main__':
+    unittest.main()
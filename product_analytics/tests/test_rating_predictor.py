@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from models.predictive_models.model_store import ModelStore
+from models.predictive_models.rating_predictor import RatingPredictorOptimizer
+
+def make_regression(n_rows=150, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 4)), columns=['price', 'stock', 'age', 'tags'])
+    y = pd.Series(2 * X['price'] - X['stock'] + rng.normal(scale=0.1, size=n_rows), name='rating')
+    return X, y
+
+class TestStackedEnsemble(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import xgboost as xgb
+        cls.X, cls.y = make_regression()
+        cls.xgb = xgb.XGBRegressor(n_estimators=20, max_depth=3)
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = ModelStore(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _optimizer(self):
+        optimizer = RatingPredictorOptimizer(self.X, self.y)
+        optimizer.best_model = self.xgb
+        return optimizer
+
+    def test_second_call_loads_from_store(self):
+        first = self._optimizer()
+        ensemble = first.create_ensemble(store=self.store, cv=3)
+        self.assertEqual(first.timings['source'], 'trained')
+        self.assertEqual(first.timings['version'], 1)
+        self.assertFalse(ensemble.named_estimators_['cat'].get_param('allow_writing_files'))
+
+        second = self._optimizer()
+        loaded = second.create_ensemble(store=self.store, cv=3)
+        self.assertEqual(second.timings['source'], 'store')
+        np.testing.assert_array_equal(loaded.predict(self.X), ensemble.predict(self.X))
+
+    def test_out_of_fold_predictions_are_reused(self):
+        optimizer = self._optimizer()
+        optimizer.create_ensemble(store=self.store, cv=3)
+        optimizer.create_ensemble(final_estimator=LinearRegression(), store=self.store, cv=3)
+        self.assertEqual(optimizer.timings['source'], 'memory')
+
+        # a new process finds the base models in the store; another cv needs new folds
+        fresh = self._optimizer()
+        fresh.create_ensemble(final_estimator=LinearRegression(positive=True), store=self.store, cv=3)
+        self.assertEqual(fresh.timings['source'], 'store')
+        fresh.create_ensemble(store=self.store, cv=4)
+        self.assertEqual(fresh.timings['source'], 'trained')
+
+class PruneOddTrials:
+    """Deterministic pruner: every odd-numbered trial is pruned at its first report"""
+
+    def prune(self, study, trial):
+        return trial.number % 2 == 1
+
+class TestXGBSearch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = f"sqlite:///{os.path.join(self.tmpdir.name, 'optuna.db')}"
+        self.X, self.y = make_regression(120)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_resumes_stored_study_and_records_pruned_trials(self):
+        import optuna
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+        optimizer = RatingPredictorOptimizer(self.X, self.y)
+        model = optimizer.optimize_xgb(n_trials=3, storage=self.storage, study_name='resume', n_folds=3,
+                                       early_stopping_rounds=5)
+        self.assertIsNotNone(model)
+        for trial in optimizer.study.trials:
+            # early stopping never keeps more trees than the trial allowed
+            self.assertLessEqual(trial.user_attrs['best_n_estimators'], trial.params['n_estimators'])
+        best = optimizer.study.best_trial
+        self.assertEqual(model.get_params()['n_estimators'], best.user_attrs['best_n_estimators'])
+
+        resumed = RatingPredictorOptimizer(self.X, self.y)
+        resumed.optimize_xgb(n_trials=6, storage=self.storage, study_name='resume', n_folds=3,
+                             early_stopping_rounds=5, pruner=PruneOddTrials())
+        study = optuna.load_study(study_name='resume', storage=self.storage)
+        self.assertEqual([t.number for t in study.trials], list(range(6)))
+        states = [t.state for t in study.trials]
+        self.assertEqual(states[:3], [optuna.trial.TrialState.COMPLETE] * 3)
+        self.assertEqual(states[3:], [optuna.trial.TrialState.PRUNED, optuna.trial.TrialState.COMPLETE,
+                                      optuna.trial.TrialState.PRUNED])
+        self.assertEqual(len(study.trials[3].intermediate_values), 1)
+
+        # the target is already reached: nothing new runs
+        resumed.optimize_xgb(n_trials=6, storage=self.storage, study_name='resume', n_folds=3)
+        self.assertEqual(len(optuna.load_study(study_name='resume', storage=self.storage).trials), 6)
+
+class TestTreeShap(unittest.TestCase):
+    def setUp(self):
+        import xgboost as xgb
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.X, self.y = make_regression(90)
+        self.model = xgb.XGBRegressor(n_estimators=15, max_depth=3).fit(self.X, self.y)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_batched_values_match_single_call_and_are_stored(self):
+        import shap
+        optimizer = RatingPredictorOptimizer(self.X, self.y)
+        store = ModelStore(self.tmpdir.name)
+        explanation = optimizer.explain_model(self.model, method='tree', plot=False, background_size=30,
+                                              batch_size=20, store=store)
+
+        background = shap.utils.sample(self.X, 30, random_state=0)
+        explainer = shap.TreeExplainer(self.model, data=background, feature_perturbation='interventional')
+        np.testing.assert_allclose(explanation.values, explainer.shap_values(self.X, check_additivity=False),
+                                   rtol=1e-5, atol=1e-6)
+        self.assertEqual(explanation.feature_names, list(self.X.columns))
+
+        with mock.patch.object(shap, 'TreeExplainer', side_effect=AssertionError('recomputed')):
+            cached = optimizer.explain_model(self.model, method='tree', plot=False, background_size=30,
+                                             batch_size=20, store=store)
+        np.testing.assert_array_equal(cached.values, explanation.values)
+        np.testing.assert_array_equal(cached.base_values, explanation.base_values)
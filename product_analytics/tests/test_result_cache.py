@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from analytics.result_cache import SentimentResultCache
+
+class TestSentimentResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_hits_and_misses(self):
+        cache = SentimentResultCache(self.path)
+        cache.put_many('model-a', ['good', 'bad'], [{'score': 1}, {'score': -1}])
+        found = cache.get_many('model-a', ['good', 'new', 'bad'])
+        self.assertEqual(found, {0: {'score': 1}, 2: {'score': -1}})
+        self.assertEqual(cache.get_many('model-b', ['good']), {})
+        stats = cache.stats()
+        self.assertEqual(stats['memory_hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+
+    def test_persists_across_instances(self):
+        SentimentResultCache(self.path).put_many('m', ['good'], [[0.5, 'POS']])
+        cache = SentimentResultCache(self.path)
+        self.assertEqual(cache.get_many('m', ['good']), {0: [0.5, 'POS']})
+        self.assertEqual(cache.stats()['disk_hits'], 1)
+
+    def test_size_eviction_drops_least_recently_used(self):
+        cache = SentimentResultCache(self.path, max_entries=2, memory_size=1)
+        cache.put_many('m', ['a'], [1])
+        time.sleep(0.01)
+        cache.put_many('m', ['b'], [2])
+        time.sleep(0.01)
+        cache.get_many('m', ['a'])
+        time.sleep(0.01)
+        cache.put_many('m', ['c'], [3])
+        self.assertEqual(sorted(cache.get_many('m', ['a', 'b', 'c'])), [0, 2])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_age_eviction(self):
+        cache = SentimentResultCache(self.path, max_age_days=1)
+        cache.put_many('m', ['old'], [1])
+        cache._conn.execute('UPDATE results SET created = created - 2 * 86400')
+        cache._memory.clear()
+        self.assertEqual(cache.get_many('m', ['old']), {})
+        cache.prune()
+        self.assertEqual(cache.stats()['disk_entries'], 0)
+
+    def test_memory_hits_expire_and_refresh_access_time(self):
+        cache = SentimentResultCache(self.path, max_age_days=1)
+        cache.put_many('m', ['old', 'hot'], [1, 2])
+        cache._conn.execute("UPDATE results SET accessed = 0 WHERE key = ?", (cache.make_key('m', 'hot'),))
+        key, (created, result) = next(iter(cache._memory.items()))
+        cache._memory[key] = (created - 2 * 86400, result)
+        cache._conn.execute('UPDATE results SET created = created - 2 * 86400 WHERE key = ?', (key,))
+
+        self.assertEqual(cache.get_many('m', ['old', 'hot']), {1: 2})
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+        accessed = cache._conn.execute(
+            'SELECT accessed FROM results WHERE key = ?', (cache.make_key('m', 'hot'),)
+        ).fetchone()[0]
+        self.assertGreater(accessed, 0)
+
+    def test_prunes_only_when_due(self):
+        cache = SentimentResultCache(self.path, max_entries=10, prune_every=5)
+        with mock.patch.object(cache, 'prune', wraps=cache.prune) as prune:
+            for i in range(4):
+                cache.put_many('m', [str(i)], [i])
+            self.assertEqual(prune.call_count, 0)
+            cache.put_many('m', ['4'], [4])
+            self.assertEqual(prune.call_count, 1)
+            cache.put_many('m', [str(i) for i in range(5, 13)], list(range(5, 13)))
+            self.assertEqual(prune.call_count, 2)
+        self.assertEqual(cache.stats()['disk_entries'], 10)
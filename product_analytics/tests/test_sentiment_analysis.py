@@ -0,0 +1,164 @@
+import unittest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+import pandas as pd
+from analytics import sentiment_analysis
+from analytics.sentiment_analysis import ProductSentimentAnalyzer, AdvancedSentimentAnalyzer, SCORE_COLUMNS
+from config.constants import SPACY_UNUSED_PIPES
+
+REVIEWS = ['Good battery', 'bad screen', 'Good battery', None, 'great Sound quality', 'bad screen', 'ok']
+
+class StubPipeline:
+    """Stand-in for a transformers sentiment pipeline that records what it scores"""
+
+    def __init__(self):
+        self.calls = []
+        self.texts = []
+
+    def _score(self, text):
+        return {'label': 'POS' if 'good' in text.lower() or 'great' in text.lower() else 'NEG',
+                'score': 0.5 + len(text) / 100}
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append(kwargs)
+        if isinstance(texts, str):
+            texts = [texts]
+        self.texts += texts
+        return [self._score(t) for t in texts]
+
+def stub_lexicon_scores(texts):
+    """Deterministic (n, 6) lexicon scores; module level so worker processes can unpickle it"""
+    return np.array([[len(t), t.count(' '), t.count('o'), sum(map(ord, t)) % 97, len(t) / 10, t.count('a')]
+                     for t in texts], dtype=np.float64)
+
+class StubNLP:
+    """Stand-in for a spaCy pipeline: capitalized words are entities, every word a noun"""
+
+    pipe_names = ['tok2vec', 'tagger', 'parser', 'ner', 'lemmatizer']
+
+    def __init__(self):
+        self.parsed = []
+        self.pipe_calls = []
+        self.disabled = None
+
+    def _doc(self, text):
+        self.parsed.append(text)
+        return StubDoc(text.split())
+
+    def __call__(self, text):
+        return self._doc(text)
+
+    @contextmanager
+    def select_pipes(self, disable):
+        self.disabled = disable
+        yield
+
+    def pipe(self, texts, batch_size, n_process):
+        self.pipe_calls.append({'batch_size': batch_size, 'n_process': n_process, 'disabled': self.disabled})
+        for text in texts:
+            yield self._doc(text)
+
+class StubDoc:
+    def __init__(self, words):
+        self.ents = [SimpleNamespace(text=w, label_='ORG') for w in words if w[:1].isupper()]
+        self.noun_chunks = [SimpleNamespace(text=w) for w in words]
+        self._tokens = [SimpleNamespace(text=w, is_stop=w == 'is', is_punct=False, pos_='NOUN') for w in words]
+
+    def __iter__(self):
+        return iter(self._tokens)
+
+class TestBatchAnalyzeReviews(unittest.TestCase):
+    def setUp(self):
+        self.reviews = pd.DataFrame({'Product ID': [f'P{i}' for i in range(len(REVIEWS))], 'Review': REVIEWS},
+                                    index=np.arange(10, 10 + len(REVIEWS)))
+        self.analyzer = ProductSentimentAnalyzer()
+        self.analyzer.transformer_pipeline = StubPipeline()
+        patcher = mock.patch.object(sentiment_analysis, '_lexicon_scores', side_effect=stub_lexicon_scores)
+        self.lexicon = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_duplicates_scored_once_and_scattered_back(self):
+        result = self.analyzer.batch_analyze_reviews(self.reviews, batch_size=2, n_jobs=1)
+        texts = self.reviews['Review'].fillna('').tolist()
+
+        pipeline = self.analyzer.transformer_pipeline
+        self.assertEqual(sorted(pipeline.texts), sorted(set(texts)))
+        self.assertEqual(pipeline.calls, [{'batch_size': 2, 'truncation': True}])
+        self.assertEqual(self.lexicon.call_count, 1)
+
+        self.assertEqual(list(result.index), list(self.reviews.index))
+        self.assertEqual(result['product_id'].tolist(), self.reviews['Product ID'].tolist())
+        for row, text in zip(result.itertuples(index=False), texts):
+            single = StubPipeline()(text)[0]
+            self.assertEqual(row.transformer_label, single['label'])
+            self.assertAlmostEqual(row.transformer_score, single['score'])
+            np.testing.assert_array_equal(
+                [getattr(row, c) for c in SCORE_COLUMNS[:-1]], stub_lexicon_scores([text])[0]
+            )
+
+    def test_lexicon_process_pool_matches_in_process(self):
+        texts = [f'review number {i} is {"good" if i % 3 else "bad"}' for i in range(40)]
+        expected = self.analyzer._lexicon_scores(texts, n_jobs=1)
+        with mock.patch.object(sentiment_analysis, 'LEXICON_PARALLEL_MIN_TEXTS', 10), \
+                mock.patch.object(sentiment_analysis, 'process_pool', wraps=sentiment_analysis.process_pool) as pool, \
+                mock.patch.object(sentiment_analysis, '_lexicon_scores', stub_lexicon_scores):
+            scores = self.analyzer._lexicon_scores(texts, n_jobs=2)
+        pool.assert_called_once_with(2)
+        np.testing.assert_array_equal(scores, expected)
+
+class TestAnalyzeMany(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = AdvancedSentimentAnalyzer()
+        self.analyzer.transformer_pipeline = StubPipeline()
+        self.analyzer.nlp = StubNLP()
+
+    def test_each_text_parsed_once_and_matches_analyze(self):
+        frame = self.analyzer.analyze_many(REVIEWS, batch_size=3, transformer_batch_size=2)
+        texts = [t or '' for t in REVIEWS]
+
+        nlp, pipeline = self.analyzer.nlp, self.analyzer.transformer_pipeline
+        self.assertEqual(sorted(nlp.parsed), sorted(set(texts)))
+        self.assertEqual(nlp.pipe_calls, [{
+            'batch_size': 3, 'n_process': 1,
+            'disabled': [p for p in SPACY_UNUSED_PIPES if p in StubNLP.pipe_names]
+        }])
+        self.assertEqual(sorted(pipeline.texts), sorted(set(texts)))
+        self.assertEqual(pipeline.calls, [{'batch_size': 2, 'truncation': True}])
+
+        self.assertEqual(len(frame), len(texts))
+        for (_, row), text in zip(frame.iterrows(), texts):
+            single = self.analyzer.analyze(text)
+            self.assertEqual(row['transformer_label'], single['transformer']['label'])
+            self.assertAlmostEqual(row['textblob_polarity'], single['textblob']['polarity'])
+            self.assertEqual(row['entities'], single['spacy']['entities'])
+            self.assertEqual(row['noun_phrases'], single['spacy']['noun_phrases'])
+            self.assertEqual(sorted(row['keywords']), sorted(single['keywords']))
+            self.assertAlmostEqual(row['composite_score'], single['composite_score'])
+
+class TestModelKey(unittest.TestCase):
+    def test_key_follows_checkpoint_revision(self):
+        analyzer = ProductSentimentAnalyzer()
+        with mock.patch.dict('sys.modules', {'huggingface_hub': None, 'huggingface_hub.constants': None}):
+            self.assertIn(':unknown:', analyzer.model_key)
+        keys = set()
+        for revision in ('abc123', 'def456'):
+            analyzer = ProductSentimentAnalyzer()
+            analyzer.transformer_pipeline = SimpleNamespace(model=SimpleNamespace(config=SimpleNamespace(
+                _commit_hash=revision
+            )))
+            self.assertIn(f':{revision}:', analyzer.model_key)
+            keys.add(analyzer.model_key)
+        self.assertEqual(len(keys), 2)
+
+    def test_key_is_computed_once(self):
+        analyzer = ProductSentimentAnalyzer()
+        with mock.patch.object(sentiment_analysis, '_package_version', return_value='1.0') as package_version:
+            key = analyzer.model_key
+            self.assertIs(analyzer.model_key, key)
+        self.assertEqual(package_version.call_count, 3)  # transformers, nltk, textblob
+        self.assertNotEqual(analyzer.model_key, AdvancedSentimentAnalyzer().model_key)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from data_processing.tag_index import ProductTagIndex
+from models.clustering.product_segmentation import ProductClusterAnalyzer
+from tests.fixtures import make_product_frame
+
+class TestProductTagIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        tags = np.array(['eco', 'sale', 'new', 'gift'])
+        cls.data = make_product_frame(300).assign(**{
+            'Product Tags': [','.join(rng.choice(tags, 2, replace=False)) for _ in range(300)]
+        })
+        cls.data.loc[3, 'Product Tags'] = np.nan
+        cls.data.loc[4, 'Product Tags'] = 'eco, eco,,sale'
+        cls.tag_sets = cls.data['Product Tags'].fillna('').map(lambda s: {t.strip() for t in s.split(',') if t.strip()})
+
+    def _expected(self, predicate):
+        return np.flatnonzero([predicate(tags, variation) for tags, variation
+                               in zip(self.tag_sets, self.data['Color/Size Variations'])])
+
+    def test_postings_match_scan(self):
+        index = ProductTagIndex(self.data)
+        self.assertEqual(index.search('color:'), ['color:Blue', 'color:Red'])
+        self.assertEqual(index.search('size:'), ['size:Large', 'size:Small'])
+        np.testing.assert_array_equal(index.rows('tag:eco'), self._expected(lambda t, v: 'eco' in t))
+        self.assertEqual(len(index.rows('tag:missing')), 0)
+        self.assertEqual(index.counts()['tag:eco'], len(index.rows('tag:eco')))
+
+        rows = index.filter(all_of=['tag:eco', 'size:Small'], any_of=['tag:sale', 'tag:new'], none_of=['tag:gift'])
+        expected = self._expected(lambda t, v: 'eco' in t and v.endswith('Small') and t & {'sale', 'new'}
+                                  and 'gift' not in t)
+        np.testing.assert_array_equal(rows, expected)
+        self.assertEqual(index.mask(any_of=['tag:gift']).sum(), len(self._expected(lambda t, v: 'gift' in t)))
+
+    def test_multi_hot_features(self):
+        index = ProductTagIndex(self.data)
+        features, names = index.features()
+        dense = features.toarray()
+        self.assertEqual(set(np.unique(dense)), {0.0, 1.0})
+        for i in (0, 3, 4):
+            expected = {f'tag:{t}' for t in self.tag_sets[i]} | {
+                f'{kind}:{part}' for kind, part in zip(('color', 'size'), self.data.loc[i, 'Color/Size Variations'].split('/'))
+            }
+            self.assertEqual({names[j] for j in np.flatnonzero(dense[i])}, expected)
+
+        features, names = index.features(kinds=('color', 'size'))
+        self.assertEqual(names, ['color:Blue', 'color:Red', 'size:Large', 'size:Small'])
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = ProductClusterAnalyzer(self.data[['Price', 'Stock Quantity']].copy(), n_clusters_range=(2, 4),
+                                              graph_dir=tmp, sparse_features=features * 5)
+            self.assertEqual(analyzer.scaled_data.format, 'csr')
+            labels = analyzer.cluster_products('kmeans', n_clusters=2, random_state=0)
+            # heavily weighted variations dominate the split
+            self.assertEqual(pd.crosstab(labels, self.data['Color/Size Variations']).gt(0).sum().tolist(), [1, 1])
+            self.assertTrue(np.isnan(analyzer.find_optimal_clusters(n_jobs=1, random_state=0)['bic']).all())
+            self.assertEqual(len(analyzer.cluster_products('dbscan', eps=0.5)), len(self.data))
+
+    def test_dashboard_tag_filter(self):
+        from visualization.aggregate_store import DashboardAggregateStore
+        from visualization.interactive_plots import ProductVisualizationDashboard
+
+        data = self.data.assign(**{'Manufacturing Date': pd.to_datetime(self.data['Manufacturing Date'])})
+        with tempfile.TemporaryDirectory() as tmp:
+            dashboard = ProductVisualizationDashboard(data, aggregate_store=DashboardAggregateStore(tmp))
+            options = [o['value'] for o in dashboard._tag_options('Re', ['tag:eco'])]
+            self.assertEqual(options, ['tag:eco', 'color:Red'])
+
+            figure = dashboard._build_time_series_figure('Laptop', ('Price',), ('color:Red', 'tag:eco'))
+            expected = data[(data['Product Name'] == 'Laptop') & (data['Color/Size Variations'] == 'Red/Small')
+                            & self.tag_sets.map(lambda t: 'eco' in t)]
+            self.assertEqual(len(figure.data[0].y), len(expected))
+            self.assertEqual(sorted(figure.data[0].y), sorted(expected['Price']))
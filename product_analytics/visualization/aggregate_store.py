@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from config.constants import (
+    AGGREGATE_STORE_DIR, AGGREGATE_STORE_BUCKETS, AGGREGATE_READER_TTL, CORRELATION_COLUMNS,
+    SENTIMENT_COLUMN, SENTIMENT_BINS
+)
+
+class DashboardAggregateStore:
+    """Precomputed aggregates for the cluster, correlation and sentiment panels
+
+    Only additive statistics are stored (pairwise sums for correlations,
+    per-cluster sums/counts, sentiment histogram counts), as .npy files that
+    readers memory-map. Each refresh writes a new version directory and then
+    swaps the CURRENT pointer, so dashboard worker processes share one copy
+    and pick up new versions without reloading the data.
+
+    refresh() is incremental without keeping a copy of the rows: rows are
+    spread over n_buckets hash buckets, and each version stores the
+    statistics of every bucket plus a digest of its row hashes. Only buckets
+    whose digest changed are recomputed from the new data.
+    """
+
+    ARRAYS = [
+        'n', 'sx', 'sxx', 'sxy', 'cluster_count', 'cluster_n', 'cluster_sum', 'cluster_sumsq', 'sentiment_counts'
+    ]
+    BUCKETS = ['bucket_digest'] + [f'bucket_{name}' for name in ARRAYS]
+
+    def __init__(self, path=AGGREGATE_STORE_DIR, columns=CORRELATION_COLUMNS,
+                 sentiment_column=SENTIMENT_COLUMN, sentiment_bins=SENTIMENT_BINS,
+                 n_buckets=AGGREGATE_STORE_BUCKETS, reader_ttl=AGGREGATE_READER_TTL):
+        """
+        Args:
+            n_buckets: hash buckets the incremental refresh diffs by
+            reader_ttl: seconds after which a reader that has not checked for
+                new versions no longer keeps its version from being deleted
+        """
+        self.path = path
+        self.columns = columns
+        self.sentiment_column = sentiment_column
+        self.sentiment_edges = np.linspace(-1, 1, sentiment_bins + 1)
+        self.n_buckets = n_buckets
+        self.reader_ttl = reader_ttl
+        self.logger = logging.getLogger(__name__)
+        self._version = None
+        self._arrays = None
+        self._held_at = 0.0
+        os.makedirs(os.path.join(path, 'readers'), exist_ok=True)
+
+    # ---- writer -------------------------------------------------------------
+    def refresh(self, data, cluster_labels=None):
+        """Bring the stored aggregates in line with data; returns the number of rows re-aggregated"""
+        columns = [c for c in self.columns if c in data.columns]
+        values = data[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        labels = (np.full(len(data), -1) if cluster_labels is None
+                  else np.asarray(cluster_labels)).astype(np.int64)
+        sentiment = (pd.to_numeric(data[self.sentiment_column], errors='coerce').to_numpy(dtype=np.float64)
+                     if self.sentiment_column in data.columns else np.full(len(data), np.nan))
+        hashes = self._row_hashes(values, labels, sentiment)
+        buckets = (hashes % np.uint64(self.n_buckets)).astype(np.intp)
+        digest = np.zeros(self.n_buckets, dtype=np.uint64)
+        np.add.at(digest, buckets, hashes)  # wraps around, like the hashes themselves
+        n_clusters = int(labels.max()) + 2 if len(labels) else 1
+
+        try:
+            current = self._read(self._current_version(), self.BUCKETS)
+        except FileNotFoundError:  # written by an older layout
+            current = None
+        layout = {'columns': columns, 'buckets': self.n_buckets}
+        if current is None or {k: current['meta'].get(k) for k in layout} != layout:
+            changed = np.arange(self.n_buckets)
+            per_bucket = None
+        else:
+            old = current['arrays']
+            changed = np.flatnonzero(np.asarray(old['bucket_digest']) != digest)
+            if not len(changed):
+                return 0
+            per_bucket = {k: np.array(old[f'bucket_{k}']) for k in self.ARRAYS}
+            n_clusters = max(n_clusters, per_bucket['cluster_count'].shape[1])
+
+        rows = np.isin(buckets, changed)
+        fresh = self._bucket_stats(values[rows], labels[rows], sentiment[rows], buckets[rows], changed, n_clusters)
+        if per_bucket is None:
+            per_bucket = fresh
+        else:
+            for k in self.ARRAYS:
+                per_bucket[k] = self._pad(per_bucket[k], fresh[k].shape[1:])
+                per_bucket[k][changed] = fresh[k]
+
+        arrays = {k: per_bucket[k].sum(axis=0) for k in self.ARRAYS}
+        arrays.update({f'bucket_{k}': per_bucket[k] for k in self.ARRAYS}, bucket_digest=digest)
+        self._write(arrays, dict(layout, rows=len(data)))
+        applied = int(rows.sum())
+        self.logger.info(f"Dashboard aggregates refreshed ({applied} of {len(data)} rows re-aggregated)")
+        return applied
+
+    @staticmethod
+    def _row_hashes(values, labels, sentiment):
+        """One hash per row over everything the aggregates read
+
+        Identical rows get their occurrence number mixed in, so the bucket
+        digests compare the old and new rows as multisets.
+        """
+        content = pd.DataFrame(values).assign(label=labels, sentiment=sentiment)
+        hashes = pd.util.hash_pandas_object(content, index=False).to_numpy()
+        occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy(dtype=np.uint64)
+        return hashes ^ (occurrence * np.uint64(0x9E3779B97F4A7C15))
+
+    def _stats(self, values, labels, sentiment, n_clusters):
+        """Additive statistics for a block of rows"""
+        mask = ~np.isnan(values)
+        x = np.where(mask, values, 0.0)
+        m = mask.astype(np.float64)
+        idx = labels + 1  # -1 (noise / unclustered) lands in slot 0
+        cluster_n = np.zeros((n_clusters, values.shape[1]))
+        cluster_sum = np.zeros((n_clusters, values.shape[1]))
+        cluster_sumsq = np.zeros((n_clusters, values.shape[1]))
+        np.add.at(cluster_n, idx, m)
+        np.add.at(cluster_sum, idx, x)
+        np.add.at(cluster_sumsq, idx, x * x)
+        valid = ~np.isnan(sentiment)
+        return {
+            'n': m.T @ m,                 # rows where both columns are present
+            'sx': x.T @ m,                # sum of column i over those rows
+            'sxx': (x * x).T @ m,
+            'sxy': x.T @ x,
+            'cluster_count': np.bincount(idx, minlength=n_clusters).astype(np.float64),
+            'cluster_n': cluster_n,       # non-missing values of each column per cluster
+            'cluster_sum': cluster_sum,
+            'cluster_sumsq': cluster_sumsq,
+            'sentiment_counts': np.histogram(
+                np.clip(sentiment[valid], -1, 1), bins=self.sentiment_edges
+            )[0].astype(np.float64)
+        }
+
+    def _bucket_stats(self, values, labels, sentiment, buckets, which, n_clusters):
+        """_stats of each bucket in which, stacked along a leading bucket axis"""
+        order = np.argsort(buckets, kind='stable')
+        starts = np.searchsorted(buckets[order], which, side='left')
+        ends = np.searchsorted(buckets[order], which, side='right')
+        blocks = [
+            self._stats(values[rows], labels[rows], sentiment[rows], n_clusters)
+            for rows in (order[a:b] for a, b in zip(starts, ends))
+        ]
+        return {k: np.stack([block[k] for block in blocks]) for k in self.ARRAYS}
+
+    @staticmethod
+    def _pad(array, shape):
+        """Zero-pad the trailing axes of a per-bucket array (cluster arrays grow when new labels appear)"""
+        return np.pad(array, [(0, 0)] + [(0, s - d) for s, d in zip(shape, array.shape[1:])])
+
+    def _claim_version(self):
+        """Create the next free version directory and return its number
+
+        mkdir either creates the directory or fails, so concurrent writers
+        (e.g. dashboard workers refreshing at once) never share a version.
+        """
+        version = (self._current_version() or 0) + 1
+        while True:
+            try:
+                os.mkdir(os.path.join(self.path, f'v{version}'))
+                return version
+            except FileExistsError:
+                version += 1
+
+    def _write(self, arrays, meta):
+        version = self._claim_version()
+        base = os.path.join(self.path, f'v{version}')
+        # readers only open versions named in CURRENT, so the directory is filled in place
+        for name, array in arrays.items():
+            np.save(os.path.join(base, f'{name}.npy'), array)
+        with open(os.path.join(base, 'meta.json'), 'w') as f:
+            json.dump(dict(meta, version=version), f)
+        pointer = os.path.join(self.path, f'.CURRENT-{os.getpid()}-{version}')
+        with open(pointer, 'w') as f:
+            f.write(str(version))
+        os.replace(pointer, os.path.join(self.path, 'CURRENT'))
+        self._retire(version)
+
+    def _retire(self, latest):
+        """Delete versions that no reader has mapped any more
+
+        Readers record the version they map under readers/ (see _hold). The
+        previous version is always kept as a grace generation for readers that
+        read CURRENT just before it moved and have not recorded it yet.
+        """
+        keep = {latest, latest - 1}
+        readers = os.path.join(self.path, 'readers')
+        for name in os.listdir(readers):
+            lease = os.path.join(readers, name)
+            try:
+                if time.time() - os.path.getmtime(lease) > self.reader_ttl:
+                    os.remove(lease)  # the reader exited or stopped polling
+                    continue
+                with open(lease) as f:
+                    keep.add(int(f.read()))
+            except (OSError, ValueError):
+                continue
+        for name in os.listdir(self.path):
+            version = int(name[1:]) if name.startswith('v') and name[1:].isdigit() else None
+            if version is not None and version < latest and version not in keep:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    # ---- readers ------------------------------------------------------------
+    def _current_version(self):
+        try:
+            with open(os.path.join(self.path, 'CURRENT')) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _read(self, version, names=None):
+        if version is None:
+            return None
+        base = os.path.join(self.path, f'v{version}')
+        with open(os.path.join(base, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(base, f'{name}.npy'), mmap_mode='r')
+            for name in (names or self.ARRAYS)
+        }
+        return {'meta': meta, 'arrays': arrays}
+
+    def _hold(self, version):
+        """Record (and periodically re-record) the version this reader has mapped"""
+        if version == self._version and time.time() - self._held_at < self.reader_ttl / 10:
+            return
+        lease = os.path.join(self.path, 'readers', f'{os.getpid()}-{id(self)}')
+        with open(f'{lease}.tmp', 'w') as f:
+            f.write(str(version))
+        os.replace(f'{lease}.tmp', lease)
+        self._held_at = time.time()
+
+    def _current(self):
+        """Memory-mapped aggregates, remapped only when a newer version is published"""
+        version = self._current_version()
+        if version is not None and version != self._version:
+            self._hold(version)
+            try:
+                self._arrays = self._read(version, self.ARRAYS)
+            except FileNotFoundError:
+                # retired between reading CURRENT and recording it; CURRENT has moved on
+                version = self._current_version()
+                self._hold(version)
+                self._arrays = self._read(version, self.ARRAYS)
+            self._version = version
+        elif version is not None:
+            self._hold(version)
+        return self._arrays
+
+    def correlation(self):
+        """Pairwise-complete Pearson correlation matrix"""
+        current = self._current()
+        if current is None:
+            return pd.DataFrame()
+        a = current['arrays']
+        n, sx, sxx, sxy = a['n'], a['sx'], a['sxx'], a['sxy']
+        cov = n * sxy - sx * sx.T
+        var_i = n * sxx - sx * sx
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.sqrt(var_i * var_i.T)
+        columns = current['meta']['columns']
+        return pd.DataFrame(corr, index=columns, columns=columns)
+
+    def cluster_summary(self):
+        """Per-cluster row count, mean and std of each numeric column (missing values skipped)"""
+        current = self._current()
+        if current is None:
+            return pd.DataFrame()
+        a = current['arrays']
+        count = np.asarray(a['cluster_count'])
+        present = count > 0
+        count = count[present]
+        n, sums, sumsq = a['cluster_n'][present], a['cluster_sum'][present], a['cluster_sumsq'][present]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = sums / n
+            std = np.sqrt(np.maximum(sumsq / n - mean ** 2, 0))
+        columns = current['meta']['columns']
+        summary = pd.DataFrame({'Cluster': np.flatnonzero(present) - 1, 'count': count.astype(int)})
+        for j, col in enumerate(columns):
+            summary[f'{col} mean'] = mean[:, j]
+            summary[f'{col} std'] = std[:, j]
+        return summary
+
+    def sentiment_histogram(self):
+        """(bin_edges, counts) of the sentiment column"""
+        current = self._current()
+        if current is None:
+            return self.sentiment_edges, np.zeros(len(self.sentiment_edges) - 1)
+        return self.sentiment_edges, np.asarray(current['arrays']['sentiment_counts'])
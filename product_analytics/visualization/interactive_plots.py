@@ -1,23 +1,64 @@
+from functools import lru_cache
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State
 import dash_bootstrap_components as dbc
+from flask import jsonify
+from config.constants import (
+    FIGURE_CACHE_SIZE, MAX_PLOT_POINTS, WEBGL_THRESHOLD, AGGREGATE_POLL_INTERVAL, TAG_OPTION_LIMIT
+)
+from data_processing.tag_index import ProductTagIndex
+from visualization.downsampling import lttb
 
 class ProductVisualizationDashboard:
     """Interactive dashboard with multiple views"""
     
-    def __init__(self, data, cluster_labels=None):
+    def __init__(self, data, cluster_labels=None, figure_cache_size=FIGURE_CACHE_SIZE,
+                 max_points=MAX_PLOT_POINTS, webgl_threshold=WEBGL_THRESHOLD, aggregate_store=None):
+        """
+        Args:
+            aggregate_store: DashboardAggregateStore backing the cluster,
+                correlation and sentiment panels (None leaves them out). The
+                dashboard only reads it; the pipeline calls refresh()
+            max_points: per-trace point budget; longer series are LTTB-downsampled
+                on the server (None sends every point)
+            webgl_threshold: traces with more points than this render as Scattergl
+        """
         self.data = data
-        self.cluster_labels = cluster_labels
+        self.cluster_labels = None if cluster_labels is None else np.asarray(cluster_labels)
+        self.figure_cache_size = figure_cache_size
+        self.max_points = max_points
+        self.webgl_threshold = webgl_threshold
+        self.aggregates = aggregate_store
+        self._build_product_index()
         self.app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
         self._setup_layout()
         self._register_callbacks()
+
+    def _build_product_index(self):
+        """Date-ordered row positions per product (one pass over the data), the tag index and a fresh figure cache
+
+        Call again after replacing self.data or self.cluster_labels.
+        """
+        dates = self.data['Manufacturing Date'].to_numpy()
+        self.product_index = {
+            product: positions[np.argsort(dates[positions], kind='stable')]
+            for product, positions in self.data.groupby('Product Name', sort=False, observed=True).indices.items()
+        }
+        self.tag_index = ProductTagIndex(self.data)
+        self._time_series_figure = lru_cache(maxsize=self.figure_cache_size)(self._build_time_series_figure)
+
+    def cache_stats(self):
+        """Figure cache hits/misses/size (also served at /cache-stats)"""
+        info = self._time_series_figure.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'maxsize': info.maxsize}
         
     def _setup_layout(self):
         """Configure dashboard layout"""
-        self.app.layout = dbc.Container([
+        rows = [
             dbc.Row([
                 dbc.Col(html.H1("Advanced Product Analytics"), width=12)
             ]),
@@ -44,64 +85,187 @@ class ProductVisualizationDashboard:
                 ], width=6)
             ]),
             dbc.Row([
-                dbc.Col(dcc.Graph(id='time-series-plot'), width=12)
-            ]),
-            dbc.Row([
-                dbc.Col(dcc.Graph(id='cluster-plot'), width=6),
-                dbc.Col(dcc.Graph(id='correlation-heatmap'), width=6)
+                dbc.Col([
+                    dcc.Dropdown(
+                        id='tag-filter',
+                        placeholder='Filter by tag, color or size',
+                        options=[],
+                        multi=True
+                    )
+                ], width=12)
             ]),
             dbc.Row([
-                dbc.Col(dcc.Graph(id='sentiment-distribution'), width=12)
+                dbc.Col(dcc.Graph(id='time-series-plot'), width=12)
             ])
-        ], fluid=True)
+        ]
+        if self.aggregates is not None:
+            rows += [
+                dbc.Row([
+                    dbc.Col(dcc.Graph(id='cluster-plot'), width=6),
+                    dbc.Col(dcc.Graph(id='correlation-heatmap'), width=6)
+                ]),
+                dbc.Row([
+                    dbc.Col(dcc.Graph(id='sentiment-distribution'), width=12)
+                ]),
+                dcc.Interval(id='aggregate-refresh', interval=AGGREGATE_POLL_INTERVAL)
+            ]
+        self.app.layout = dbc.Container(rows, fluid=True)
         
     def _register_callbacks(self):
         """Define interactive callbacks"""
         @self.app.callback(
             Output('time-series-plot', 'figure'),
             [Input('product-selector', 'value'),
-             Input('metric-selector', 'value')]
+             Input('metric-selector', 'value'),
+             Input('tag-filter', 'value')]
         )
-        def update_time_series(product, metrics):
+        def update_time_series(product, metrics, tags):
             if not isinstance(metrics, list):
                 metrics = [metrics]
-                
-            fig = make_subplots(specs=[[{"secondary_y": True}]])
-            product_data = self.data[self.data['Product Name'] == product]
+            return self._time_series_figure(product, tuple(metrics), tuple(sorted(tags or ())))
+
+        # Suggestions come from the index as the user types; the full vocabulary never reaches the browser
+        @self.app.callback(
+            Output('tag-filter', 'options'),
+            Input('tag-filter', 'search_value'),
+            State('tag-filter', 'value')
+        )
+        def update_tag_options(search, selected):
+            return self._tag_options(search, selected)
+
+        @self.app.server.route('/cache-stats')
+        def cache_stats():
+            return jsonify(self.cache_stats())
+
+        if self.aggregates is None:
+            return
+
+        # Aggregate panels read the shared store; the interval picks up refreshes
+        @self.app.callback(
+            Output('cluster-plot', 'figure'),
+            Input('aggregate-refresh', 'n_intervals')
+        )
+        def update_cluster_plot(_):
+            return self._cluster_figure()
+
+        @self.app.callback(
+            Output('correlation-heatmap', 'figure'),
+            Input('aggregate-refresh', 'n_intervals')
+        )
+        def update_correlation_heatmap(_):
+            return self._correlation_figure()
+
+        @self.app.callback(
+            Output('sentiment-distribution', 'figure'),
+            Input('aggregate-refresh', 'n_intervals')
+        )
+        def update_sentiment_distribution(_):
+            return self._sentiment_figure()
+
+    def _cluster_figure(self):
+        """Cluster sizes with mean price and rating per cluster"""
+        summary = self.aggregates.cluster_summary()
+        fig = go.Figure()
+        if len(summary):
+            fig.add_trace(go.Bar(
+                x=summary['Cluster'].astype(str),
+                y=summary['count'],
+                name='Products',
+                customdata=summary.filter(like=' mean').to_numpy(),
+                hovertemplate='<br>'.join(
+                    ['Cluster %{x}', 'Products: %{y}'] +
+                    [f'{col}: %{{customdata[{i}]:.2f}}' for i, col in enumerate(summary.filter(like=' mean').columns)]
+                ) + '<extra></extra>'
+            ))
+        fig.update_layout(title='Cluster Overview', xaxis_title='Cluster', yaxis_title='Products')
+        return fig
+
+    def _correlation_figure(self):
+        """Correlation heatmap of the numeric product attributes"""
+        corr = self.aggregates.correlation()
+        fig = go.Figure(go.Heatmap(
+            z=corr.to_numpy(), x=list(corr.columns), y=list(corr.index),
+            zmin=-1, zmax=1, colorscale='RdBu'
+        ))
+        fig.update_layout(title='Feature Correlations')
+        return fig
+
+    def _sentiment_figure(self):
+        """Distribution of sentiment scores"""
+        edges, counts = self.aggregates.sentiment_histogram()
+        fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+        fig.update_layout(title='Sentiment Distribution', xaxis_title='Sentiment Score', yaxis_title='Products')
+        return fig
+
+    def _tag_options(self, search, selected=None, limit=TAG_OPTION_LIMIT):
+        """Dropdown options for terms whose value starts with search, keeping the selected ones"""
+        terms = list(selected or [])
+        if search:
+            for kind in ('color', 'size', 'tag'):
+                terms += self.tag_index.search(f'{kind}:{search}', limit=limit - len(terms))
+                if len(terms) >= limit:
+                    break
+        return [{'label': t, 'value': t} for t in dict.fromkeys(terms)]
+
+    def _build_time_series_figure(self, product, metrics, tags=()):
+        """Render the time-series view for one product (memoized per product/metrics/tags)
+
+        tags keeps only rows carrying every listed term (see ProductTagIndex).
+        """
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
+        positions = self.product_index.get(product, np.array([], dtype=np.intp))
+        if tags:
+            positions = positions[self.tag_index.mask(all_of=tags)[positions]]
+        product_data = self.data.iloc[positions]
+        
+        dates = product_data['Manufacturing Date'].to_numpy()
+        for metric in metrics:
+            x, y = self._downsample(dates, product_data[metric].to_numpy(dtype=np.float64, na_value=np.nan))
+            fig.add_trace(
+                self._trace_class(len(x))(
+                    x=x,
+                    y=y,
+                    name=metric,
+                    mode='lines+markers' if len(x) <= self.webgl_threshold else 'lines'
+                ),
+                secondary_y=False
+            )
             
-            for metric in metrics:
-                fig.add_trace(
-                    go.Scatter(
-                        x=product_data['Manufacturing Date'],
-                        y=product_data[metric],
-                        name=metric,
-                        mode='lines+markers'
-                    ),
-                    secondary_y=False
-                )
-                
-            # Add cluster information if available
-            if self.cluster_labels is not None:
-                fig.add_trace(
-                    go.Scatter(
-                        x=product_data['Manufacturing Date'],
-                        y=self.cluster_labels[self.data['Product Name'] == product],
-                        name='Cluster',
-                        mode='markers',
-                        marker=dict(size=10, opacity=0.7)
-                    ),
-                    secondary_y=True
-                )
-                
-            fig.update_layout(
-                title=f'Time Series Analysis for {product}',
-                xaxis_title='Date',
-                hovermode='x unified'
+        # Add cluster information if available
+        if self.cluster_labels is not None:
+            x, y = self._downsample(dates, self.cluster_labels[positions])
+            fig.add_trace(
+                self._trace_class(len(x))(
+                    x=x,
+                    y=y,
+                    name='Cluster',
+                    mode='markers',
+                    marker=dict(size=10, opacity=0.7)
+                ),
+                secondary_y=True
             )
-            return fig
             
-        # Additional callbacks for other visualizations...
+        fig.update_layout(
+            title=f'Time Series Analysis for {product}' + (f" ({', '.join(tags)})" if tags else ''),
+            xaxis_title='Date',
+            hovermode='x unified'
+        )
+        return fig
         
+    def _downsample(self, x, y):
+        """Shape-preserving LTTB reduction of one series to the point budget"""
+        if self.max_points is None or len(x) <= self.max_points:
+            return x, y
+        y_numeric = np.asarray(y, dtype=np.float64)
+        valid = ~np.isnan(y_numeric)
+        x, y, y_numeric = x[valid], y[valid], y_numeric[valid]
+        x_numeric = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+        keep = lttb(x_numeric, y_numeric, self.max_points)
+        return x[keep], y[keep]
+
+    def _trace_class(self, n_points):
+        return go.Scattergl if n_points > self.webgl_threshold else go.Scatter
+
     def run(self, debug=True, port=8050):
         """Start the dashboard server"""
         self.app.run_server(debug=debug, port=port)